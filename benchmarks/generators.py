@@ -0,0 +1,318 @@
+"""
+Synthetic VASP and LOBSTER files for the benchmarks.
+
+Every generator takes the output path and the size of the system, fills the file with
+reproducible random data (seeded), and returns the path. The files are only meant to be
+read by vsh and pymatgen, the physics in them is meaningless.
+"""
+import numpy as np
+
+ORBITALS = ["s", "py", "pz", "px", "dxy", "dyz", "dz2", "dxz", "x2-y2"]
+
+# 2m/hbar^2 in the units pymatgen uses to build the plane wave basis
+WAVECAR_C = 0.262465831
+
+
+def random_structure(nions: int, length: float = None, seed: int = 0):
+    """Returns a cubic lattice and fractional coordinates for nions atoms of two species"""
+    rng = np.random.default_rng(seed)
+    if length is None:
+        # roughly 12 cubic angstroms per atom
+        length = (12 * nions) ** (1 / 3)
+    lattice = np.eye(3) * length
+    coordinates = rng.random((nions, 3))
+    symbols = ["Bi"] * (nions - nions // 2) + ["Se"] * (nions // 2)
+
+    return lattice, coordinates, symbols
+
+
+def format_rows(tag: str, rows, fmt: str = "{:16.8f}") -> str:
+    """Formats a 2D array as xml rows"""
+    return "".join(
+        f"<{tag}>" + " ".join(fmt.format(value) for value in row) + f" </{tag}>\n"
+        for row in rows
+    )
+
+
+def structure_xml(name: str, lattice, coordinates) -> str:
+    volume = abs(np.linalg.det(lattice))
+    reciprocal = np.linalg.inv(lattice).T
+    return (
+        f'<structure name="{name}">\n<crystal>\n<varray name="basis">\n'
+        + format_rows("v", lattice)
+        + f'</varray>\n<i name="volume">{volume:.8f}</i>\n<varray name="rec_basis">\n'
+        + format_rows("v", reciprocal)
+        + '</varray>\n</crystal>\n<varray name="positions">\n'
+        + format_rows("v", coordinates)
+        + "</varray>\n</structure>\n"
+    )
+
+
+def write_vasprun(
+    file: str,
+    nkpoints: int = 10,
+    nbands: int = 16,
+    nions: int = 4,
+    nspins: int = 1,
+    seed: int = 0,
+) -> str:
+    """Writes a vasprun.xml with eigenvalues, projected eigenvalues, and a total DOS"""
+    rng = np.random.default_rng(seed)
+    lattice, coordinates, symbols = random_structure(nions, seed=seed)
+    kpoints = np.column_stack(
+        [np.linspace(0, 0.5, nkpoints), np.zeros(nkpoints), np.zeros(nkpoints)]
+    )
+    species = list(dict.fromkeys(symbols))
+    efermi = 0.5
+
+    with open(file, "w") as f:
+        f.write('<?xml version="1.0" encoding="ISO-8859-1"?>\n<modeling>\n')
+        f.write(
+            '<generator>\n<i name="program" type="string">vasp </i>\n'
+            '<i name="version" type="string">6.3.0 </i>\n</generator>\n'
+        )
+        f.write(
+            '<incar>\n<i type="string" name="PREC">accurate</i>\n'
+            '<i name="ENCUT">    400.00000000</i>\n'
+            f'<i type="int" name="NBANDS">{nbands}</i>\n'
+            f'<i type="int" name="ISPIN">{nspins}</i>\n'
+            '<i type="int" name="LORBIT">11</i>\n</incar>\n'
+        )
+        f.write(structure_xml("primitive_cell", lattice, coordinates))
+        f.write(
+            '<kpoints>\n<generation param="listgenerated">\n'
+            f'<i name="divisions" type="int">{nkpoints}</i>\n'
+            '<v>0.0 0.0 0.0</v>\n<v>0.5 0.0 0.0</v>\n</generation>\n'
+            '<varray name="kpointlist">\n'
+            + format_rows("v", kpoints)
+            + '</varray>\n<varray name="weights">\n'
+            + format_rows("v", np.full((nkpoints, 1), 1 / nkpoints))
+            + "</varray>\n</kpoints>\n"
+        )
+        f.write(
+            '<parameters>\n<separator name="electronic">\n'
+            '<i name="PREC" type="string">accurate</i>\n'
+            '<i name="ENCUT">    400.00000000</i>\n'
+            f'<i type="int" name="NBANDS">{nbands}</i>\n'
+            '<i type="int" name="NELM">60</i>\n'
+            f'<separator name="electronic spin">\n<i type="int" name="ISPIN">{nspins}</i>\n'
+            "</separator>\n</separator>\n"
+            '<separator name="ionic">\n<i type="int" name="IBRION">-1</i>\n'
+            '<i type="int" name="NSW">0</i>\n</separator>\n'
+            '<separator name="electronic exchange-correlation">\n'
+            '<i type="string" name="GGA">PE</i>\n</separator>\n'
+            "</parameters>\n"
+        )
+
+        f.write(f"<atominfo>\n<atoms>{nions}</atoms>\n<types>{len(species)}</types>\n")
+        f.write(
+            '<array name="atoms">\n<dimension dim="1">ion</dimension>\n'
+            '<field type="string">element</field>\n<field type="int">atomtype</field>\n<set>\n'
+        )
+        for symbol in symbols:
+            f.write(f"<rc><c>{symbol:2s}</c><c>{species.index(symbol) + 1}</c></rc>\n")
+        f.write(
+            '</set>\n</array>\n<array name="atomtypes">\n<dimension dim="1">type</dimension>\n'
+            '<field type="int">atomspertype</field>\n<field type="string">element</field>\n'
+            "<field>mass</field>\n<field>valence</field>\n"
+            '<field type="string">pseudopotential</field>\n<set>\n'
+        )
+        for symbol in species:
+            f.write(
+                f"<rc><c>{symbols.count(symbol)}</c><c>{symbol:2s}</c><c>100.0</c>"
+                f"<c>5.0</c><c>  PAW_PBE {symbol} 06Sep2000</c></rc>\n"
+            )
+        f.write("</set>\n</array>\n</atominfo>\n")
+        f.write(structure_xml("initialpos", lattice, coordinates))
+
+        energy = (
+            '<energy>\n<i name="e_fr_energy">-10.0</i>\n<i name="e_wo_entrp">-10.0</i>\n'
+            '<i name="e_0_energy">-10.0</i>\n</energy>\n'
+        )
+        f.write("<calculation>\n<scstep>\n" + energy + "</scstep>\n")
+        f.write(structure_xml("", lattice, coordinates).replace(' name=""', ""))
+        f.write(
+            '<varray name="forces">\n'
+            + format_rows("v", np.zeros((nions, 3)))
+            + '</varray>\n<varray name="stress">\n'
+            + format_rows("v", np.zeros((3, 3)))
+            + "</varray>\n"
+            + energy
+        )
+
+        energies = np.sort(rng.normal(0, 3, (nspins, nkpoints, nbands)), axis=-1)
+        occupations = (energies < efermi).astype(float)
+        eigenvalues = (
+            '<eigenvalues>\n<array>\n<dimension dim="1">band</dimension>\n'
+            '<dimension dim="2">kpoint</dimension>\n<dimension dim="3">spin</dimension>\n'
+            "<field>eigene</field>\n<field>occ</field>\n<set>\n"
+        )
+        for spin in range(nspins):
+            eigenvalues += f'<set comment="spin {spin + 1}">\n'
+            for k in range(nkpoints):
+                eigenvalues += f'<set comment="kpoint {k + 1}">\n'
+                eigenvalues += format_rows(
+                    "r", np.column_stack([energies[spin, k], occupations[spin, k]]), "{:12.4f}"
+                )
+                eigenvalues += "</set>\n"
+            eigenvalues += "</set>\n"
+        eigenvalues += "</set>\n</array>\n</eigenvalues>\n"
+        f.write(eigenvalues)
+
+        # projections are written one band at a time to keep memory flat for large sizes
+        f.write("<projected>\n" + eigenvalues)
+        f.write(
+            '<array>\n<dimension dim="1">ion</dimension>\n<dimension dim="2">band</dimension>\n'
+            '<dimension dim="3">kpoint</dimension>\n<dimension dim="4">spin</dimension>\n'
+        )
+        f.write("".join(f"<field>{orbital}</field>\n" for orbital in ORBITALS))
+        f.write("<set>\n")
+        for spin in range(nspins):
+            f.write(f'<set comment="spin{spin + 1}">\n')
+            for k in range(nkpoints):
+                f.write(f'<set comment="kpoint {k + 1}">\n')
+                for b in range(nbands):
+                    f.write(f'<set comment="band {b + 1}">\n')
+                    f.write(format_rows("r", rng.random((nions, len(ORBITALS))) / nions, "{:6.3f}"))
+                    f.write("</set>\n")
+                f.write("</set>\n")
+            f.write("</set>\n")
+        f.write("</set>\n</array>\n</projected>\n")
+
+        dos = np.column_stack(
+            [np.linspace(-10, 10, 301), np.zeros(301), np.zeros(301)]
+        )
+        f.write(
+            f'<dos>\n<i name="efermi">{efermi:12.8f}</i>\n<total>\n<array>\n'
+            '<dimension dim="1">gridpoints</dimension>\n<dimension dim="2">spin</dimension>\n'
+            "<field>energy</field>\n<field>total</field>\n<field>integrated</field>\n<set>\n"
+        )
+        for spin in range(nspins):
+            f.write(f'<set comment="spin {spin + 1}">\n' + format_rows("r", dos, "{:10.4f}") + "</set>\n")
+        f.write("</set>\n</array>\n</total>\n</dos>\n</calculation>\n")
+        f.write(structure_xml("finalpos", lattice, coordinates))
+        f.write("</modeling>\n")
+
+    return file
+
+
+def write_poscar(file: str, nions: int = 100, seed: int = 0) -> str:
+    """Writes a POSCAR with nions randomly placed atoms"""
+    lattice, coordinates, symbols = random_structure(nions, seed=seed)
+    species = list(dict.fromkeys(symbols))
+
+    with open(file, "w") as f:
+        f.write("synthetic\n1.0\n")
+        f.write(format_rows("", lattice).replace("<>", "").replace(" </>", ""))
+        f.write(" ".join(species) + "\n")
+        f.write(" ".join(str(symbols.count(s)) for s in species) + "\nDirect\n")
+        f.write(format_rows("", coordinates).replace("<>", "").replace(" </>", ""))
+
+    return file
+
+
+def write_xdatcar(file: str, nframes: int = 100, nions: int = 100, seed: int = 0) -> str:
+    """Writes an XDATCAR of nframes random displacements of nions atoms"""
+    rng = np.random.default_rng(seed)
+    lattice, coordinates, symbols = random_structure(nions, seed=seed)
+    species = list(dict.fromkeys(symbols))
+
+    with open(file, "w") as f:
+        f.write("synthetic\n1\n")
+        f.write(format_rows("", lattice).replace("<>", "").replace(" </>", ""))
+        f.write(" ".join(species) + "\n")
+        f.write(" ".join(str(symbols.count(s)) for s in species) + "\n")
+        for frame in range(nframes):
+            positions = (coordinates + rng.normal(0, 0.01, coordinates.shape)) % 1
+            f.write(f"Direct configuration= {frame + 1:5d}\n")
+            f.write(format_rows("", positions).replace("<>", "").replace(" </>", ""))
+
+    return file
+
+
+def write_chgcar(file: str, grid: int = 48, nions: int = 4, seed: int = 0) -> str:
+    """Writes a CHGCAR with a grid x grid x grid total density"""
+    from pymatgen.core import Lattice, Structure
+    from pymatgen.io.vasp import Chgcar, Poscar
+
+    rng = np.random.default_rng(seed)
+    lattice, coordinates, symbols = random_structure(nions, seed=seed)
+    structure = Structure(Lattice(lattice), symbols, coordinates)
+    data = {"total": rng.random((grid, grid, grid))}
+    Chgcar(Poscar(structure), data).write_file(file)
+
+    return file
+
+
+def write_icohplist(file: str, nbonds: int = 1000, nions: int = 50, seed: int = 0) -> str:
+    """Writes an ICOHPLIST.lobster with nbonds random bonds between nions atoms"""
+    rng = np.random.default_rng(seed)
+    _, _, symbols = random_structure(nions, seed=seed)
+    mu = rng.integers(0, nions, nbonds)
+    nu = (mu + rng.integers(1, nions, nbonds)) % nions
+    distances = rng.uniform(2, 4, nbonds)
+    translations = rng.integers(-1, 2, (nbonds, 3))
+    icohps = -rng.exponential(0.5, nbonds)
+
+    with open(file, "w") as f:
+        f.write(
+            "  COHP#  atomMU  atomNU  distance  translation  ICOHP (eV) for spin  1\n"
+        )
+        for i in range(nbonds):
+            f.write(
+                f"{i + 1:7d} {symbols[mu[i]]}{mu[i] + 1:<6d}{symbols[nu[i]]}{nu[i] + 1:<6d}"
+                f"{distances[i]:10.5f} {translations[i, 0]:4d} {translations[i, 1]:4d} "
+                f"{translations[i, 2]:4d} {icohps[i]:12.5f}\n"
+            )
+
+    return file
+
+
+def plane_waves(lattice, kpoint, encut: float) -> int:
+    """Returns the number of plane waves pymatgen expects for a standard WAVECAR kpoint"""
+    reciprocal = 2 * np.pi * np.linalg.inv(lattice).T
+    nbmax = [
+        int(np.sqrt(encut * WAVECAR_C) / np.linalg.norm(b)) + 1 for b in reciprocal
+    ]
+    axes = [np.arange(-n, n + 1) for n in nbmax]
+    G = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+    energies = np.linalg.norm((G + kpoint) @ reciprocal, axis=1) ** 2 / WAVECAR_C
+
+    return int(np.count_nonzero(energies < encut))
+
+
+def write_wavecar(
+    file: str,
+    nkpoints: int = 2,
+    nbands: int = 8,
+    encut: float = 100.0,
+    length: float = 6.0,
+    seed: int = 0,
+) -> str:
+    """Writes a spin-unpolarized, single precision standard WAVECAR"""
+    rng = np.random.default_rng(seed)
+    lattice = np.eye(3) * length
+    kpoints = np.column_stack(
+        [np.linspace(0, 0.5, nkpoints), np.zeros(nkpoints), np.zeros(nkpoints)]
+    )
+    nplanes = [plane_waves(lattice, k, encut) for k in kpoints]
+
+    # every fortran record has the same length in bytes
+    recl = 8 * max(max(nplanes), 4 + 3 * nbands, 13)
+
+    def record(values, dtype) -> bytes:
+        data = np.asarray(values, dtype=dtype).tobytes()
+        return data + b"\0" * (recl - len(data))
+
+    with open(file, "wb") as f:
+        f.write(record([recl, 1, 45200], np.float64))
+        f.write(record([nkpoints, nbands, encut, *lattice.ravel(), 0.0], np.float64))
+        for kpoint, nplane in zip(kpoints, nplanes):
+            energies = np.sort(rng.normal(0, 3, nbands))
+            enocc = np.column_stack([energies, np.zeros(nbands), energies < 0])
+            f.write(record([nplane, *kpoint, *enocc.ravel()], np.float64))
+            for _ in range(nbands):
+                coefficients = rng.normal(size=nplane) + 1j * rng.normal(size=nplane)
+                f.write(record(coefficients / np.linalg.norm(coefficients), np.complex64))
+
+    return file
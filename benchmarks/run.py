@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Times and memory-profiles the heavy paths of the vsh subcommands on synthetic inputs.
+
+Each benchmark generates its input at several system sizes (see generators.py), then
+records the best and mean wall time over --repeat calls and the peak traced memory of one
+extra call. Results are written as JSON so scaling curves can be compared between releases.
+
+    python benchmarks/run.py -o results.json
+    python benchmarks/run.py calculate_rdf conflicting_atoms --quick
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import Namespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generators  # noqa: E402
+
+# the parse cache would turn every repeat after the first into a pickle load
+os.environ["VSH_NO_CACHE"] = "1"
+
+
+def load_dataframe_from_file(directory: str, size: int):
+    from vsh.scripts.procar import load_dataframe_from_file
+
+    file = generators.write_vasprun(
+        os.path.join(directory, "vasprun.xml"), nkpoints=size, nbands=32, nions=8
+    )
+    parameters = {"kpoints": size, "bands": 32, "ions": 8}
+
+    return parameters, lambda: load_dataframe_from_file(file)
+
+
+def load_dataframe_from_cache(directory: str, size: int):
+    from vsh.scripts.procar import (
+        load_dataframe_from_file,
+        load_projected_bands,
+        save_projected_bands,
+    )
+
+    file = generators.write_vasprun(
+        os.path.join(directory, "vasprun.xml"), nkpoints=size, nbands=32, nions=8
+    )
+    cache = os.path.join(directory, "procar.vsh")
+    save_projected_bands(load_projected_bands(file), cache)
+    parameters = {"kpoints": size, "bands": 32, "ions": 8}
+
+    return parameters, lambda: load_dataframe_from_file(cache)
+
+
+def get_partial_charge_density(directory: str, size: int):
+    from pymatgen.io.vasp import Poscar
+
+    from vsh.scripts.wavecar import get_partial_charge_density
+    from vsh.utils.wavecar_tools import WavecarFile
+
+    file = generators.write_wavecar(
+        os.path.join(directory, "WAVECAR"), nkpoints=2, nbands=size, encut=150.0
+    )
+    poscar = Poscar.from_file(
+        generators.write_poscar(os.path.join(directory, "POSCAR"), nions=4)
+    )
+    wavecar = WavecarFile(file, vasp_type="std")
+    bands = list(range(size))
+    parameters = {"kpoints": 2, "bands": size, "grid": wavecar.ng.tolist()}
+
+    return parameters, lambda: get_partial_charge_density(
+        wavecar, poscar, [0, 1], bands, None, None, None, 2
+    )
+
+
+def generate_unk(directory: str, size: int):
+    from vsh.scripts.wavecar import generate_unk
+
+    file = generators.write_wavecar(
+        os.path.join(directory, "WAVECAR"), nkpoints=2, nbands=size, encut=150.0
+    )
+    args = Namespace(
+        input=file, output=os.path.join(directory, "UNK"), jobs=1, block=None, single=False
+    )
+    parameters = {"kpoints": 2, "bands": size}
+
+    return parameters, lambda: generate_unk(args)
+
+
+def calculate_rdf(directory: str, size: int):
+    from ase.io import read
+
+    from vsh.utils.structure_tools import calculate_rdf
+
+    atoms = read(generators.write_poscar(os.path.join(directory, "POSCAR"), nions=size))
+    coordinates = atoms.get_positions()
+
+    return {"ions": size}, lambda: calculate_rdf(coordinates, r_max=10.0, cell=atoms.cell.array, pbc=True)
+
+
+def trajectory_rdf(directory: str, size: int):
+    from vsh.utils.structure_tools import trajectory_rdf
+
+    file = generators.write_xdatcar(os.path.join(directory, "XDATCAR"), nframes=size, nions=200)
+
+    return {"frames": size, "ions": 200}, lambda: trajectory_rdf(file, r_max=6.0)
+
+
+def conflicting_atoms(directory: str, size: int):
+    from ase.io import read
+
+    from vsh.scripts.analysis import conflicting_atoms
+
+    atoms = read(generators.write_poscar(os.path.join(directory, "POSCAR"), nions=size))
+
+    return {"ions": size}, lambda: conflicting_atoms(atoms, 0.5)
+
+
+def ichop_list_to_dataframe(directory: str, size: int):
+    from vsh.scripts.cohp import ichop_list_to_dataframe
+
+    file = generators.write_icohplist(
+        os.path.join(directory, "ICOHPLIST.lobster"), nbonds=size, nions=100
+    )
+
+    return {"bonds": size}, lambda: ichop_list_to_dataframe(file)
+
+
+def animate_slices(directory: str, size: int):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from vsh.scripts.stm import animate_slices
+
+    file = generators.write_chgcar(os.path.join(directory, "CHGCAR"), grid=size)
+    output = os.path.join(directory, "slices.gif")
+
+    return {"grid": size}, lambda: animate_slices(file, 2, 2, output=output)
+
+
+def read_chgcar(directory: str, size: int):
+    from vsh.utils.chgcar_tools import read_chgcar
+
+    file = generators.write_chgcar(os.path.join(directory, "CHGCAR"), grid=size)
+
+    return {"grid": size}, lambda: read_chgcar(file)
+
+
+def combine_grids(directory: str, size: int):
+    from vsh.utils.chgcar_tools import combine_grids
+
+    files = [
+        generators.write_chgcar(os.path.join(directory, f"CHGCAR{i}"), grid=size, seed=i)
+        for i in range(3)
+    ]
+    output = os.path.join(directory, "CHGCAR_diff")
+
+    return {"grid": size}, lambda: combine_grids(files, [1, -1, -1], output)
+
+
+def db_round_trip(directory: str, size: int):
+    from vsh.scripts.db import save_vasprun_to_file
+
+    file = generators.write_vasprun(
+        os.path.join(directory, "vasprun.xml"), nkpoints=size, nbands=16, nions=4
+    )
+    args = Namespace(
+        input=file,
+        output=os.path.join(directory, "vasprun.tgz"),
+        dos=True,
+        eigen=True,
+        projected=False,
+        potcar=False,
+    )
+
+    def round_trip():
+        save_vasprun_to_file(args)
+        # the same read back summarize_vasprun does for compressed files
+        with gzip.open(args.output, "rb") as f:
+            return json.loads(f.read().decode("utf-8"))
+
+    return {"kpoints": size, "bands": 16, "ions": 4}, round_trip
+
+
+# benchmark name: (setup function, sizes)
+BENCHMARKS = {
+    "load_dataframe_from_file": (load_dataframe_from_file, [10, 20, 40, 80]),
+    "load_dataframe_from_cache": (load_dataframe_from_cache, [10, 20, 40, 80]),
+    "get_partial_charge_density": (get_partial_charge_density, [2, 4, 8]),
+    "generate_unk": (generate_unk, [2, 4, 8]),
+    "calculate_rdf": (calculate_rdf, [100, 200, 400, 800]),
+    "trajectory_rdf": (trajectory_rdf, [10, 20, 40, 80]),
+    "conflicting_atoms": (conflicting_atoms, [100, 200, 400, 800]),
+    "ichop_list_to_dataframe": (ichop_list_to_dataframe, [1000, 10000, 100000]),
+    "animate_slices": (animate_slices, [16, 32]),
+    "db_round_trip": (db_round_trip, [10, 20, 40]),
+    "read_chgcar": (read_chgcar, [32, 64, 96]),
+    "combine_grids": (combine_grids, [32, 64, 96]),
+}
+
+
+def measure(function, repeat: int) -> dict:
+    """Returns the best and mean time of repeat calls, and the peak traced memory of one call"""
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {"best": min(times), "mean": float(np.mean(times)), "peak_memory": peak}
+
+
+def run_benchmark(name: str, sizes: list[int], repeat: int) -> list[dict]:
+    setup, _ = BENCHMARKS[name]
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            parameters, function = setup(directory, size)
+            try:
+                result = {"size": size, "parameters": parameters, **measure(function, repeat)}
+            except Exception as e:
+                result = {"size": size, "parameters": parameters, "error": repr(e)}
+        results.append(result)
+        print_result(name, result)
+
+    return results
+
+
+def print_result(name: str, result: dict) -> None:
+    if "error" in result:
+        print(f"{name:<28} {result['size']:>8}  error: {result['error']}")
+    else:
+        print(
+            f"{name:<28} {result['size']:>8} {result['best']:>10.4f} s "
+            f"{result['peak_memory'] / 1024**2:>10.1f} MiB"
+        )
+
+
+def versions() -> dict:
+    from importlib.metadata import PackageNotFoundError, version
+
+    packages = {}
+    for package in ["vsh", "numpy", "pandas", "pymatgen", "ase", "scipy"]:
+        try:
+            packages[package] = version(package)
+        except PackageNotFoundError:
+            packages[package] = None
+
+    return packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the heavy paths of vsh")
+    parser.add_argument(
+        "benchmarks", nargs="*", default=list(BENCHMARKS), help="Benchmarks to run"
+    )
+    parser.add_argument("-n", "--repeat", type=int, default=3, help="Calls per size")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", help="System sizes, overrides each benchmark default"
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Only run the two smallest sizes"
+    )
+    parser.add_argument("-o", "--output", type=str, help="Write the results to a JSON file")
+    args = parser.parse_args()
+
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "versions": versions(),
+        "benchmarks": {},
+    }
+    print(f"{'benchmark':<28} {'size':>8} {'time':>12} {'peak memory':>14}")
+    for name in args.benchmarks:
+        sizes = args.sizes or BENCHMARKS[name][1]
+        if args.quick:
+            sizes = sizes[:2]
+        results["benchmarks"][name] = run_benchmark(name, sizes, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
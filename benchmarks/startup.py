@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Measures the startup time of every vsh subcommand.
+
+For each subcommand the wall time of importing vsh.scripts.<command> and of running
+`vsh <command> --help` is recorded in a fresh interpreter, along with the slowest
+imports reported by `python -X importtime`. Results are written as JSON so that a
+later run can be compared against them with --baseline.
+
+    python benchmarks/startup.py -o startup.json
+    python benchmarks/startup.py --baseline startup.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = [
+    "adsorb",
+    "alchemy",
+    "analysis",
+    "band",
+    "chgcar",
+    "cohp",
+    "db",
+    "incar",
+    "kpoints",
+    "manage",
+    "poscar",
+    "procar",
+    "slab",
+    "stm",
+    "wavecar",
+]
+
+# full command lines with a target time in seconds
+TARGETS = {
+    "incar --help": 0.15,
+    "kpoints --mesh 4 4 4": 0.5,
+}
+
+
+def time_python(code: str, repeat: int) -> float | None:
+    """Returns the median wall time of running code in a fresh interpreter, None if it fails"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-c", code],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        times.append(time.perf_counter() - start)
+        if process.returncode != 0:
+            return None
+
+    return statistics.median(times)
+
+
+def time_cli(command: str, repeat: int) -> float | None:
+    """Returns the median wall time of a vsh command line"""
+    code = f"import sys; from vsh.cli import main; sys.argv = ['vsh'] + {command.split()!r}; main()"
+    return time_python(code, repeat)
+
+
+def slowest_imports(module: str, count: int = 5) -> list[dict]:
+    """Returns the imports with the largest cumulative time when importing module"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    imports = []
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        # only packages, their submodules are included in the cumulative time
+        if "." in name or name == "vsh":
+            continue
+        imports.append({"module": name, "seconds": int(cumulative) / 1e6})
+
+    return sorted(imports, key=lambda i: i["seconds"], reverse=True)[:count]
+
+
+def benchmark(commands: list[str], repeat: int) -> dict:
+    """Returns the startup times of each command and of the target command lines"""
+    results = {
+        "python": sys.version.split()[0],
+        "interpreter": time_python("pass", repeat),
+        "commands": {},
+        "targets": {},
+    }
+
+    for command in commands:
+        module = f"vsh.scripts.{command}"
+        results["commands"][command] = {
+            "import": time_python(f"import {module}", repeat),
+            "help": time_cli(f"{command} --help", repeat),
+            "slowest_imports": slowest_imports(module),
+        }
+
+    for command, target in TARGETS.items():
+        results["targets"][command] = {
+            "seconds": time_cli(command, repeat),
+            "target": target,
+        }
+
+    return results
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Lists the timings that are slower than the baseline by more than tolerance"""
+    slower = []
+    for command, timings in results["commands"].items():
+        previous = baseline["commands"].get(command, {})
+        for key in ["import", "help"]:
+            old, new = previous.get(key), timings[key]
+            if old is not None and new is not None and new > old * (1 + tolerance):
+                slower.append(f"{command} {key}: {old:.3f} s -> {new:.3f} s")
+
+    return slower
+
+
+def print_results(results: dict) -> None:
+    print(f"{'command':<10} {'import (s)':>10} {'--help (s)':>10}  slowest import")
+    for command, timings in results["commands"].items():
+        slowest = timings["slowest_imports"][0]["module"] if timings["slowest_imports"] else ""
+        imported = "failed" if timings["import"] is None else f"{timings['import']:.3f}"
+        helped = "failed" if timings["help"] is None else f"{timings['help']:.3f}"
+        print(f"{command:<10} {imported:>10} {helped:>10}  {slowest}")
+
+    for command, timing in results["targets"].items():
+        seconds = timing["seconds"]
+        status = "failed" if seconds is None else f"{seconds:.3f} s"
+        print(f"vsh {command}: {status} (target {timing['target']:.3f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vsh startup time")
+    parser.add_argument("commands", nargs="*", default=COMMANDS, help="Subcommands to time")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="Runs per measurement")
+    parser.add_argument("-o", "--output", type=str, help="Write the results to a JSON file")
+    parser.add_argument("--baseline", type=str, help="JSON results to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown relative to the baseline (default 0.25)",
+    )
+    args = parser.parse_args()
+
+    results = benchmark(args.commands, args.repeat)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = regressions(results, baseline, args.tolerance)
+        for line in slower:
+            print(f"regression: {line}")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
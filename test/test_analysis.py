@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+from ase import Atoms
+
+from vsh.scripts.analysis import conflicting_atoms
+from vsh.utils.neighbor_tools import neighbor_list
+
+
+def brute_force_pairs(positions, cell, cutoff, repeats=3):
+    """Pairs closer than cutoff found by checking every image of every atom"""
+    pairs = set()
+    shifts = np.array(np.meshgrid(*[range(-repeats, repeats + 1)] * 3, indexing="ij")).reshape(3, -1).T
+    for i, first in enumerate(positions):
+        for j, second in enumerate(positions):
+            distances = np.linalg.norm(second + shifts @ cell - first, axis=1)
+            for shift, distance in zip(shifts, distances):
+                if distance < cutoff and (i < j or i == j and tuple(shift) > (0, 0, 0)):
+                    pairs.add((i, j, tuple(shift), round(distance, 8)))
+
+    return pairs
+
+
+class TestNeighborList(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        cells = {
+            "orthogonal": np.diag([5.0, 6.0, 7.0]),
+            "triclinic": np.array([[5.0, 0, 0], [2.5, 4.0, 0], [1.0, -1.5, 4.5]]),
+        }
+        for name, cell in cells.items():
+            # some atoms lie outside the cell
+            positions = (rng.random((12, 3)) * 1.4 - 0.2) @ cell
+            for cutoff in [2.0, 6.5]:
+                with self.subTest(cell=name, cutoff=cutoff):
+                    i, j, distances, shifts = neighbor_list(positions, cutoff, cell, True)
+                    pairs = {
+                        (a, b, tuple(s), round(d, 8)) for a, b, d, s in zip(i, j, distances, shifts)
+                    }
+
+                    self.assertEqual(pairs, brute_force_pairs(positions, cell, cutoff))
+                    np.testing.assert_allclose(
+                        np.linalg.norm(positions[j] + shifts @ cell - positions[i], axis=1), distances
+                    )
+
+    def test_partial_periodicity(self):
+        cell = np.diag([4.0, 4.0, 10.0])
+        # the first and last atoms would only clash through the z boundary
+        positions = np.array([[0.2, 2.0, 0.5], [3.8, 2.0, 0.5], [0.2, 2.0, 9.5]])
+
+        i, j, distances, shifts = neighbor_list(positions, 1.5, cell, [True, True, False])
+        self.assertEqual((i.tolist(), j.tolist(), shifts.tolist()), ([0], [1], [[-1, 0, 0]]))
+        np.testing.assert_allclose(distances, [0.4])
+        self.assertEqual(len(neighbor_list(positions, 1.5)[0]), 0)
+
+
+class TestConflictingAtoms(unittest.TestCase):
+    def test_clash_across_boundary(self):
+        atoms = Atoms("SiOO", positions=[[0.1, 0, 0], [5.9, 0, 0], [3, 3, 3]], cell=[6, 6, 6], pbc=True)
+
+        conflicts = conflicting_atoms(atoms, 1.0)
+        self.assertEqual(list(conflicts), ["Si0-O1"])
+        self.assertAlmostEqual(conflicts["Si0-O1"], 0.2)
+
+        atoms.pbc = False
+        self.assertIsNone(conflicting_atoms(atoms, 1.0))
+
+    def test_molecule(self):
+        atoms = Atoms("CO", positions=[[0, 0, 0], [0, 0, 1.13]])
+
+        self.assertAlmostEqual(conflicting_atoms(atoms, 1.2)["C0-O1"], 1.13)
+        self.assertIsNone(conflicting_atoms(atoms, 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
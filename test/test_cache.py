@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from vsh.utils.cache import cached_parse, evict
+
+
+calls = []
+
+
+def count_lines(file):
+    calls.append(file)
+    with open(file) as f:
+        return len(f.readlines())
+
+
+class TestCachedParse(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.directory.name, "cache")
+        self.file = os.path.join(self.directory.name, "vasprun.xml")
+        with open(self.file, "w") as f:
+            f.write("a\nb\n")
+        self.environment = patch.dict(os.environ, {"VSH_CACHE_DIR": self.cache})
+        self.environment.start()
+        os.environ.pop("VSH_NO_CACHE", None)
+        calls.clear()
+
+    def tearDown(self):
+        self.environment.stop()
+        self.directory.cleanup()
+
+    def test_second_call_is_cached(self):
+        first = cached_parse(self.file, "lines", count_lines)
+        second = cached_parse(self.file, "lines", count_lines)
+
+        self.assertEqual(first, 2)
+        self.assertEqual(second, 2)
+        self.assertEqual(len(calls), 1)
+
+    def test_modified_file_is_parsed_again(self):
+        cached_parse(self.file, "lines", count_lines)
+        with open(self.file, "a") as f:
+            f.write("c\n")
+
+        self.assertEqual(cached_parse(self.file, "lines", count_lines), 3)
+        self.assertEqual(len(calls), 2)
+
+    def test_disabled_cache(self):
+        with patch.dict(os.environ, {"VSH_NO_CACHE": "1"}):
+            cached_parse(self.file, "lines", count_lines)
+            cached_parse(self.file, "lines", count_lines)
+
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(os.path.exists(self.cache))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        os.makedirs(self.cache)
+        for age, name in enumerate(["new", "old", "oldest"]):
+            path = os.path.join(self.cache, f"{name}.pkl")
+            with open(path, "wb") as f:
+                f.write(b"0" * 10)
+            os.utime(path, (1000 - age, 1000 - age))
+
+        evict(self.cache, 20)
+
+        self.assertEqual(sorted(os.listdir(self.cache)), ["new.pkl", "old.pkl"])
+
+    def test_oversized_result_is_not_cached(self):
+        cached_parse(self.file, "lines", count_lines)
+        existing = os.listdir(self.cache)
+
+        with patch.dict(os.environ, {"VSH_CACHE_SIZE": "100"}):
+            result = cached_parse(self.file, "large", lambda file: b"0" * 1000)
+
+        self.assertEqual(result, b"0" * 1000)
+        self.assertEqual(os.listdir(self.cache), existing)
+
+    def test_unpicklable_result_is_not_cached(self):
+        with open(self.file) as handle:
+            result = cached_parse(self.file, "handle", lambda file: handle)
+
+            self.assertIs(result, handle)
+            self.assertEqual(os.listdir(self.cache), [])
+
+    def test_new_entry_is_not_evicted(self):
+        cached_parse(self.file, "lines", count_lines)
+        # the new entry (115 bytes) fits, but not together with the older one
+        with patch.dict(os.environ, {"VSH_CACHE_SIZE": "118"}):
+            cached_parse(self.file, "large", lambda file: b"0" * 100)
+
+        self.assertEqual(len(os.listdir(self.cache)), 1)
+        self.assertTrue(os.listdir(self.cache)[0].startswith("large-"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from argparse import Namespace
+from unittest.mock import patch
+
+import numpy as np
+from pymatgen.core import Lattice, Structure
+from pymatgen.io.vasp import Chgcar, Poscar
+
+from vsh.scripts.chgcar import run
+from vsh.utils.chgcar_tools import (
+    GridStream,
+    cached_chgcar,
+    combine_grids,
+    parse_fixed_width,
+    read_chgcar,
+)
+
+
+def write_chgcar(file, dims=(6, 7, 8), spin=False, augmentation=False, seed=0):
+    """Writes a small CHGCAR, optionally with a magnetization grid and augmentation occupancies"""
+    rng = np.random.default_rng(seed)
+    structure = Structure(Lattice.cubic(4), ["Si", "O"], [[0, 0, 0], [0.5, 0.5, 0.5]])
+    data = {"total": rng.random(dims)}
+    if spin:
+        data["diff"] = rng.random(dims) - 0.5
+    data_aug = None
+    if augmentation:
+        data_aug = {key: {1: rng.random(7), 2: rng.random(3)} for key in data}
+    Chgcar(Poscar(structure), data, data_aug=data_aug).write_file(file)
+
+    return file
+
+
+class TestReadChgcar(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = write_chgcar(
+            os.path.join(self.directory.name, "CHGCAR"), spin=True, augmentation=True
+        )
+        self.expected = Chgcar.from_file(self.file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_matches_pymatgen(self):
+        poscar, grids = read_chgcar(self.file)
+
+        self.assertEqual(poscar.structure, self.expected.structure)
+        self.assertEqual(set(grids), {"total", "diff"})
+        for key, grid in grids.items():
+            np.testing.assert_array_equal(grid, self.expected.data[key])
+
+    def test_options(self):
+        _, grids = read_chgcar(self.file, magnetization=False, dtype=np.float32)
+
+        self.assertEqual(list(grids), ["total"])
+        self.assertEqual(grids["total"].dtype, np.float32)
+        np.testing.assert_allclose(grids["total"], self.expected.data["total"], rtol=1e-6)
+
+    def test_gzip(self):
+        with open(self.file, "rb") as f, gzip.open(self.file + ".gz", "wb") as g:
+            shutil.copyfileobj(f, g)
+
+        _, grids = read_chgcar(self.file + ".gz")
+        np.testing.assert_array_equal(grids["diff"], self.expected.data["diff"])
+
+    def test_free_format(self):
+        # values that are not in fixed columns are parsed as text
+        with open(self.file) as f:
+            lines = f.readlines()
+        start = lines.index("   6   7   8\n") + 1
+        values = " ".join(lines[start : start + 68]).split()
+        lines[start : start + 68] = [" ".join(values[i : i + 4]) + "\n" for i in range(0, 336, 4)]
+        with open(self.file, "w") as f:
+            f.writelines(lines)
+
+        _, grids = read_chgcar(self.file)
+        np.testing.assert_array_equal(grids["total"], self.expected.data["total"])
+
+    def test_parse_fixed_width(self):
+        # as written by VASP and by pymatgen
+        line = b" 0.12345678901E+01-0.50000000000E-02 -.25000000000E+00 1.50000000000E+12\n"
+
+        np.testing.assert_array_equal(
+            parse_fixed_width(line, len(line)), [1.2345678901, -0.005, -0.25, 1.5e12]
+        )
+        self.assertIsNone(parse_fixed_width(b" 0.1234567890123456 1.0\n", 24))
+
+
+class TestCachedChgcar(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.directory.name, "cache")
+        self.file = write_chgcar(os.path.join(self.directory.name, "CHGCAR"), spin=True)
+        self.environment = patch.dict(os.environ, {"VSH_CACHE_DIR": self.cache})
+        self.environment.start()
+        os.environ.pop("VSH_NO_CACHE", None)
+
+    def tearDown(self):
+        self.environment.stop()
+        self.directory.cleanup()
+
+    def test_second_call_is_memory_mapped(self):
+        _, first = cached_chgcar(self.file)
+        poscar, second = cached_chgcar(self.file)
+
+        self.assertNotIsInstance(first["total"], np.memmap)
+        self.assertIsInstance(second["total"], np.memmap)
+        self.assertEqual(poscar.structure, Chgcar.from_file(self.file).structure)
+        for key in ["total", "diff"]:
+            np.testing.assert_array_equal(first[key], second[key])
+
+    def test_modified_file_is_read_again(self):
+        cached_chgcar(self.file, magnetization=False)
+        write_chgcar(self.file, seed=1)
+        os.utime(self.file, ns=(0, 0))
+
+        _, grids = cached_chgcar(self.file, magnetization=False)
+        self.assertNotIsInstance(grids["total"], np.memmap)
+        np.testing.assert_array_equal(grids["total"], Chgcar.from_file(self.file).data["total"])
+
+    def test_disabled_cache(self):
+        with patch.dict(os.environ, {"VSH_NO_CACHE": "1"}):
+            cached_chgcar(self.file)
+
+        self.assertFalse(os.path.exists(self.cache))
+
+
+class TestCombineGrids(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_grid_stream(self):
+        file = write_chgcar(self.path("CHGCAR"), spin=True, augmentation=True)
+        expected = Chgcar.from_file(file)
+
+        with GridStream(file) as stream:
+            for key in ["total", "diff"]:
+                self.assertEqual(stream.next_grid(), (6, 7, 8))
+                values = np.concatenate([stream.read(11) for _ in range(0, 6 * 7 * 8, 11)])
+                np.testing.assert_allclose(
+                    values.reshape((6, 7, 8), order="F"), expected.data[key], rtol=1e-10
+                )
+            self.assertIsNone(stream.next_grid())
+
+    def test_matches_pymatgen(self):
+        first = write_chgcar(self.path("A"), spin=True, augmentation=True, seed=1)
+        second = write_chgcar(self.path("B"), spin=True, seed=2)
+        combine_grids([first, second], [1, -1], self.path("C"), chunk_size=7)
+
+        expected = Chgcar.from_file(first) - Chgcar.from_file(second)
+        result = Chgcar.from_file(self.path("C"))
+        self.assertEqual(result.structure, expected.structure)
+        for key in ["total", "diff"]:
+            np.testing.assert_allclose(result.data[key], expected.data[key], atol=1e-10)
+
+    def test_linear_combination(self):
+        files = [write_chgcar(self.path(name), seed=seed) for seed, name in enumerate("ABC")]
+        run(
+            Namespace(
+                input=files, sum=False, diff=False, coefficients=[1, -1, -1], output=self.path("D"), cube=False
+            )
+        )
+
+        grids = [Chgcar.from_file(file).data["total"] for file in files]
+        np.testing.assert_allclose(
+            Chgcar.from_file(self.path("D")).data["total"], grids[0] - grids[1] - grids[2], atol=1e-10
+        )
+
+    def test_mismatched_grids(self):
+        first = write_chgcar(self.path("A"))
+        second = write_chgcar(self.path("B"), dims=(6, 7, 9))
+
+        with self.assertRaises(ValueError):
+            combine_grids([first, second], [1, 1], self.path("C"))
+        with self.assertRaises(ValueError):
+            combine_grids([first, write_chgcar(self.path("S"), spin=True)], [1, 1], self.path("C"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import argparse
+import subprocess
+import sys
+import unittest
+
+from vsh import scripts
+from vsh.cli import parse_app_args, selected_command
+
+
+class TestLazyRegistration(unittest.TestCase):
+    def test_selected_command(self):
+        self.assertEqual(selected_command(["--no-cache", "kpoints", "--mesh", "4"]), "kpoints")
+        self.assertIsNone(selected_command(["-h"]))
+
+    def test_only_selected_parser_is_added(self):
+        parser = argparse.ArgumentParser()
+        subparsers = parser.add_subparsers(dest="command")
+        scripts.setup(subparsers, "incar")
+
+        self.assertEqual(list(subparsers.choices), ["incar"])
+
+    def test_unknown_command_adds_every_parser(self):
+        parser = argparse.ArgumentParser()
+        subparsers = parser.add_subparsers(dest="command")
+        scripts.setup(subparsers, "unknown")
+
+        self.assertIn("procar", subparsers.choices)
+        self.assertIn("wavecar", subparsers.choices)
+
+    def test_parse_app_args(self):
+        args = parse_app_args(["--no-cache", "kpoints", "--mesh", "4", "4", "4"])
+
+        self.assertEqual(args.command, "kpoints")
+        self.assertTrue(args.no_cache)
+
+    def test_light_commands_skip_heavy_imports(self):
+        code = (
+            "import sys, vsh.cli, vsh.scripts.incar, vsh.scripts.kpoints;"
+            "print(' '.join(m for m in ['pymatgen', 'matplotlib', 'plotly', 'ase', 'pandas'] if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+
+        self.assertEqual(output.strip(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+
+import numpy as np
+import pandas as pd
+
+from vsh.scripts.cohp import (
+    append_icohp_store,
+    bonding_graph,
+    bonding_summary,
+    collate_icohplists,
+    ichop_list_to_dataframe,
+    icohp_to_pickle,
+    plot_icohp_graph,
+    query_icohp_store,
+    sum_spins,
+    to_networkx,
+)
+
+ICOHPLIST = """  COHP#  atomMU  atomNU  distance  translation  ICOHP (eV) for spin  1
+      1     Bi1     Te4   3.07237    0    0    0     -1.42051
+      2     Bi1     Te5   3.25031   -1    0    0     -0.98130
+      3     Bi2    Te10   3.07237    0    1    0     -1.42051
+"""
+
+SPIN_POLARIZED = ICOHPLIST + """      3     Bi2_6s  Te10_5p   3.07237    0    1    0     -0.01000
+  COHP#  atomMU  atomNU  distance  translation  ICOHP (eV) for spin  2
+      1     Bi1     Te4   3.07237    0    0    0     -1.40000
+      2     Bi1     Te5   3.25031   -1    0    0     -0.90000
+      3     Bi2    Te10   3.07237    0    1    0     -1.30000
+"""
+
+# Te3 is bonded to Bi1 twice (through a periodic image), Te3-Te4 is the weakest bond
+BONDS = """  COHP#  atomMU  atomNU  distance  translation  ICOHP (eV) for spin  {spin}
+      1     Bi1     Te3   3.07237    0    0    0     -1.00000
+      2     Bi1     Te3   3.25031   -1    0    0     -0.50000
+      3     Bi2     Te4   3.07237    0    1    0     -0.20000
+      4     Te3     Te4   3.50000    0    0    0     -0.05000
+"""
+
+
+class IcohplistCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        os.makedirs(os.path.join(self.directory.name, name))
+        path = os.path.join(self.directory.name, name, "ICOHPLIST.lobster")
+        with open(path, "w") as f:
+            f.write(text)
+
+        return os.path.dirname(path)
+
+
+class TestIcohplist(IcohplistCase):
+    def test_columns(self):
+        df = ichop_list_to_dataframe(os.path.join(self.write("a", ICOHPLIST), "ICOHPLIST.lobster"))
+
+        self.assertEqual(df["distance"].dtype, np.float32)
+        self.assertEqual(df["translation_x"].dtype, np.int8)
+        self.assertIsInstance(df["atom_Nu"].dtype, pd.CategoricalDtype)
+        self.assertEqual(df["element_Nu"].tolist(), ["Te", "Te", "Te"])
+        self.assertEqual(df["index_Nu"].tolist(), [4, 5, 10])
+        self.assertEqual(df["translation_x"].tolist(), [0, -1, 0])
+        np.testing.assert_allclose(df["ICOHP"], [-1.42051, -0.98130, -1.42051], rtol=1e-6)
+
+    def test_spin_polarized(self):
+        df = ichop_list_to_dataframe(os.path.join(self.write("a", SPIN_POLARIZED), "ICOHPLIST.lobster"))
+
+        # the orbital resolved row is dropped
+        self.assertEqual(df["spin"].tolist(), [1, 1, 1, 2, 2, 2])
+        self.assertEqual(df["atom_Nu"].cat.categories.tolist(), ["Te10", "Te4", "Te5"])
+        np.testing.assert_allclose(df["ICOHP"][3:], [-1.4, -0.9, -1.3], rtol=1e-6)
+
+    def test_collate(self):
+        directories = [self.write("a", ICOHPLIST), self.write("b", SPIN_POLARIZED)]
+        serial = collate_icohplists(directories)
+        parallel = collate_icohplists(directories, jobs=2)
+
+        pd.testing.assert_frame_equal(serial, parallel)
+        self.assertEqual(serial["source"].value_counts().tolist(), [6, 3])
+        self.assertEqual(serial["source"].cat.categories.tolist(), [os.path.abspath(path) for path in directories])
+        self.assertIsInstance(serial["element_Mu"].dtype, pd.CategoricalDtype)
+
+        output = os.path.join(self.directory.name, "bonds.pkl")
+        icohp_to_pickle(Namespace(input=directories, output=[output], jobs=1))
+        pd.testing.assert_frame_equal(pd.read_pickle(output), serial)
+
+
+class TestIcohpStore(IcohplistCase):
+    def test_query(self):
+        database = os.path.join(self.directory.name, "bonds.db")
+        first, second = self.write("a", ICOHPLIST), self.write("b", SPIN_POLARIZED)
+        self.assertEqual(append_icohp_store(database, [first, second]), 9)
+
+        # pairs are found in either order
+        bonds = query_icohp_store(database, ["Te", "Bi"], max_distance=3.1, max_icohp=-1.35)
+        self.assertEqual(len(bonds), 5)
+        self.assertTrue((bonds["element_a"] == "Bi").all())
+        self.assertEqual(sorted(bonds["icohp"]), [-1.42051] * 4 + [-1.4])
+
+        bonds = query_icohp_store(database, source="%b", min_icohp=-1.0)
+        self.assertEqual(bonds["icohp"].tolist(), [-0.9813, -0.9])
+        self.assertTrue(bonds["source"].str.endswith("b").all())
+        with self.assertRaises(ValueError):
+            query_icohp_store(os.path.join(self.directory.name, "missing.db"))
+
+    def test_relative_source(self):
+        database = os.path.join(self.directory.name, "bonds.db")
+        first = self.write("BiTe", ICOHPLIST)
+        append_icohp_store(database, [first, self.write("other", ICOHPLIST)])
+
+        # sources are stored as absolute paths, relative patterns are made absolute
+        bonds = query_icohp_store(database, source=os.path.relpath(first)[:-2] + "%")
+        self.assertEqual(set(bonds["source"]), {os.path.abspath(first)})
+        self.assertEqual(len(bonds), 3)
+
+    def test_swapped_translation(self):
+        database = os.path.join(self.directory.name, "bonds.db")
+        text = ICOHPLIST.replace("Bi1     Te5   3.25031   -1    0    0", "Te5     Bi1   3.25031   -1    1    0")
+        append_icohp_store(database, [self.write("a", text)])
+
+        bonds = query_icohp_store(database, min_distance=3.2)
+        self.assertEqual(bonds[["element_a", "index_a", "element_b", "index_b"]].values.tolist(), [["Bi", 1, "Te", 5]])
+        self.assertEqual(bonds[["translation_x", "translation_y", "translation_z"]].values.tolist(), [[1, -1, 0]])
+
+    def test_replace_and_index(self):
+        import sqlite3
+
+        database = os.path.join(self.directory.name, "bonds.db")
+        directory = self.write("a", ICOHPLIST)
+        append_icohp_store(database, [directory])
+        append_icohp_store(database, [directory])
+        self.assertEqual(len(query_icohp_store(database)), 3)
+
+        with sqlite3.connect(database) as connection:
+            plan = connection.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM bonds WHERE element_a = 'Bi' AND element_b = 'Te' AND distance < 3"
+            ).fetchall()
+        self.assertIn("bonds_pair_distance", plan[0][-1])
+
+
+class TestBondingGraph(IcohplistCase):
+    def setUp(self):
+        super().setUp()
+        self.calculation = self.write("a", BONDS.format(spin=1) + BONDS.format(spin=2))
+        self.df = ichop_list_to_dataframe(os.path.join(self.calculation, "ICOHPLIST.lobster"))
+
+    def test_summary(self):
+        atoms, pairs = bonding_summary(self.df)
+
+        self.assertEqual(atoms["coordination"].tolist(), [2, 1, 3, 2])
+        # both spins are summed
+        np.testing.assert_allclose(atoms["ICOHP"], [-3.0, -0.4, -3.1, -0.5], rtol=1e-6)
+        self.assertEqual(atoms["component"].nunique(), 1)
+        self.assertEqual(pairs[["element_a", "element_b", "bonds"]].values.tolist(), [["Bi", "Te", 3], ["Te", "Te", 1]])
+
+        atoms, pairs = bonding_summary(self.df, max_icohp=-0.2)
+        self.assertEqual(atoms["component"].tolist(), [0, 1, 0, 1])
+        self.assertEqual(len(pairs), 1)
+
+    def test_networkx(self):
+        weights, counts, elements = bonding_graph(self.df, natoms=5)
+        graph = to_networkx(weights, elements)
+
+        self.assertEqual(weights.shape, (5, 5))
+        self.assertEqual(counts.nnz, 3)
+        self.assertEqual(sorted(graph.nodes), ["Bi1", "Bi2", "Te3", "Te4"])
+        self.assertAlmostEqual(graph["Bi1"]["Te3"]["ICOHP"], -3.0, places=6)
+
+    def test_sum_spins(self):
+        bonds = sum_spins(self.df)
+
+        self.assertEqual(bonds["COHP"].tolist(), [1, 2, 3, 4])
+        self.assertEqual(bonds["translation_x"].tolist(), [0, -1, 0, 0])
+        np.testing.assert_allclose(bonds["ICOHP"], [-2.0, -1.0, -0.4, -0.1], rtol=1e-6)
+
+    def test_plot(self):
+        import matplotlib
+
+        matplotlib.use("Agg")
+        from ase import Atoms
+        from ase.io import write
+
+        atoms = Atoms("Bi2Te2", scaled_positions=np.random.default_rng(0).random((4, 3)), cell=[5, 5, 5], pbc=True)
+        write(os.path.join(self.calculation, "POSCAR"), atoms, format="vasp")
+        output = os.path.join(self.directory.name, "graph.png")
+        plot_icohp_graph(Namespace(input=[self.calculation], jobs=1, max_icohp=None, output=[output], dpi=50))
+
+        self.assertTrue(os.path.exists(output))
+
+
+if __name__ == "__main__":
+    unittest.main()
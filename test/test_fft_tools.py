@@ -0,0 +1,50 @@
+import os
+import unittest
+
+import numpy as np
+
+from vsh.utils.fft_tools import fft_backend, fft_workers, ifftn, set_fft_backend
+
+
+class TestFFTBackends(unittest.TestCase):
+    def setUp(self):
+        self.environment = {
+            key: os.environ.pop(key, None)
+            for key in ["VSH_FFT_BACKEND", "VSH_FFT_WORKERS", "VSH_FFT_WISDOM"]
+        }
+        rng = np.random.default_rng(0)
+        self.data = rng.normal(size=(3, 6, 8, 10)) + 1j * rng.normal(size=(3, 6, 8, 10))
+
+    def tearDown(self):
+        for key, value in self.environment.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
+
+    def test_defaults(self):
+        self.assertEqual(fft_backend(), "numpy")
+        self.assertEqual(fft_workers(), 1)
+
+    def test_set_fft_backend(self):
+        set_fft_backend("scipy", 2)
+
+        self.assertEqual(fft_backend(), "scipy")
+        self.assertEqual(fft_workers(), 2)
+        with self.assertRaises(ValueError):
+            set_fft_backend("fftpack")
+
+    def test_scipy_matches_numpy(self):
+        expected = np.fft.ifftn(self.data, axes=(1, 2, 3))
+        set_fft_backend("scipy", 2)
+
+        np.testing.assert_allclose(ifftn(self.data, axes=(1, 2, 3)), expected, atol=1e-12)
+
+    def test_stacked_transform(self):
+        stacked = ifftn(self.data, axes=(1, 2, 3))
+
+        for band, grid in zip(stacked, self.data):
+            np.testing.assert_allclose(band, np.fft.ifftn(grid), atol=1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
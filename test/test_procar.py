@@ -0,0 +1,180 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from vsh.scripts.procar import (
+    ProjectedBands,
+    compositional_variation,
+    dict_to_dataframe,
+    eigenvalues_to_dataframe,
+    load_dataframe_from_file,
+    merge_eigenvalues,
+    read_projected_cache,
+    write_projected_cache,
+)
+
+
+class TestProcarDataframes(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.projected = {
+            "up": rng.random((3, 4, 2, 9)),
+            "down": rng.random((3, 4, 2, 9)),
+        }
+        self.eigenvalues = {
+            "up": rng.random((3, 4, 2)),
+            "down": rng.random((3, 4, 2)),
+        }
+
+    def test_dict_to_dataframe_matches_nested_loop(self):
+        df = dict_to_dataframe(self.projected)
+
+        rows = [
+            (spin_index, k, b, i, o, spin[k, b, i, o])
+            for spin_index, spin in enumerate(self.projected.values())
+            for k in range(3)
+            for b in range(4)
+            for i in range(2)
+            for o in range(9)
+        ]
+        expected = np.array(rows)
+
+        self.assertEqual(
+            list(df.columns), ["Spin", "Kpoint", "Band", "Ion", "Orbital", "Value"]
+        )
+        np.testing.assert_array_equal(df.to_numpy(dtype=float), expected)
+
+    def test_dict_to_dataframe_uses_compact_index_dtypes(self):
+        df = dict_to_dataframe(self.projected)
+
+        for column in ["Spin", "Kpoint", "Band", "Ion", "Orbital"]:
+            self.assertEqual(df[column].dtype, np.int8)
+
+    def test_eigenvalues_to_dataframe(self):
+        df = eigenvalues_to_dataframe(self.eigenvalues)
+
+        self.assertEqual(len(df), 2 * 3 * 4)
+        row = df[(df["Spin"] == 1) & (df["Kpoint"] == 2) & (df["Band"] == 3)]
+        self.assertAlmostEqual(row["Energy"].iloc[0], self.eigenvalues["down"][2, 3, 0])
+        self.assertAlmostEqual(
+            row["Occupation"].iloc[0], self.eigenvalues["down"][2, 3, 1]
+        )
+
+
+class TestProjectedBands(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.projected = {"up": rng.random((3, 4, 2, 9))}
+        self.eigenvalues = {"up": rng.random((3, 4, 2))}
+        self.bands = ProjectedBands(
+            np.stack(list(self.projected.values())),
+            np.stack(list(self.eigenvalues.values()))[..., 0],
+            np.stack(list(self.eigenvalues.values()))[..., 1],
+        )
+
+    def test_to_dataframe_matches_merge(self):
+        expected = merge_eigenvalues(
+            eigenvalues_to_dataframe(self.eigenvalues),
+            dict_to_dataframe(self.projected),
+        )
+
+        np.testing.assert_array_equal(
+            self.bands.to_dataframe().to_numpy(), expected.to_numpy()
+        )
+
+    def test_select_keeps_labels(self):
+        selected = self.bands.select({"Band": [1, 3], "Ion": 1})
+
+        self.assertEqual(selected.projections.shape, (1, 3, 2, 1, 9))
+        np.testing.assert_array_equal(selected.index["Band"], [1, 3])
+        df = selected.to_dataframe()
+        self.assertEqual(set(df["Band"]), {1, 3})
+        self.assertEqual(set(df["Ion"]), {1})
+
+    def test_round_trip_through_dataframe(self):
+        df = self.bands.select({"Band": [2, 3]}).to_dataframe()
+        bands = ProjectedBands.from_dataframe(df)
+
+        np.testing.assert_array_equal(bands.index["Band"], [2, 3])
+        np.testing.assert_array_equal(
+            bands.projections, self.bands.projections[:, :, 2:4]
+        )
+
+    def test_round_trip_value_filtered_dataframe(self):
+        df = self.bands.to_dataframe()
+        df = df[df["Value"] > 0.5].reset_index(drop=True)
+        bands = ProjectedBands.from_dataframe(df)
+
+        pd.testing.assert_frame_equal(bands.to_dataframe(), df)
+        values, _ = bands.reduce(["Ion", "Orbital"])
+        expected = df.groupby(["Spin", "Kpoint", "Band"])["Value"].sum().to_numpy()
+        np.testing.assert_allclose(values.ravel(), expected)
+
+    def test_compositional_variation_percent(self):
+        df = compositional_variation(self.bands, 2)
+
+        totals = df.groupby("Kpoint")["Percent"].sum()
+        np.testing.assert_allclose(totals, 100)
+
+
+class TestProjectedCache(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.bands = ProjectedBands(
+            rng.random((2, 3, 8, 2, 4)).astype(np.float32),
+            rng.random((2, 3, 8)),
+            rng.random((2, 3, 8)),
+            kpoints=rng.random((3, 3)),
+            weights=np.full(3, 1 / 3),
+            orbitals=["s", "py", "pz", "px"],
+            symbols=["Bi", "Se"],
+            efermi=1.5,
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "procar.vsh")
+
+        # small chunks so that selections span several files
+        with patch("vsh.scripts.procar.CACHE_BAND_CHUNK", 3):
+            write_projected_cache(self.bands, self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chunk_layout(self):
+        files = [file for file in os.listdir(self.path) if file.startswith("proj")]
+
+        self.assertEqual(len(files), 2 * 3)
+
+    def test_full_read(self):
+        bands = read_projected_cache(self.path)
+
+        np.testing.assert_array_equal(bands.projections, self.bands.projections)
+        np.testing.assert_array_equal(bands.energies, self.bands.energies)
+        np.testing.assert_array_equal(bands.kpoints, self.bands.kpoints)
+        self.assertEqual(bands.symbols, self.bands.symbols)
+        self.assertEqual(bands.efermi, 1.5)
+
+    def test_partial_read_matches_select(self):
+        selection = {"Spin": 1, "Kpoint": [0, 2], "Band": [1, 2, 3, 7], "Ion": 1}
+        bands = read_projected_cache(self.path, selection)
+        expected = self.bands.select(selection)
+
+        np.testing.assert_array_equal(bands.projections, expected.projections)
+        np.testing.assert_array_equal(bands.occupations, expected.occupations)
+        np.testing.assert_array_equal(bands.index["Band"], [1, 2, 3, 7])
+        self.assertEqual(bands.symbols, ["Se"])
+
+    def test_load_dataframe(self):
+        df = load_dataframe_from_file(self.path)
+
+        np.testing.assert_array_equal(
+            df.to_numpy(), self.bands.to_dataframe().to_numpy()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
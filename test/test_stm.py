@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from pymatgen.core import Lattice, Structure
+from pymatgen.io.vasp import Chgcar, Poscar
+
+from vsh.scripts.stm import animate_slices, batch_stm, frame_indices, simulate_stm
+from vsh.utils.stm_tools import constant_current_image, constant_height_image
+
+
+def slab_density(shape=(4, 5, 20), c=20.0):
+    """Density that decays linearly above z = 10 and varies over x and y"""
+    z = np.arange(shape[2]) * c / shape[2]
+    x = np.linspace(1, 2, shape[0])[:, None, None]
+    y = np.linspace(1, 1.5, shape[1])[None, :, None]
+    return x * y * np.clip(15 - z, 0, None)[None, None, :]
+
+
+class TestStmImages(unittest.TestCase):
+    def test_constant_height(self):
+        data = slab_density()
+        # planes are 1 apart, 11.25 is a quarter of the way from 11 to 12
+        image = constant_height_image(data, 20.0, 11.25)
+
+        np.testing.assert_allclose(image, 0.75 * data[:, :, 11] + 0.25 * data[:, :, 12])
+        np.testing.assert_allclose(constant_height_image(data, 20.0, 19.5), 0.5 * data[:, :, 19] + 0.5 * data[:, :, 0])
+
+    def test_constant_current(self):
+        data = slab_density()
+        isovalue = 4.0
+        image = constant_current_image(data, 20.0, isovalue, zmin=10.0)
+
+        # the density is linear in z, so the interpolated heights are exact
+        scale = data[:, :, 0] / 15
+        np.testing.assert_allclose(image, 15 - isovalue / scale)
+
+    def test_constant_current_not_reached(self):
+        image = constant_current_image(slab_density(), 20.0, 100.0, zmin=10.0)
+
+        self.assertTrue(np.isnan(image).all())
+        with self.assertRaises(ValueError):
+            constant_current_image(slab_density(), 20.0, 1.0, zmin=15.5, zmax=15.6)
+
+
+class TestSimulateStm(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "PARCHG")
+        structure = Structure(Lattice.tetragonal(4, 20), ["Si"], [[0, 0, 0.5]])
+        Chgcar(Poscar(structure), {"total": slab_density()}).write_file(self.file)
+        self.environment = patch.dict(os.environ, {"VSH_NO_CACHE": "1"})
+        self.environment.start()
+
+    def tearDown(self):
+        self.environment.stop()
+        self.directory.cleanup()
+
+    def test_modes(self):
+        image, mode, _ = simulate_stm(self.file, isovalue=4.0)
+        self.assertEqual(mode, "current")
+        self.assertEqual(image.shape, (4, 5))
+        self.assertTrue(np.all((image > 10) & (image < 15)))
+
+        image, mode, _ = simulate_stm(self.file, height=12.0)
+        self.assertEqual(mode, "height")
+        with self.assertRaises(ValueError):
+            simulate_stm(self.file)
+
+    def test_batch(self):
+        directory = os.path.join(self.directory.name, "images")
+        files = [self.file, self.file]
+        serial = batch_stm(files, [11.0, 12.0], [4.0], directory=directory)
+        parallel = batch_stm(files, [11.0, 12.0], [4.0], directory=directory, jobs=4)
+
+        self.assertEqual(len(serial), 6)
+        self.assertEqual(serial, parallel)
+        self.assertTrue(all(os.path.exists(record["output"]) for record in serial))
+        with open(os.path.join(directory, "manifest.json")) as f:
+            self.assertEqual(json.load(f), serial)
+
+    def test_animation(self):
+        from PIL import Image
+
+        self.assertEqual(frame_indices(20, 20.0, [5.0, 12.0], 3).tolist(), [5, 8, 11])
+        for jobs in [1, 2]:
+            output = os.path.join(self.directory.name, f"slices{jobs}.gif")
+            animate_slices(self.file, 2, 2, output=output, zrange=[5.0, 12.0], stride=3, jobs=jobs)
+            with Image.open(output) as image:
+                self.assertEqual(image.n_frames, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
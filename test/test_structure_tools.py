@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from ase.build import bulk
+from ase.io import read, write
+from pymatgen.core import Lattice, Structure
+
+from vsh.utils.structure_tools import (
+    calculate_partial_rdf,
+    calculate_rdf,
+    structure_rdf,
+    trajectory_rdf,
+)
+from vsh.utils.trajectory_tools import read_frames
+
+
+class TestRdf(unittest.TestCase):
+    def test_fcc_coordination(self):
+        # the first shell of fcc is 12 atoms at a / sqrt(2)
+        a = 4.0
+        structure = Structure(Lattice.cubic(a), ["Cu"] * 4, [[0, 0, 0], [0.5, 0.5, 0], [0.5, 0, 0.5], [0, 0.5, 0.5]])
+        bin_centers, rdfs = structure_rdf(structure, bins=400, r_max=4.0)
+        rdf = rdfs["Cu4"]
+
+        density = 4 / a**3
+        width = bin_centers[1] - bin_centers[0]
+        first_shell = bin_centers < 3.2
+        coordination = np.sum(4 * np.pi * bin_centers[first_shell] ** 2 * width * density * rdf[first_shell])
+        self.assertAlmostEqual(coordination, 12, delta=0.1)
+        self.assertAlmostEqual(bin_centers[np.argmax(rdf)], a / np.sqrt(2), delta=width)
+
+    def test_uniform_density(self):
+        # uncorrelated atoms have g(r) close to 1 at every distance
+        rng = np.random.default_rng(0)
+        cell = np.diag([12.0, 12.0, 12.0])
+        bin_centers, rdf = calculate_rdf(rng.random((2000, 3)) @ cell, bins=20, r_max=5.0, cell=cell, pbc=True)
+
+        np.testing.assert_allclose(rdf[bin_centers > 1], 1, atol=0.05)
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(1)
+        cell = np.array([[6.0, 0, 0], [1.0, 5.0, 0], [0.5, 0.5, 7.0]])
+        coordinates = rng.random((10, 3)) @ cell
+        species = ["Si", "O", "O", "Si", "O", "O", "O", "Si", "O", "O"]
+        bins, r_max = 50, 8.0
+
+        # every ordered pair of atoms, through every image within r_max
+        shifts = np.array(np.meshgrid(*[range(-3, 4)] * 3, indexing="ij")).reshape(3, -1).T @ cell
+        separations = coordinates[None, :, None] + shifts[None, None] - coordinates[:, None, None]
+        distances = np.linalg.norm(separations, axis=-1)
+        edges = np.linspace(0, r_max, bins + 1)
+        shells = 4 / 3 * np.pi * np.diff(edges**3)
+        volume = np.linalg.det(cell)
+
+        _, rdf = calculate_rdf(coordinates, bins, r_max, cell, True)
+        expected = np.histogram(distances[distances > 0], bins=edges)[0] / (100 / volume * shells)
+        np.testing.assert_allclose(rdf, expected)
+
+        _, rdfs = calculate_partial_rdf(coordinates, species, bins, r_max, cell, True)
+        self.assertEqual(list(rdfs), ["O-O", "O-Si", "Si-Si"])
+        oxygen, silicon = np.array(species) == "O", np.array(species) == "Si"
+        pairs = distances[oxygen][:, silicon]
+        expected = np.histogram(pairs, bins=edges)[0] / (7 * 3 / volume * shells)
+        np.testing.assert_allclose(rdfs["O-Si"], expected)
+
+
+class TestTrajectoryRdf(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "XDATCAR")
+        frames = []
+        for seed in range(7):
+            atoms = bulk("NaCl", "rocksalt", 5.6, cubic=True)
+            atoms.rattle(0.2, seed=seed)
+            atoms.wrap()
+            frames.append(atoms)
+        write(self.file, frames, format="vasp-xdatcar")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_frames(self):
+        expected = read(self.file, index="::2", format="vasp-xdatcar")
+        frames = list(read_frames(self.file, stride=2))
+
+        self.assertEqual(len(frames), len(expected))
+        for (symbols, cell, positions), atoms in zip(frames, expected):
+            self.assertEqual(symbols, atoms.get_chemical_symbols())
+            np.testing.assert_allclose(cell, atoms.cell.array)
+            np.testing.assert_allclose(positions, atoms.positions)
+
+    def test_average(self):
+        frames = read(self.file, index="::3", format="vasp-xdatcar")
+        rdfs = np.array([calculate_rdf(a.positions, 50, 5.0, a.cell.array, True)[1] for a in frames])
+
+        bin_centers, result = trajectory_rdf(self.file, bins=50, r_max=5.0, stride=3, batch_size=2)
+        mean, error = result["total"]
+        self.assertEqual(len(bin_centers), 50)
+        np.testing.assert_allclose(mean, rdfs.mean(axis=0))
+        np.testing.assert_allclose(error, rdfs.std(axis=0, ddof=1) / np.sqrt(3), atol=1e-10)
+
+        _, parallel = trajectory_rdf(self.file, bins=50, r_max=5.0, stride=3, jobs=2, batch_size=1)
+        np.testing.assert_allclose(parallel["total"][0], mean)
+
+    def test_partial(self):
+        _, result = trajectory_rdf(self.file, bins=50, r_max=5.0, partial=True)
+
+        self.assertEqual(set(result), {"Cl-Cl", "Cl-Na", "Na-Na"})
+        with self.assertRaises(ValueError):
+            trajectory_rdf(self.file, stride=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
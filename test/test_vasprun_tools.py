@@ -0,0 +1,57 @@
+import os
+import tarfile
+import tempfile
+import unittest
+
+import numpy as np
+from pymatgen.electronic_structure.core import Spin
+from pymatgen.io.vasp import Vasprun
+
+from vsh.utils.vasprun_tools import read_projected_eigenvalues
+
+DIAMOND = os.path.join(os.path.dirname(__file__), "files", "diamond", "diamond.tgz")
+
+
+class TestReadProjectedEigenvalues(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        with tarfile.open(DIAMOND) as tar:
+            tar.extract("vasprun.xml", cls.directory.name)
+        cls.file = os.path.join(cls.directory.name, "vasprun.xml")
+        cls.vasprun = Vasprun(
+            cls.file, parse_potcar_file=False, parse_projected_eigen=True
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_matches_pymatgen(self):
+        data = read_projected_eigenvalues(self.file)
+
+        eigenvalues = self.vasprun.eigenvalues[Spin.up]
+        np.testing.assert_array_equal(data["energies"][0], eigenvalues[..., 0])
+        np.testing.assert_array_equal(data["occupations"][0], eigenvalues[..., 1])
+        np.testing.assert_allclose(
+            data["projections"][0],
+            self.vasprun.projected_eigenvalues[Spin.up],
+            atol=1e-6,
+        )
+        np.testing.assert_allclose(data["kpoints"], self.vasprun.actual_kpoints)
+        self.assertAlmostEqual(data["efermi"], self.vasprun.efermi)
+
+    def test_projections_dtype(self):
+        data = read_projected_eigenvalues(self.file)
+
+        self.assertEqual(data["projections"].dtype, np.float32)
+        self.assertEqual(len(data["orbitals"]), data["projections"].shape[-1])
+
+    def test_skip_projections(self):
+        data = read_projected_eigenvalues(self.file, projected=False)
+
+        self.assertIsNone(data["projections"])
+
+
+if __name__ == "__main__":
+    unittest.main()
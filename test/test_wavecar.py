@@ -0,0 +1,303 @@
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+
+import numpy as np
+from pymatgen.core import Lattice, Structure
+from pymatgen.io.vasp import Poscar, Wavecar
+from pymatgen.io.wannier90 import Unk
+from scipy.io import FortranFile
+
+from vsh.scripts.wavecar import (
+    generate_unk,
+    get_band_edges,
+    get_band_occupancy_info,
+    get_partial_charge_density,
+    get_partial_charge_density_parallel,
+    split_tasks,
+    write_unk,
+)
+from vsh.utils.wavecar_tools import WavecarFile, g_points, maximum_g_indices, reciprocal_lattice
+
+
+def write_wavecar(file, nk=3, nb=4, nspins=1, vasp_type="std", encut=60.0, seed=0):
+    """Writes a small single precision WAVECAR with random coefficients"""
+    rng = np.random.default_rng(seed)
+    lattice = np.array([[5.0, 0, 0], [0.5, 5.5, 0], [0, 0, 6.0]])
+    b = reciprocal_lattice(lattice)
+    nbmax = maximum_g_indices(b, encut)
+    kpoints = [np.array([0.5 * k / nk, 0, 0]) for k in range(nk)]
+    if vasp_type == "gam":
+        kpoints = [np.zeros(3)] * nk
+
+    nplanes = [
+        len(g_points(k, b, encut, nbmax, gamma=vasp_type == "gam")[0]) for k in kpoints
+    ]
+    if vasp_type == "ncl":
+        nplanes = [2 * n for n in nplanes]
+    recl = 8 * max(max(nplanes), 4 + 3 * nb, 13)
+
+    def record(values, dtype):
+        data = np.asarray(values, dtype=dtype).tobytes()
+        return data + b"\0" * (recl - len(data))
+
+    with open(file, "wb") as f:
+        f.write(record([recl, nspins, 45200], np.float64))
+        f.write(record([nk, nb, encut, *lattice.ravel(), 0.25], np.float64))
+        for _ in range(nspins):
+            for kpoint, nplane in zip(kpoints, nplanes):
+                enocc = np.column_stack([np.sort(rng.normal(size=nb)), np.zeros(nb), rng.random(nb)])
+                f.write(record([nplane, *kpoint, *enocc.ravel()], np.float64))
+                for _ in range(nb):
+                    f.write(record(rng.normal(size=nplane) + 1j * rng.normal(size=nplane), np.complex64))
+
+    return file
+
+
+class TestWavecarFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_matches_pymatgen(self, **kwargs):
+        file = write_wavecar(os.path.join(self.directory.name, "WAVECAR"), **kwargs)
+        wavecar = WavecarFile(file)
+        expected = Wavecar(file)
+
+        self.assertEqual((wavecar.nk, wavecar.nb, wavecar.spin), (expected.nk, expected.nb, expected.spin))
+        self.assertEqual(wavecar.efermi, expected.efermi)
+        np.testing.assert_array_equal(wavecar.ng, expected.ng)
+        for kpoint in range(wavecar.nk):
+            np.testing.assert_array_equal(wavecar.gpoints(kpoint), expected.Gpoints[kpoint])
+            for spin in range(wavecar.spin):
+                np.testing.assert_array_equal(
+                    wavecar.fft_mesh(kpoint, 1, spin=spin), expected.fft_mesh(kpoint, 1, spin=spin)
+                )
+        self.assertEqual(wavecar.vasp_type, expected.vasp_type)
+
+        return wavecar, expected
+
+    def test_standard(self):
+        wavecar, expected = self.assert_matches_pymatgen()
+        np.testing.assert_array_equal(wavecar.band_energy[0], expected.band_energy)
+
+    def test_spin_polarized(self):
+        wavecar, expected = self.assert_matches_pymatgen(nspins=2)
+        np.testing.assert_array_equal(wavecar.band_energy, expected.band_energy)
+
+    def test_gamma_only(self):
+        self.assert_matches_pymatgen(nk=1, vasp_type="gam")
+
+    def test_noncollinear(self):
+        file = write_wavecar(os.path.join(self.directory.name, "WAVECAR"), vasp_type="ncl")
+        wavecar = WavecarFile(file)
+        expected = Wavecar(file)
+
+        np.testing.assert_array_equal(wavecar.coefficients(2, 3), expected.coeffs[2][3])
+        self.assertEqual(wavecar.vasp_type, "ncl")
+
+    def test_reads_only_the_header(self):
+        file = write_wavecar(os.path.join(self.directory.name, "WAVECAR"), nk=2, nb=3)
+        # corrupt every coefficient record, the header and band energies are still readable
+        wavecar = WavecarFile(file)
+        with open(file, "r+b") as f:
+            for offset in wavecar.offsets.ravel():
+                f.seek(offset)
+                f.write(b"\xff" * 8)
+
+        self.assertEqual(WavecarFile(file).nb, 3)
+
+
+class TestBandOccupancy(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        file = write_wavecar(os.path.join(self.directory.name, "WAVECAR"), nk=2, nb=4, nspins=2)
+        self.wavecar = WavecarFile(file)
+        # (spin, kpoint, band) energies and occupancies of a small gap insulator
+        self.wavecar.band_energy[..., 0] = [[[-2, -1, 1, 2], [-2.5, -0.5, 1.5, 3]]] * 2
+        self.wavecar.band_energy[..., 2] = [[1, 1, 0, 0], [1, 1, 0, 0]]
+        self.wavecar.band_energy[1, 1, 1, 2] = 0.5
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_band_occupancy_info(self):
+        df = get_band_occupancy_info(self.wavecar, nbands=19)
+
+        self.assertEqual(df["band"].tolist(), [0, 1])
+        np.testing.assert_allclose(df["relative_occupancy"], [2, 1.75])
+        np.testing.assert_allclose(df["min_energy"], [-2.5, -1])
+        np.testing.assert_allclose(df["max_energy"], [-2, -0.5])
+        self.assertEqual(len(get_band_occupancy_info(self.wavecar, nbands=1)), 1)
+
+    def test_band_edges(self):
+        edges = get_band_edges(self.wavecar)
+
+        self.assertEqual((edges["homo"], edges["lumo"]), (-0.5, -0.5))
+        self.assertEqual(edges["gap"], 0)
+        self.wavecar.band_energy[1, 1, 1, 2] = 1
+        self.assertEqual(get_band_edges(self.wavecar)["gap"], 1.5)
+
+
+class TestPartialChargeDensity(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.poscar = Poscar(Structure(Lattice.cubic(5), ["Si"], [[0, 0, 0]]))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_matches(self, spin=None, spinor=None, phase=None, **wavecar):
+        file = write_wavecar(os.path.join(self.directory.name, "WAVECAR"), **wavecar)
+        result = get_partial_charge_density(
+            WavecarFile(file), self.poscar, [0, 1], [1, 3], spin, spinor, phase, 2
+        )
+
+        # the previous implementation, one get_parchg per kpoint and band
+        wavecar = Wavecar(file)
+        expected = None
+        for kpoint in [0, 1]:
+            for band in [1, 3]:
+                density = wavecar.get_parchg(self.poscar, kpoint, band, spin, spinor, phase, scale=2)
+                expected = density if expected is None else expected + density
+
+        self.assertEqual(set(result.data), set(expected.data))
+        for key in expected.data:
+            np.testing.assert_allclose(result.data[key], expected.data[key], atol=1e-8)
+
+    def test_standard(self):
+        self.assert_matches()
+
+    def test_phase(self):
+        self.assert_matches(phase=1)
+
+    def test_spin_polarized(self):
+        self.assert_matches(nspins=2)
+        self.assert_matches(spin=1, nspins=2)
+
+    def test_noncollinear(self):
+        self.assert_matches(vasp_type="ncl")
+        self.assert_matches(spinor=1, vasp_type="ncl")
+
+    def test_weights_are_normalized(self):
+        file = write_wavecar(os.path.join(self.directory.name, "WAVECAR"))
+        wavecar = WavecarFile(file)
+        weighted = get_partial_charge_density(
+            wavecar, self.poscar, [0, 1], [2], None, None, None, 1, weights=[3, 1, 0]
+        )
+        first = get_partial_charge_density(wavecar, self.poscar, 0, [2], None, None, None, 1)
+        second = get_partial_charge_density(wavecar, self.poscar, 1, [2], None, None, None, 1)
+
+        np.testing.assert_allclose(
+            weighted.data["total"], 0.75 * first.data["total"] + 0.25 * second.data["total"]
+        )
+
+
+class TestUnk(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_matches_pymatgen(self, block, **kwargs):
+        file = write_wavecar(os.path.join(self.directory.name, "WAVECAR"), nk=2, nb=5, **kwargs)
+        output = os.path.join(self.directory.name, "wannier")
+        names = write_unk(WavecarFile(file), 1, output, block)
+
+        # the previous implementation, every band of the kpoint transformed into one array
+        wavecar = Wavecar(file)
+        N = np.prod(wavecar.ng)
+        if wavecar.vasp_type == "ncl":
+            data = [[np.fft.ifftn(wavecar.fft_mesh(1, ib, spinor=s)) * N for s in (0, 1)] for ib in range(5)]
+            expected = [Unk(2, np.array(data))]
+        else:
+            expected = [
+                Unk(2, np.array([np.fft.ifftn(wavecar.fft_mesh(1, ib, spin=ispin)) * N for ib in range(5)]))
+                for ispin in range(wavecar.spin)
+            ]
+
+        self.assertEqual(len(names), len(expected))
+        for name, unk in zip(names, expected):
+            reference = os.path.join(self.directory.name, "reference")
+            unk.write_file(reference)
+            with open(name, "rb") as f, open(reference, "rb") as g:
+                self.assertEqual(f.read(), g.read())
+
+    def test_band_blocks(self):
+        self.assert_matches_pymatgen(1)
+        self.assert_matches_pymatgen(3, nspins=2)
+
+    def test_noncollinear(self):
+        self.assert_matches_pymatgen(2, vasp_type="ncl")
+
+    def test_single_precision(self):
+        file = write_wavecar(os.path.join(self.directory.name, "WAVECAR"), nk=1, nb=3)
+        wavecar = WavecarFile(file)
+        double, = write_unk(wavecar, 0, os.path.join(self.directory.name, "double"), 2)
+        single, = write_unk(wavecar, 0, os.path.join(self.directory.name, "single"), 2, single=True)
+
+        expected = Unk.from_file(double)
+        with FortranFile(single) as f:
+            np.testing.assert_array_equal(f.read_ints(np.int32), [*wavecar.ng, 1, 3])
+            for ib in range(3):
+                band = f.read_record(np.complex64).reshape(wavecar.ng, order="F")
+                np.testing.assert_allclose(band, expected.data[ib], rtol=1e-5, atol=1e-5)
+
+
+class TestParallelWavecar(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = write_wavecar(os.path.join(self.directory.name, "WAVECAR"))
+        self.poscar = Poscar(Structure(Lattice.cubic(5), ["Si"], [[0, 0, 0]]))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_split_tasks(self):
+        self.assertEqual(len(split_tasks(np.arange(10), np.arange(4), 4)), 4)
+        # a single kpoint is split over bands instead
+        tasks = split_tasks(np.arange(1), np.arange(8), 4)
+        self.assertEqual([list(bands) for _, bands in tasks], [[0, 1], [2, 3], [4, 5], [6, 7]])
+
+    def test_split_tasks_empty_selection(self):
+        with self.assertRaisesRegex(ValueError, "No kpoints selected"):
+            split_tasks(np.arange(0), np.arange(4), 4)
+        with self.assertRaisesRegex(ValueError, "No bands selected"):
+            split_tasks(np.arange(4), np.arange(0), 4)
+        with self.assertRaises(ValueError):
+            split_tasks(np.arange(4), np.arange(4), 0)
+
+    def test_parallel_parchg_matches_serial(self):
+        serial = get_partial_charge_density(
+            WavecarFile(self.file), self.poscar, None, [0, 2, 3], None, None, None, 1, [1, 2, 1]
+        )
+        parallel = get_partial_charge_density_parallel(
+            self.file, self.poscar, None, [0, 2, 3], None, None, None, 1, [1, 2, 1], jobs=2
+        )
+
+        np.testing.assert_allclose(parallel.data["total"], serial.data["total"])
+
+    def test_parallel_unk_matches_serial(self):
+        serial = generate_unk(
+            Namespace(
+                input=self.file, output=os.path.join(self.directory.name, "a"), jobs=1, block=None, single=False
+            )
+        )
+        parallel = generate_unk(
+            Namespace(
+                input=self.file, output=os.path.join(self.directory.name, "b"), jobs=2, block=None, single=False
+            )
+        )
+
+        self.assertEqual(len(serial), 3)
+        for first, second in zip(serial, parallel):
+            with open(first, "rb") as f, open(second, "rb") as g:
+                self.assertEqual(f.read(), g.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 import argparse
 import importlib
+import sys
 
 from . import scripts
+from .utils.cache import disable_cache
 
 
 def lazy_import(name):
@@ -10,15 +12,33 @@ def lazy_import(name):
     return module
 
 
+def selected_command(args: list[str]) -> str | None:
+    """Returns the first positional argument, which is the subcommand to run"""
+    for arg in args:
+        if not arg.startswith("-"):
+            return arg
+
+    return None
+
+
 def parse_app_args(args=None):
     parser = argparse.ArgumentParser(description="vsh command line utility")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse vasprun.xml files from scratch instead of reusing the parse cache",
+    )
     subparsers = parser.add_subparsers(dest="command", required=True)
-    scripts.setup(subparsers)
-    return parser.parse_args()
+    if args is None:
+        args = sys.argv[1:]
+    scripts.setup(subparsers, selected_command(args))
+    return parser.parse_args(args)
 
 
 def main():
     args = parse_app_args()
+    if args.no_cache:
+        disable_cache()
     command = lazy_import("vsh.scripts." + args.command)
     command.run(args)
 
@@ -194,6 +194,28 @@ def poscar(subparsers):
         type=str,
         help="Compare the radial distribution of multiple structures",
     )
+    subp_poscar.add_argument(
+        "--rmax", type=float, help="Largest distance of the radial distribution function (default 10 Å)"
+    )
+    subp_poscar.add_argument(
+        "--bins", type=int, default=1000, help="Number of bins of the radial distribution function"
+    )
+    subp_poscar.add_argument(
+        "--partial",
+        action="store_true",
+        help="Plot the radial distribution function of every pair of elements",
+    )
+    subp_poscar.add_argument(
+        "--trajectory",
+        action="store_true",
+        help="Plot the radial distribution function averaged over the frames of an XDATCAR or vasprun.xml",
+    )
+    subp_poscar.add_argument(
+        "--stride", type=int, default=1, help="Use every stride-th frame of the trajectory"
+    )
+    subp_poscar.add_argument(
+        "-j", "--jobs", type=int, default=1, help="Number of processes binning trajectory frames"
+    )
     subp_poscar.add_argument("--symops", action="store_true", help="Print symmetry operations")
 
     molecule = subp_poscar.add_argument_group("Molecular Tools")
@@ -491,8 +513,38 @@ def cohp(subparsers):
     )
     subp_cohp.add_argument("-p", "--plot", action="store_true", help="Plot the COHPs")
     subp_cohp.add_argument("-l", "--list", action="store_true")
-    subp_cohp.add_argument("--pickle", action="store_true")
-    subp_cohp.add_argument("--graph", action="store_true")
+    subp_cohp.add_argument(
+        "--pickle",
+        action="store_true",
+        help="Save the ICOHPLIST data of each input to a pickle, or of all inputs to one pickle with a source column",
+    )
+    subp_cohp.add_argument(
+        "-j", "--jobs", type=int, default=1, help="Number of processes reading ICOHPLIST files"
+    )
+
+    store = subp_cohp.add_argument_group("ICOHP store")
+    store.add_argument(
+        "--store", type=str, help="Append the ICOHPLIST data of every input to a SQLite store"
+    )
+    store.add_argument(
+        "--query", action="store_true", help="Query the bonds of a store given as the input"
+    )
+    store.add_argument("--pair", type=str, nargs=2, help="Elements of the bonds")
+    store.add_argument("--min-distance", type=float, help="Shortest bond length (Å)")
+    store.add_argument("--max-distance", type=float, help="Longest bond length (Å)")
+    store.add_argument("--min-icohp", type=float, help="Lowest ICOHP (eV)")
+    store.add_argument("--max-icohp", type=float, help="Highest ICOHP (eV) of queried or graphed bonds")
+    store.add_argument(
+        "--source", type=str, help="Calculation directories to query, as a SQL LIKE pattern matched against absolute paths (relative patterns are made absolute)"
+    )
+    subp_cohp.add_argument(
+        "--graph", action="store_true", help="Plot the bonds at the atomic positions of the POSCAR"
+    )
+    subp_cohp.add_argument(
+        "--bonding",
+        action="store_true",
+        help="Print coordination numbers, ICOHP sums, and connected components of every atom",
+    )
 
 
 def procar(subparsers):
@@ -500,9 +552,11 @@ def procar(subparsers):
 
     subp_procar = subparsers.add_parser(
         "procar",
-        help="Reads projected eigenvalue information from vasprun.xml or procar.vsh pickle files (0 based index btw)",
+        help="Reads projected eigenvalue information from vasprun.xml, pickle files, or procar.vsh caches (0 based index btw)",
+    )
+    subp_procar.add_argument(
+        "input", help="Either vasprun.xml, vsh pickle file, or .vsh cache directory"
     )
-    subp_procar.add_argument("input", help="Either vasprun.xml or vsh pickle file")
     subp_procar.add_argument("-k", "--kpoint", help="Kpoint of interest")
     subp_procar.add_argument("-b", "--band", help="Band of interest")
     subp_procar.add_argument("-B", "--bands", help="Band range of interest", nargs="+", type=int)
@@ -533,7 +587,7 @@ def procar(subparsers):
         "-p",
         "--pickle",
         action="store_true",
-        help="Write projected eigenvalues from a vasprun.xml file to a pickle file",
+        help="Write projected eigenvalues to a pickle file, or to a chunked cache if the output ends with .vsh",
     )
     file_handling.add_argument(
         "--filter", help="Filter the projected eigenvalue data", action="store_true"
@@ -594,6 +648,11 @@ def wavecar(subparsers):
     standard_specs.add_argument(
         "--scale", help="Scaling factor for PARCHG mesh density", type=int, default=2
     )
+    standard_specs.add_argument(
+        "--weights",
+        help="vasprun.xml or IBZKPT to weight each kpoint of the PARCHG by (default: equal weights)",
+        type=str,
+    )
     standard_specs.add_argument("--vasp-type", help="VASP type", type=str, choices=['std', 'gam', 'ncl'], default=None)
     standard_specs.add_argument("--prec", help="Precision of the WAVECAR file", type=str, choices=['normal', 'accurate'], default='normal')
 
@@ -624,6 +683,18 @@ def wavecar(subparsers):
         action="store_true",
     )
 
+    functional_choices.add_argument(
+        "--block",
+        help="Number of bands transformed and written at a time by --unk (default: as many as fit in 256 MiB)",
+        type=int,
+        default=None,
+    )
+    functional_choices.add_argument(
+        "--single",
+        help="Write UNK files in single precision",
+        action="store_true",
+    )
+
     info_choices = subp_wavecar.add_argument_group("Information Choices")
     info_choices.add_argument(
         "--nk", help="Print number of kpoints to stdout", action="store_true"
@@ -639,6 +710,32 @@ def wavecar(subparsers):
     )
     info_choices.add_argument("--nbands", help="Number of bands to print for --occ", type=int, default=19)
 
+    subp_wavecar.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of processes to split the kpoints of --parchg and --unk between",
+        type=int,
+        default=1,
+    )
+    subp_wavecar.add_argument(
+        "--fft",
+        help="FFT backend of --parchg and --unk (default: numpy)",
+        type=str,
+        choices=["numpy", "scipy", "pyfftw"],
+        default=None,
+    )
+    subp_wavecar.add_argument(
+        "--fft-threads",
+        help="Number of threads of every scipy or pyfftw transform",
+        type=int,
+        default=None,
+    )
+    subp_wavecar.add_argument(
+        "--fft-wisdom",
+        help="File to load and save pyFFTW plans (wisdom) between runs",
+        type=str,
+        default=None,
+    )
     subp_wavecar.add_argument("input", help="WAVECAR or cube file")
     subp_wavecar.add_argument("-S", "--structure", help="Structure file")
     subp_wavecar.add_argument("-o", "--output", help="Output filename", type=str)
@@ -657,7 +754,14 @@ def chgcar(subparsers):
         "-s", "--sum", help="Add multiple PARCHG or CHGCAR files", action="store_true"
     )
     subp_chgcar.add_argument(
-        "-d", "--diff", help="Subtract two PARCHG or CHGCAR files", action="store_true"
+        "-d", "--diff", help="Subtract the other PARCHG or CHGCAR files from the first", action="store_true"
+    )
+    subp_chgcar.add_argument(
+        "-l",
+        "--coefficients",
+        help="Write the linear combination of the files with these coefficients, e.g. 1 -1 -1",
+        type=float,
+        nargs="+",
     )
     subp_chgcar.add_argument(
         "-o", "--output", help="Save a PARCHG or CHGCAR file", type=str
@@ -668,7 +772,9 @@ def stm(subparsers):
     subp_stm = subparsers.add_parser(
         "stm", help="Reads, analyses, and plots STM data from CHGCAR or cube files"
     )
-    subp_stm.add_argument("input", help="CHGCAR or cube file")
+    subp_stm.add_argument(
+        "input", help="CHGCAR or cube file(s), only --batch uses more than one", nargs="+"
+    )
     subp_stm.add_argument("-H", "--height", help="Height of the slice", type=float)
     subp_stm.add_argument(
         "-D",
@@ -685,29 +791,77 @@ def stm(subparsers):
         help="Plot charge density slice at a certain height",
         action="store_true",
     )
+    subp_stm.add_argument(
+        "-s",
+        "--stm",
+        help="Simulate a constant height (-H) or constant current (--isovalue) STM image",
+        action="store_true",
+    )
+    subp_stm.add_argument(
+        "-i",
+        "--isovalue",
+        help="Density the tip follows in a constant current image",
+        type=float,
+    )
+    subp_stm.add_argument(
+        "-z",
+        "--zrange",
+        help="Heights the tip searches between for a constant current image (default: highest atom to top of the cell), or the heights to animate",
+        type=float,
+        nargs=2,
+    )
+    subp_stm.add_argument(
+        "-b",
+        "--batch",
+        help="Render the STM images of every input at every --heights and --isovalues to the -o directory",
+        action="store_true",
+    )
+    subp_stm.add_argument(
+        "--heights", help="Tip heights of batch constant height images", type=float, nargs="+"
+    )
+    subp_stm.add_argument(
+        "--isovalues", help="Isovalues of batch constant current images", type=float, nargs="+"
+    )
+    subp_stm.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of processes to render batch images or animation frames with",
+        type=int,
+        default=1,
+    )
+    subp_stm.add_argument(
+        "--stride", help="Animate every stride-th z plane", type=int, default=1
+    )
+    subp_stm.add_argument("--fps", help="Frames per second of the animation", type=int, default=5)
     subp_stm.add_argument(
         "-t", "--title", help="Title of the plot", type=str, default="Charge Density"
     )
     subp_stm.add_argument("-o", "--output", help="Output file name", type=str)
 
 
-def setup(subparsers):
-    scripts = [
-        adsorb,
-        alchemy,
-        analysis,
-        band,
-        chgcar,
-        cohp,
-        db,
-        incar,
-        kpoints,
-        manage,
-        poscar,
-        procar,
-        slab,
-        stm,
-        wavecar,
-    ]
-    for script in scripts:
+# captured at import, importing vsh.scripts.<command> replaces the function of the same name
+SCRIPTS = [
+    adsorb,
+    alchemy,
+    analysis,
+    band,
+    chgcar,
+    cohp,
+    db,
+    incar,
+    kpoints,
+    manage,
+    poscar,
+    procar,
+    slab,
+    stm,
+    wavecar,
+]
+
+
+def setup(subparsers, command: str = None):
+    """Adds the parser of the selected command, or every parser if the command is not known"""
+    # only the selected parser is built, the rest are needed for the top level help and errors
+    selected = [script for script in SCRIPTS if script.__name__ == command]
+    for script in selected or SCRIPTS:
         script(subparsers)
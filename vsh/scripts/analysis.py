@@ -2,10 +2,7 @@
 
 import numpy as np
 from ase import Atoms
-from ase.calculators.vasp import Vasp
 from ase.io import read
-from ase.spacegroup import get_spacegroup
-from scipy.spatial.distance import cdist
 
 
 def validate_atoms(atoms: Atoms) -> bool:
@@ -26,85 +23,34 @@ def is_diatomic(atoms: Atoms) -> bool:
         return False
 
 
-def get_adjacency_matrix(atoms: Atoms) -> np.ndarray:
-    """Gets the adjacency matrix of a structure"""
-    if validate_atoms(atoms) is False:
-        raise ValueError("Invalid atoms object")
-    # get the positions of the atoms object
-    positions = atoms.get_positions()
-    adjacency_matrix = cdist(positions, positions)
-
-    return adjacency_matrix
-
-
 def get_number_of_atoms(atoms: Atoms) -> int:
     """Gets the number of atoms in an atoms object"""
     return len(atoms)
 
 
-def analyze_adjacency_matrix(adjacency_matrix: np.ndarray, min_dist: float):
-    """Checks if the adjacency matrix is reasonable"""
-    # update diagonals to be very large
-    np.fill_diagonal(adjacency_matrix, 1000)
-    # check if any off diagonal is less than min_dist, return the indices of the offending atoms
-    indices = np.where(adjacency_matrix < min_dist)
-
-    bond_lengths = adjacency_matrix[indices]
-    if len(indices) > 0:
-        return indices, bond_lengths
-    else:
-        return None
+def conflicting_atoms(atoms: Atoms, min_dist: float) -> dict:
+    """Checks if a structure has atoms that are too close together, across periodic boundaries"""
+    from vsh.utils.neighbor_tools import neighbor_list
 
+    if validate_atoms(atoms) is False:
+        raise ValueError("Invalid atoms object")
 
-def unpack_indices(
-    indices: tuple[np.ndarray], element_list: list[str], bond_lengths: np.ndarray
-):
-    """Returns a dictionary of atom pairs"""
-    # check if indices is an empty np array, if so return None
-    if any(len(index) < 2 for index in indices) or len(indices) == 0 or indices is None:
+    first, second, bond_lengths, _ = neighbor_list(
+        atoms.get_positions(), min_dist, atoms.cell.array, atoms.pbc
+    )
+    if len(bond_lengths) == 0:
         return None
 
+    element_list = atoms.get_chemical_symbols()
+    # shortest pairs first, an atom pair closer than min_dist through several images is listed once
     atom_pairs = {}
-    for length, pair in enumerate(indices):
-        first_element_index, second_element_index = pair
-        first_element = element_list[first_element_index]
-        second_element = element_list[second_element_index]
-        bond_length = bond_lengths[length]
-        entry = {
-            f"{first_element}{first_element_index}-{second_element}{second_element_index}": bond_length
-        }
-        atom_pairs.update(entry)
+    for index in np.argsort(bond_lengths, kind="stable"):
+        i, j = first[index], second[index]
+        atom_pairs.setdefault(f"{element_list[i]}{i}-{element_list[j]}{j}", bond_lengths[index])
 
     return atom_pairs
 
 
-def conflicting_atoms(atoms: Atoms, min_dist: float) -> dict:
-    """Checks if a structure has atoms that are too close together"""
-    if is_diatomic(atoms):
-        # get length between the two atoms
-        positions = atoms.get_positions()
-        bond_length = np.linalg.norm(positions[0] - positions[1])
-        if bond_length < min_dist:
-            return {f"{atoms[0].symbol}{0}-{atoms[1].symbol}{1}": bond_length}
-        else:
-            return None
-
-    neighbor_list = get_adjacency_matrix(atoms)
-    indices, bond_lengths = analyze_adjacency_matrix(neighbor_list, min_dist)
-    element_list: tuple[np.ndarray] = atoms.get_chemical_symbols()
-
-    if indices is None or len(indices) == 0:
-        return None
-
-    print(indices)
-    print(get_number_of_atoms(atoms))
-    # check if indices is greater than or equal to the number of atoms
-    if len(indices) >= get_number_of_atoms(atoms):
-        raise ValueError("Min distance is too large or the structure may be corrupt")
-
-    return unpack_indices(indices, element_list, bond_lengths)
-
-
 def print_conflicts(conflicts: dict):
     """Prints the conflicting atoms"""
     if conflicts is None:
@@ -120,10 +66,9 @@ def print_conflicts(conflicts: dict):
 def check_convergence(file: str = "./vasprun.xml") -> list[bool]:
     """Looks for vasprun.xml file and checks if converged"""
 
-    # import Vasprun from pymatgen
-    from pymatgen.io.vasp.outputs import Vasprun
+    from vsh.utils.vasprun_tools import load_vasprun
 
-    vasprun_object = Vasprun(
+    vasprun_object = load_vasprun(
         file,
         parse_dos=False,
         parse_eigen=False,
@@ -144,19 +89,29 @@ def inspect_oszicar(file: str = "./OSZICAR") -> dict:
     return oszicar_object.as_dict()
 
 
+def read_atoms(file: str) -> Atoms:
+    """Reads a structure file, vasprun.xml files are reused from the parse cache"""
+    if file.endswith(".xml"):
+        from vsh.utils.cache import cached_parse
+
+        return cached_parse(file, "atoms", read)
+
+    return read(file)
+
+
 def get_conflicts(args):
-    atoms = read(args.input)
+    atoms = read_atoms(args.input)
     conflicts = conflicting_atoms(atoms, args.conflicts)
     print_conflicts(conflicts)
 
 
 def get_volume(args):
-    atoms = read(args.input)
+    atoms = read_atoms(args.input)
     print(atoms.get_volume())
 
 
 def get_cell(args):
-    atoms = read(args.input)
+    atoms = read_atoms(args.input)
     cell = atoms.get_cell()
     # if anything is less than 0.01, set it to 0
     cell = np.where(np.abs(cell) < 0.01, 0, cell)
@@ -166,7 +121,7 @@ def get_cell(args):
 
 
 def get_params(args):
-    atoms = read(args.input)
+    atoms = read_atoms(args.input)
     cell = atoms.cell.cellpar()
     print(f"a = {cell[0]:.5f}")
     print(f"b = {cell[1]:.5f}")
@@ -174,14 +129,16 @@ def get_params(args):
 
 
 def get_symmetry(args):
-    atoms = read(args.input)
+    from ase.spacegroup import get_spacegroup
+
+    atoms = read_atoms(args.input)
     spacegroup = get_spacegroup(atoms)
     print(f"Space group number: {spacegroup.no}")
     print(f"Space group symbol: {spacegroup.symbol}")
 
 
 def get_vacuum(args):
-    atoms = read(args.input)
+    atoms = read_atoms(args.input)
     z = atoms.cell.cellpar()[2]
     z_coords = atoms.get_positions()[:, 2]
     z_max = np.max(z_coords)
@@ -191,7 +148,9 @@ def get_vacuum(args):
 
 
 def get_energy(args):
-    atoms = read(args.input)
+    from ase.calculators.vasp import Vasp
+
+    atoms = read_atoms(args.input)
     calculator = Vasp(atoms)
     energy = calculator.get_potential_energy()
     print(f"Energy: {energy:.5f}")
@@ -1,5 +1,7 @@
 from pymatgen.io.vasp import Chgcar
 
+from vsh.utils.chgcar_tools import cached_chgcar, combine_grids
+
 
 def write_output(chgcar, output, cube):
     if cube:
@@ -18,7 +20,7 @@ def plot_linear_slice(
     import numpy as np
     from matplotlib import pyplot as plt
 
-    chgcar = Chgcar.from_file(file)
+    chgcar = Chgcar(*cached_chgcar(file))
     charge_line = chgcar.linear_slice(
         point1, point2, npoints
     )  # 1d array of values along the slice
@@ -35,24 +37,47 @@ def plot_linear_slice(
     plt.show()
 
 
+def combination_coefficients(args) -> list[float]:
+    """Returns the coefficient of every input file: all ones for a sum, 1, -1, -1, ... for a difference"""
+    if args.coefficients:
+        return args.coefficients
+    if args.sum:
+        return [1.0] * len(args.input)
+
+    return [1.0] + [-1.0] * (len(args.input) - 1)
+
+
 def run(args):
-    try:
-        chgcar1 = Chgcar.from_file(args.input[0])
-        chgcar = chgcar1  # Initialize chgcar to chgcar1 in case args.sum and args.diff are both False
-        if args.sum or args.diff:  # Only try to read the second file if necessary
-            chgcar2 = Chgcar.from_file(args.input[1])
-    except IndexError:
+    combine = args.sum or args.diff or args.coefficients
+    if combine and len(args.input) < 2:
         print("Error: Not enough input files specified.")
         return
+
+    if combine and args.output and not args.cube:
+        # streams the grids instead of holding every file in memory
+        combine_grids(args.input, combination_coefficients(args), args.output)
+        return
+
+    try:
+        if not combine:
+            # keeps the augmentation occupancies of a file that is only converted
+            chgcar = Chgcar.from_file(args.input[0])
+        else:
+            chgcar = Chgcar(*cached_chgcar(args.input[0]))
+            coefficients = combination_coefficients(args)
+            if len(coefficients) != len(args.input):
+                raise ValueError(
+                    f"Expected one coefficient for each of the {len(args.input)} files, got {len(coefficients)}"
+                )
+            if coefficients[0] != 1:
+                # c * rho as rho + (c - 1) * rho
+                chgcar = chgcar.linear_add(chgcar, coefficients[0] - 1)
+            for file, coefficient in zip(args.input[1:], coefficients[1:]):
+                chgcar = chgcar.linear_add(Chgcar(*cached_chgcar(file)), coefficient)
     except FileNotFoundError as e:
         print(f"Error: File not found: {e.filename}")
         return
 
-    if args.sum:
-        chgcar += chgcar2
-    elif args.diff:
-        chgcar -= chgcar2
-
     if args.output:
         write_output(chgcar, args.output, args.cube)
     else:
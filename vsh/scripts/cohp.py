@@ -1,16 +1,15 @@
 import os
 
-import matplotlib.pyplot as plt
-import networkx as nx
+import numpy as np
 import pandas as pd
-from pymatgen.electronic_structure.cohp import CompleteCohp
-from pymatgen.electronic_structure.plotter import CohpPlotter
 
-plt.style.use("seaborn-v0_8-colorblind")
+PLOT_STYLE = "seaborn-v0_8-colorblind"
 
 
 def cohp_from_file(args, file):
     """Returns a CompleteCohp object from a COHP or COBI file. Default format is LOBSTER"""
+    from pymatgen.electronic_structure.cohp import CompleteCohp
+
     cohp = CompleteCohp.from_file(
         fmt=args.format,
         filename=file,
@@ -23,6 +22,7 @@ def cohp_from_file(args, file):
 
 def cohp_from_dir(directory: str):
     """Returns a CompleteCohp object from a directory containing a COHP or COBI file. Default format is LOBSTER"""
+    from pymatgen.electronic_structure.cohp import CompleteCohp
 
     cohp = CompleteCohp.from_file(
         fmt="LOBSTER",
@@ -33,24 +33,144 @@ def cohp_from_dir(directory: str):
     return cohp
 
 
+ICOHP_COLUMNS = [
+    "COHP",
+    "atom_Mu",
+    "atom_Nu",
+    "distance",
+    "translation_x",
+    "translation_y",
+    "translation_z",
+    "ICOHP",
+]
+
+ICOHP_DTYPES = {
+    "COHP": np.int32,
+    "atom_Mu": "category",
+    "atom_Nu": "category",
+    "distance": np.float32,
+    "translation_x": np.int8,
+    "translation_y": np.int8,
+    "translation_z": np.int8,
+    "ICOHP": np.float32,
+}
+
+
+def split_atom_labels(labels: pd.Series) -> tuple[pd.Categorical, np.ndarray]:
+    """Splits categorical atom labels such as Bi12 into their element and (1-based) index"""
+    parts = labels.cat.categories.to_series().str.extract(r"^([A-Za-z]+)(\d+)$")
+    if parts.isna().any().any():
+        unexpected = labels.cat.categories[parts[0].isna().to_numpy()]
+        raise ValueError(f"Unexpected atom labels: {', '.join(unexpected[:5])}")
+
+    codes = labels.cat.codes.to_numpy()
+    elements, element_codes = np.unique(parts[0].to_numpy(dtype=str), return_inverse=True)
+    element = pd.Categorical.from_codes(element_codes[codes], elements)
+    index = parts[1].to_numpy(dtype=np.int32)[codes]
+
+    return element, index
+
+
 def ichop_list_to_dataframe(file_path):
-    """Returns a pandas dataframe of the species in the ICOHPLIST.lobster file"""
-
-    df = pd.read_csv(
-        file_path,
-        sep="\s+",
-        skiprows=1,
-        names=[
-            "COHP",
-            "atom_Mu",
-            "atom_Nu",
-            "distance",
-            "translation_x",
-            "translation_y",
-            "translation_z",
-            "ICOHP",
-        ],
-    )
+    """
+    Returns a pandas dataframe of the bonds in an ICOHPLIST.lobster (or ICOOPLIST, ICOBILIST) file.
+
+    Every block of the file (one per spin) is parsed by the C parser of pandas with compact
+    dtypes, atom labels are categorical and split into element and index columns, and the spin
+    of every bond is kept in a spin column. Orbital resolved rows (labels such as Bi1_6s) are
+    dropped, so that every bond is listed once.
+    """
+    import io
+    import re
+
+    with open(file_path, "rb") as f:
+        data = f.read()
+
+    # headers (COHP#, COOP#, or COBI# ... for spin N) start a block of bonds, only they contain #
+    headers, position = [], data.find(b"#")
+    while position != -1:
+        start, end = data.rfind(b"\n", 0, position) + 1, data.find(b"\n", position)
+        end = len(data) if end == -1 else end
+        headers.append((start, end))
+        position = data.find(b"#", end)
+    if not headers:
+        raise ValueError(f"No ICOHPLIST header found in {file_path}")
+
+    blocks = []
+    for (start, end), following in zip(headers, headers[1:] + [(len(data), None)]):
+        block = pd.read_csv(
+            io.BytesIO(data[end : following[0]]),
+            sep=r"\s+",
+            header=None,
+            names=ICOHP_COLUMNS,
+            dtype=ICOHP_DTYPES,
+            engine="c",
+        )
+        spin = re.search(rb"spin\s+(\d+)", data[start:end])
+        block["spin"] = np.int8(spin.group(1) if spin else 1)
+        blocks.append(block)
+
+    df = concat_categorical(blocks) if len(blocks) > 1 else blocks[0]
+
+    orbital = np.zeros(len(df), dtype=bool)
+    for column in ["atom_Mu", "atom_Nu"]:
+        orbital |= df[column].cat.categories.str.contains("_")[df[column].cat.codes.to_numpy()]
+    if orbital.any():
+        df = df[~orbital].reset_index(drop=True)
+        df["atom_Mu"] = df["atom_Mu"].cat.remove_unused_categories()
+        df["atom_Nu"] = df["atom_Nu"].cat.remove_unused_categories()
+
+    for atom in ["Mu", "Nu"]:
+        df[f"element_{atom}"], df[f"index_{atom}"] = split_atom_labels(df[f"atom_{atom}"])
+
+    return df
+
+
+def concat_categorical(frames: list[pd.DataFrame], **kwargs) -> pd.DataFrame:
+    """Concatenates dataframes, keeping categorical columns categorical over the union of their categories"""
+    from pandas.api.types import union_categoricals
+
+    df = pd.concat(frames, ignore_index=True, **kwargs)
+    for column, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            df[column] = union_categoricals([frame[column] for frame in frames], ignore_order=True)
+
+    return df
+
+
+def iter_icohplists(input_paths: list[str], jobs: int = 1):
+    """Yields the dataframes of the ICOHPLIST.lobster files of files or directories in order, read by jobs processes"""
+    files = [check_cohp_path(os.path.abspath(input_path)) for input_path in input_paths]
+
+    if jobs > 1 and len(files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(files))) as executor:
+            # a few files per task keeps the overhead low for thousands of small files
+            chunksize = max(1, len(files) // (4 * jobs))
+            yield from executor.map(ichop_list_to_dataframe, files, chunksize=chunksize)
+    else:
+        yield from map(ichop_list_to_dataframe, files)
+
+
+def read_icohplists(input_paths: list[str], jobs: int = 1) -> list[pd.DataFrame]:
+    """Returns the dataframes of the ICOHPLIST.lobster files of files or directories, read by jobs processes"""
+    return list(iter_icohplists(input_paths, jobs))
+
+
+def collate_icohplists(input_paths: list[str], jobs: int = 1) -> pd.DataFrame:
+    """
+    Returns one dataframe of the bonds of many ICOHPLIST.lobster files or directories.
+
+    The files are parsed in parallel and the absolute input path each bond came from is kept in
+    a categorical source column, so that the table can be grouped or partitioned by calculation.
+    """
+    frames = read_icohplists(input_paths, jobs)
+    sources = [os.path.abspath(input_path) for input_path in input_paths]
+    lengths = [len(frame) for frame in frames]
+
+    df = concat_categorical(frames)
+    df["source"] = pd.Categorical.from_codes(np.repeat(np.arange(len(frames)), lengths), sources)
 
     return df
 
@@ -69,35 +189,207 @@ def check_cohp_path(input_path):
     return file_path
 
 
-def show_cohp_species(input_path) -> None:
-    """Prints a list of the species in the ICOHPLIST.lobster file"""
+def show_cohp_species(args) -> None:
+    """Prints the bonds in the ICOHPLIST.lobster files"""
 
-    input_path = os.path.abspath(input_path)
-    file_path = check_cohp_path(input_path)
-    print(ichop_list_to_dataframe(file_path))
+    for df in read_icohplists(args.input, args.jobs):
+        print(df)
 
     return None
 
 
 def icohp_to_pickle(args):
-    """Saves ICOHP data to a pickle file"""
+    """Saves ICOHP data to a pickle file, or the data of every input to one pickle with a source column"""
+
+    if len(args.output) == 1 and len(args.input) > 1:
+        collate_icohplists(args.input, args.jobs).to_pickle(args.output[0])
+        return None
 
     # check if len(args.input) == len(args.output)
     if len(args.input) != len(args.output):
         raise ValueError("Number of input files and output files do not match.")
 
-    for input_path, output in zip(args.input, args.output):
-        input_path = os.path.abspath(input_path)
-        file_path = check_cohp_path(input_path)
-        df = ichop_list_to_dataframe(file_path)
-
+    for df, output in zip(read_icohplists(args.input, args.jobs), args.output):
         df.to_pickle(output)
 
     return None
 
 
+ICOHP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calculations (id INTEGER PRIMARY KEY, source TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS bonds (
+    calculation INTEGER NOT NULL REFERENCES calculations (id),
+    element_a TEXT NOT NULL,
+    index_a INTEGER NOT NULL,
+    element_b TEXT NOT NULL,
+    index_b INTEGER NOT NULL,
+    distance REAL NOT NULL,
+    translation_x INTEGER NOT NULL,
+    translation_y INTEGER NOT NULL,
+    translation_z INTEGER NOT NULL,
+    icohp REAL NOT NULL,
+    spin INTEGER NOT NULL
+);
+"""
+
+# element pairs are stored in alphabetical order, so the index finds a pair in either order and
+# serves distance ranges within a pair (finer than any distance binning) without a table scan
+ICOHP_INDEXES = """
+CREATE INDEX IF NOT EXISTS bonds_pair_distance ON bonds (element_a, element_b, distance);
+CREATE INDEX IF NOT EXISTS bonds_calculation ON bonds (calculation);
+"""
+
+
+def icohp_rows(df: pd.DataFrame, calculation: int):
+    """Returns the rows of the bonds table for an ICOHPLIST dataframe"""
+    mu, nu = df["element_Mu"].astype(str).to_numpy(), df["element_Nu"].astype(str).to_numpy()
+    swap = mu > nu
+    index_mu, index_nu = df["index_Mu"].to_numpy(), df["index_Nu"].to_numpy()
+
+    columns = [
+        np.full(len(df), calculation),
+        np.where(swap, nu, mu),
+        np.where(swap, index_nu, index_mu),
+        np.where(swap, mu, nu),
+        np.where(swap, index_mu, index_nu),
+        # float32 columns are rounded back to the 5 decimals LOBSTER writes
+        df["distance"].to_numpy(np.float64).round(5),
+        # the translation is of atom b's image relative to atom a, so swapped pairs negate it
+        *[
+            np.where(swap, -translation, translation)
+            for translation in df[["translation_x", "translation_y", "translation_z"]].to_numpy(np.int64).T
+        ],
+        df["ICOHP"].to_numpy(np.float64).round(5),
+        df["spin"].to_numpy(),
+    ]
+
+    return zip(*[column.tolist() for column in columns])
+
+
+def append_icohp_store(database: str, input_paths: list[str], jobs: int = 1) -> int:
+    """
+    Appends the bonds of the ICOHPLIST.lobster files of files or directories to a SQLite store.
+
+    Every input is a calculation identified by its path, ingesting it again replaces its bonds.
+    Files are parsed by jobs processes and inserted in one transaction, indexes on the element
+    pair and distance, and on the calculation, are built after the rows are inserted. Returns
+    the number of bonds inserted.
+    """
+    import sqlite3
+
+    sources = [os.path.abspath(input_path) for input_path in input_paths]
+    connection = sqlite3.connect(database)
+    count = 0
+    try:
+        with connection:
+            connection.executescript(ICOHP_SCHEMA)
+            for source, df in zip(sources, iter_icohplists(input_paths, jobs)):
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO calculations (source) VALUES (?)", (source,)
+                )
+                (calculation,) = connection.execute(
+                    "SELECT id FROM calculations WHERE source = ?", (source,)
+                ).fetchone()
+                # only calculations that were already stored have bonds to replace
+                if not cursor.rowcount:
+                    connection.execute("DELETE FROM bonds WHERE calculation = ?", (calculation,))
+                connection.executemany(
+                    "INSERT INTO bonds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    icohp_rows(df, calculation),
+                )
+                count += len(df)
+            connection.executescript(ICOHP_INDEXES)
+    finally:
+        connection.close()
+
+    return count
+
+
+def query_icohp_store(
+    database: str,
+    pair: list[str] = None,
+    min_distance: float = None,
+    max_distance: float = None,
+    min_icohp: float = None,
+    max_icohp: float = None,
+    source: str = None,
+) -> pd.DataFrame:
+    """
+    Returns the bonds of an ICOHP store that pass every given filter.
+
+    The filters are applied by SQLite, so a query for an element pair and a distance range
+    only reads the matching rows of the index rather than the bonds of every calculation.
+    Sources are stored as absolute paths and matched with SQL LIKE patterns (% matches any
+    characters), patterns that do not start with % are made absolute first.
+    """
+    import sqlite3
+
+    if not os.path.exists(database):
+        raise ValueError(f"ICOHP store {database} does not exist")
+
+    if source is not None and not source.startswith("%"):
+        source = os.path.abspath(source)
+
+    conditions, parameters = [], []
+    if pair:
+        if len(pair) != 2:
+            raise ValueError(f"Expected a pair of elements, got {pair}")
+        conditions.append("element_a = ? AND element_b = ?")
+        parameters.extend(sorted(pair))
+    for column, operator, value in [
+        ("distance", ">=", min_distance),
+        ("distance", "<=", max_distance),
+        ("icohp", ">=", min_icohp),
+        ("icohp", "<=", max_icohp),
+        ("source", "LIKE", source),
+    ]:
+        if value is not None:
+            conditions.append(f"{column} {operator} ?")
+            parameters.append(value)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = (
+        "SELECT source, element_a, index_a, element_b, index_b, distance, translation_x, "
+        "translation_y, translation_z, icohp, spin FROM bonds "
+        f"JOIN calculations ON calculations.id = bonds.calculation {where}"
+    )
+
+    connection = sqlite3.connect(database)
+    try:
+        return pd.read_sql_query(query, connection, params=parameters)
+    finally:
+        connection.close()
+
+
+def store_icohp(args):
+    """Appends the ICOHPLIST data of every input to an ICOHP store"""
+    count = append_icohp_store(args.store, args.input, args.jobs)
+    print(f"Stored {count} bonds of {len(args.input)} calculations in {args.store}")
+
+
+def query_icohp(args):
+    """Prints or saves the bonds of an ICOHP store (the input) that pass the given filters"""
+    df = query_icohp_store(
+        args.input[0],
+        args.pair,
+        args.min_distance,
+        args.max_distance,
+        args.min_icohp,
+        args.max_icohp,
+        args.source,
+    )
+
+    if not args.output:
+        with pd.option_context("display.max_rows", None, "display.max_columns", None):
+            print(df.to_string(index=False))
+    else:
+        df.to_csv(args.output[0], index=False)
+
+
 def collate_cohps(args):
     """Collates a list of COHP or COBI files. Default format is LOBSTER"""
+    from pymatgen.electronic_structure.plotter import CohpPlotter
+
     plotter = CohpPlotter(are_cobis=args.cobi)
 
     cohp_list = [cohp_from_dir(directory) for directory in args.input]
@@ -112,6 +404,9 @@ def collate_cohps(args):
 
 def plot_cohps(args):
     """Plots a list of COHP or COBI files. Default format is LOBSTER"""
+    import matplotlib.pyplot as plt
+
+    plt.style.use(PLOT_STYLE)
 
     cohp_plt = collate_cohps(args)
 
@@ -126,41 +421,183 @@ def plot_cohps(args):
     return None
 
 
-def get_icohp_graph(args) -> list[nx.Graph]:
-    """Plots a graph of the COHP or COBI files"""
-    graphs = []
+def bonding_graph(df: pd.DataFrame, max_icohp: float = None, natoms: int = None) -> tuple:
+    """
+    Returns the sparse adjacency matrices of the bonds of an ICOHPLIST dataframe.
+
+    The first matrix holds the ICOHP of every bond once (from atom Mu to atom Nu, summed over
+    spins, periodic images between the same atoms add up), the second the number of bonds, so
+    either can be symmetrized with A + A.T. Atoms are numbered by their index in the structure
+    (from 0), the element of every atom is returned as well ("" for atoms without bonds). Only
+    bonds with an ICOHP up to max_icohp (summed over spins) are kept.
+    """
+    from scipy.sparse import coo_matrix
+
+    mu, nu = df["index_Mu"].to_numpy() - 1, df["index_Nu"].to_numpy() - 1
+    natoms = natoms or int(max(mu.max(initial=-1), nu.max(initial=-1)) + 1)
+
+    # bonds are listed once per spin, a bond is identified by its atoms and translation
+    translations = df[["translation_x", "translation_y", "translation_z"]].to_numpy(np.int64).T
+    bonds = (df["COHP"].to_numpy(), mu, nu, *translations)
+    keys, bond = np.unique(np.column_stack(bonds), axis=0, return_inverse=True)
+    icohp = np.bincount(bond.ravel(), weights=df["ICOHP"].to_numpy(np.float64), minlength=len(keys))
+    keep = icohp <= max_icohp if max_icohp is not None else np.ones(len(keys), dtype=bool)
+
+    shape = (natoms, natoms)
+    rows, columns = keys[keep, 1], keys[keep, 2]
+    weights = coo_matrix((icohp[keep], (rows, columns)), shape=shape).tocsr()
+    counts = coo_matrix((np.ones(len(rows)), (rows, columns)), shape=shape).tocsr()
+
+    elements = np.full(natoms, "", dtype=object)
+    elements[mu] = df["element_Mu"].astype(str).to_numpy()
+    elements[nu] = df["element_Nu"].astype(str).to_numpy()
+
+    return weights, counts, elements
+
+
+def bonding_summary(df: pd.DataFrame, max_icohp: float = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Returns the coordination number, ICOHP sum, and connected component of every atom, and the
+    number of bonds and ICOHP sum of every pair of elements, from sparse matrix products.
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    weights, counts, elements = bonding_graph(df, max_icohp)
+    _, components = connected_components(counts + counts.T, directed=False)
+
+    atoms = pd.DataFrame(
+        {
+            "atom": [f"{element}{i + 1}" for i, element in enumerate(elements)],
+            "element": elements,
+            "coordination": np.asarray((counts + counts.T).sum(axis=1)).ravel().astype(int),
+            "ICOHP": np.asarray((weights + weights.T).sum(axis=1)).ravel(),
+            "component": components,
+        }
+    )
+
+    # one hot element matrix, E.T @ A @ E sums the bonds from each element to each other
+    names, codes = np.unique(elements.astype(str), return_inverse=True)
+    onehot = coo_matrix((np.ones(len(codes)), (np.arange(len(codes)), codes))).tocsr()
+    pair_counts = (onehot.T @ counts @ onehot).toarray()
+    pair_weights = (onehot.T @ weights @ onehot).toarray()
+    a, b = np.triu_indices(len(names))
+    # bonds from b to a are bonds between the same pair of elements
+    mirrored = a != b
+    pairs = pd.DataFrame(
+        {
+            "element_a": names[a],
+            "element_b": names[b],
+            "bonds": (pair_counts[a, b] + mirrored * pair_counts[b, a]).astype(int),
+            "ICOHP": pair_weights[a, b] + mirrored * pair_weights[b, a],
+        }
+    )
+    pairs = pairs[(pairs["bonds"] > 0) & (pairs["element_a"] != "")].reset_index(drop=True)
+
+    return atoms, pairs
+
 
-    for input_path in args.input:
-        input_path = os.path.abspath(input_path)
-        file_path = check_cohp_path(input_path)
-        df = ichop_list_to_dataframe(file_path)
+def sum_spins(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns every bond of an ICOHPLIST dataframe once, with its ICOHP summed over spins"""
+    bond = ["COHP", "index_Mu", "index_Nu", "translation_x", "translation_y", "translation_z"]
 
-        G = nx.from_pandas_edgelist(df, "atom_Mu", "atom_Nu", "ICOHP")
-        graphs.append(G)
+    return df.groupby(bond, sort=False, observed=True)["ICOHP"].sum().reset_index()
+
+
+def to_networkx(weights, elements) -> "nx.Graph":
+    """Returns a NetworkX graph of an ICOHP adjacency matrix with atom labels as nodes"""
+    import networkx as nx
+
+    graph = nx.from_scipy_sparse_array(weights + weights.T, edge_attribute="ICOHP")
+    labels = {i: f"{element}{i + 1}" for i, element in enumerate(elements)}
+    graph = nx.relabel_nodes(graph, labels)
+    graph.remove_nodes_from([label for i, label in labels.items() if not elements[i]])
+
+    return graph
+
+
+def get_icohp_graph(args) -> list["nx.Graph"]:
+    """Returns NetworkX graphs of the ICOHPLIST files"""
+    graphs = []
+
+    for df in read_icohplists(args.input, args.jobs):
+        weights, _, elements = bonding_graph(df, args.max_icohp)
+        graphs.append(to_networkx(weights, elements))
 
     return graphs
 
 
+def structure_path(input_path: str) -> str:
+    """Returns the POSCAR (or CONTCAR) next to an ICOHPLIST.lobster file or in its directory"""
+    directory = input_path if os.path.isdir(input_path) else os.path.dirname(os.path.abspath(input_path))
+    for name in ["POSCAR", "CONTCAR"]:
+        if os.path.isfile(os.path.join(directory, name)):
+            return os.path.join(directory, name)
+
+    raise ValueError(f"No POSCAR or CONTCAR found in {directory} to place the atoms")
+
+
 def plot_icohp_graph(args):
-    """Plots a graph of the COHP or COBI file"""
-
-    graphs = get_icohp_graph(args)
-
-    for G in graphs:
-        # color edges by weight using a colormap
-        pos = nx.spring_layout(G)
-        edges = G.edges()
-        weights = [G[u][v]["ICOHP"] for u, v in edges]
-        nx.draw(G, pos, edge_color=weights, width=2, edge_cmap=plt.cm.plasma)
-        nx.draw_networkx_nodes(
-            G, pos, node_size=600, node_color="black"
-        )
-        nx.draw_networkx_labels(
-            G, pos, font_size=12, font_family="sans-serif", font_color="white"
-        )
-        plt.axis("off")
+    """Plots the bonds of ICOHPLIST files at the atomic positions, projected on the ab plane"""
+    import matplotlib.pyplot as plt
+    from ase.io import read
+    from matplotlib.collections import LineCollection
+
+    plt.style.use(PLOT_STYLE)
+
+    for index, (input_path, df) in enumerate(zip(args.input, read_icohplists(args.input, args.jobs))):
+        atoms = read(structure_path(input_path))
+        cell = atoms.cell.array
+        positions = atoms.get_positions()
+
+        # bonds are drawn to the periodic image of atom Nu that atom Mu is bonded to
+        df = sum_spins(df)
+        if args.max_icohp is not None:
+            df = df[df["ICOHP"] <= args.max_icohp]
+        translations = df[["translation_x", "translation_y", "translation_z"]].to_numpy()
+        start = positions[df["index_Mu"].to_numpy() - 1]
+        end = positions[df["index_Nu"].to_numpy() - 1] + translations @ cell
+        icohps = df["ICOHP"].to_numpy()
+
+        fig, ax = plt.subplots()
+        lines = LineCollection(np.stack([start[:, :2], end[:, :2]], axis=1), cmap="plasma", linewidths=2)
+        lines.set_array(icohps)
+        ax.add_collection(lines)
+        fig.colorbar(lines, ax=ax, label="ICOHP (eV)")
+
+        symbols = np.array(atoms.get_chemical_symbols())
+        for symbol in np.unique(symbols):
+            ax.scatter(*positions[symbols == symbol, :2].T, s=60, label=symbol, zorder=3)
+        ax.set_aspect("equal")
+        ax.autoscale()
+        ax.set_xlabel("x (Å)")
+        ax.set_ylabel("y (Å)")
+        ax.legend()
+
+        if args.output:
+            fig.savefig(args.output[index], dpi=args.dpi)
+            plt.close(fig)
+        else:
+            plt.show()
+
+
+def show_bonding(args):
+    """Prints (or saves as CSV) the coordination, ICOHP sums, and components of the atoms of every input"""
+    tables = []
+    for input_path, df in zip(args.input, iter_icohplists(args.input, args.jobs)):
+        atoms, pairs = bonding_summary(df, args.max_icohp)
+        if args.output:
+            atoms.insert(0, "source", os.path.abspath(input_path))
+            tables.append(atoms)
+            continue
+
+        with pd.option_context("display.max_rows", None, "display.max_columns", None):
+            print(input_path)
+            print(atoms.to_string(index=False))
+            print(pairs.to_string(index=False))
 
-        plt.show()
+    if args.output:
+        pd.concat(tables, ignore_index=True).to_csv(args.output[0], index=False)
 
 
 def run(args):
@@ -169,6 +606,9 @@ def run(args):
         "list": show_cohp_species,
         "pickle": icohp_to_pickle,
         "graph": plot_icohp_graph,
+        "bonding": show_bonding,
+        "store": store_icohp,
+        "query": query_icohp,
     }
 
     for arg, func in functions.items():
@@ -6,6 +6,14 @@ import hashlib
 import time
 import gzip
 
+from vsh.utils.cache import cached_parse
+
+
+def read_vasprun_dict(file_path: str, **parse_kwargs) -> dict:
+    """Parses a Vasprun file into a dictionary"""
+    return Vasprun(file_path, **parse_kwargs).as_dict()
+
+
 def parse_vasprun_file(file_path: str, **parse_kwargs) -> dict:
     """
     Parse the Vasprun file and return the results as a dictionary.
@@ -18,7 +26,7 @@ def parse_vasprun_file(file_path: str, **parse_kwargs) -> dict:
         dict: Parsed results as a dictionary.
     """
     try:
-        return Vasprun(file_path, **parse_kwargs).as_dict()
+        return cached_parse(file_path, "vasprun_dict", read_vasprun_dict, **parse_kwargs)
     except Exception as e:
         print(f"Error parsing Vasprun file: {e}")
         return {}
@@ -87,7 +95,7 @@ def write_to_file(data: dict, file_path: str):
 
 def save_vasprun_to_file(args):
 
-    results_dict = parse_vasprun_file(args.input, parse_dos=args.dos, parse_eigen=args.eigen, parse_projected_eigen=args.projected_eigen, parse_potcar_file=args.potcar)
+    results_dict = parse_vasprun_file(args.input, parse_dos=args.dos, parse_eigen=args.eigen, parse_projected_eigen=args.projected, parse_potcar_file=args.potcar)
     
     if results_dict:
         hashes = calculate_hashes(results_dict)
@@ -103,7 +111,7 @@ def summarize_vasprun(args):
         with gzip.open(args.input, 'rb') as f:
             results_dict = json.loads(f.read().decode('utf-8'))
     except OSError:
-        results_dict = parse_vasprun_file(args.input, parse_dos=args.dos, parse_eigen=args.eigen, parse_projected_eigen=args.projected_eigen, parse_potcar_file=args.potcar)
+        results_dict = parse_vasprun_file(args.input, parse_dos=args.dos, parse_eigen=args.eigen, parse_projected_eigen=args.projected, parse_potcar_file=args.potcar)
     except Exception as e:
         print(f"Error summarizing Vasprun file: {e}")
     
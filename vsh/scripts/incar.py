@@ -1,11 +1,10 @@
 import json
 import os
 
-from ase.io import read
-
 
 def get_atoms(args):
     """Creates ASE atoms object from a file"""
+    from ase.io import read
 
     atoms = read(args.input)
 
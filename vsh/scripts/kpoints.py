@@ -1,5 +1,4 @@
 import numpy as np
-from ase.io import read
 
 two_d_kpath_template = """Two dimensional Kpath 
    {{ kpath }}
@@ -19,6 +18,7 @@ Reciprocal
 
 def get_atoms(args):
     """Creates ASE atoms object from a file"""
+    from ase.io import read
 
     atoms = read(args.input)
 
@@ -82,9 +82,9 @@ def snapshot(args):
 
 def parse_general_vasprun(file: str) -> dict:
     """Parses the general vasprun.xml file for structure, kpoint info, and energy"""
-    from pymatgen.io.vasp import Vasprun
+    from vsh.utils.vasprun_tools import load_vasprun
 
-    vasprun = Vasprun(
+    vasprun = load_vasprun(
         file,
         parse_potcar_file=False,
         parse_dos=False,
@@ -149,7 +149,7 @@ def write_data_pickle(args):
         data["note"] = note
 
     if args.electronic_structure:
-        from procar import load_dataframe_from_file
+        from vsh.scripts.procar import load_dataframe_from_file
 
         df = load_dataframe_from_file(args.input)
         data["electronic_structure"] = df
@@ -223,10 +223,10 @@ def unpack_pickle(args):
 
 def reconstitute_vasprun(file: str):
     """Unpacks POSCAR, INCAR, CONTCAR, and KPOINTS from a vasprun.xml file"""
-    from pymatgen.io.vasp import Vasprun
+    from vsh.utils.vasprun_tools import load_vasprun
 
     # Load the vasprun file
-    vasprun = Vasprun(
+    vasprun = load_vasprun(
         file,
         parse_potcar_file=False,
         parse_dos=False,
@@ -184,60 +184,19 @@ def list_poscar(args):
         df.to_csv(args.output, index=False)
 
 
-def calculate_rdf(coordinates, bins=1000, r_max=None):
-    """
-    Calculate the radial distribution function (RDF) from a set of XYZ coordinates.
-
-    Parameters:
-    - coordinates: numpy array of shape (n_particles, 3) representing XYZ coordinates.
-    - bins: number of bins for histogram.
-    - r_max: maximum distance to consider.
-
-    Returns:
-    - bin_centers: centers of the bins.
-    - rdf: radial distribution function.
-    """
-
-    if r_max is None:
-        r_max = np.max(np.linalg.norm(coordinates - coordinates[0], axis=1))
-
-    # Calculate pairwise distances
-    distances = np.sqrt(
-        np.sum((coordinates[:, np.newaxis] - coordinates) ** 2, axis=-1)
-    )
-
-    # Create histogram
-    hist, bin_edges = np.histogram(distances, bins=bins, range=(0, r_max))
-
-    # Calculate bin centers and RDF
-    bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-    rdf = hist / (4 * np.pi * bin_centers**2 * (r_max / bins))
-
-    # Remove the first bin because it is always 0
-    bin_centers = bin_centers[1:]
-    rdf = rdf[1:]
-
-    # Normalize RDF
-    rdf /= np.sum(rdf)
-
-    return bin_centers, rdf
-
-
-def plot_radial_distribution_function(args):
-    """Plots the radial distribution function of a structure"""
+def plot_rdf(curves, args):
+    """Plots (name, bin centers, g(r), standard error or None) curves of radial distribution functions"""
     import plotly.graph_objects as go
-    from pymatgen.core import Structure
 
-    coords = Structure.from_file(args.input).cart_coords
-    bin_centers, rdf = calculate_rdf(coords)
-
-    # Plot RDF
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=bin_centers, y=rdf, mode="lines"))
+    for name, bin_centers, rdf, error in curves:
+        error_y = None if error is None else dict(type="data", array=error, visible=True, thickness=0.5)
+        fig.add_trace(go.Scatter(x=bin_centers, y=rdf, error_y=error_y, mode="lines", name=name))
+
     fig.update_layout(
         title="Radial distribution function",
         xaxis_title="Distance (Å)",
-        yaxis_title="RDF",
+        yaxis_title="g(r)",
         template="plotly_white",
     )
 
@@ -248,37 +207,53 @@ def plot_radial_distribution_function(args):
         fig.write_image(args.output)
 
 
+def structure_curves(structures, args):
+    """Returns the curves of the (partial) radial distribution functions of structures"""
+    from vsh.utils.structure_tools import structure_rdf
+
+    curves = []
+    for structure in structures:
+        bin_centers, rdfs = structure_rdf(structure, args.bins, args.rmax, args.partial)
+        for label, rdf in rdfs.items():
+            name = f"{structure.formula} {label}" if args.partial else label
+            curves.append((name, bin_centers, rdf, None))
+
+    return curves
+
+
+def plot_radial_distribution_function(args):
+    """Plots the radial distribution function of a structure"""
+    from pymatgen.core import Structure
+
+    plot_rdf(structure_curves([Structure.from_file(args.input)], args), args)
+
+
 def compare_rdf(args):
     """Compares the radial distribution function of two structures"""
-    import plotly.graph_objects as go
     from pymatgen.core import Structure
 
     structures = [Structure.from_file(args.input)]
     for file in args.compare:
         structures.append(Structure.from_file(file))
 
-    fig = go.Figure()
-    for structure in structures:
-        coords = structure.cart_coords
-        bin_centers, rdf = calculate_rdf(coords)
+    plot_rdf(structure_curves(structures, args), args)
 
-        # Plot RDF
-        fig.add_trace(
-            go.Scatter(x=bin_centers, y=rdf, mode="lines", name=structure.formula)
-        )
 
-    fig.update_layout(
-        title="Radial distribution function",
-        xaxis_title="Distance (Å)",
-        yaxis_title="RDF",
-        template="plotly_white",
+def plot_trajectory_rdf(args):
+    """Plots the radial distribution function averaged over the frames of an XDATCAR or vasprun.xml"""
+    from vsh.utils.structure_tools import trajectory_rdf
+
+    bin_centers, rdfs = trajectory_rdf(
+        args.input, args.bins, args.rmax, args.partial, args.stride, args.jobs
     )
+    name = os.path.basename(args.input)
+    curves = [
+        (name if label == "total" else label, bin_centers, rdf, error)
+        for label, (rdf, error) in rdfs.items()
+    ]
 
-    if not args.output:
-        fig.show()
+    plot_rdf(curves, args)
 
-    else:
-        fig.write_image(args.output)
 
 def get_symmetry_operations(file: str):
     """Returns the symmetry operations of a POSCAR or CONTCAR file."""
@@ -317,6 +292,7 @@ def run(args):
         "box": boxed_molecule,
         "rdf": plot_radial_distribution_function,
         "compare": compare_rdf,
+        "trajectory": plot_trajectory_rdf,
         "symops": print_symmetry_operations,
     }
 
@@ -1,15 +1,12 @@
-import itertools
+import json
 import logging
+import os
 import pickle
+from dataclasses import dataclass
 
 import numpy as np
 import pandas as pd
 
-import plotly.express as px
-import plotly.graph_objects as go
-
-logging.basicConfig(level=logging.DEBUG)
-
 orbital_dict = {
     "s": 0,
     "p_y": 1,
@@ -52,97 +49,257 @@ def read_procar_with_pyprocar(
     return Procar(procar_path, efermi=efermi)
 
 
+AXES = ["Spin", "Kpoint", "Band", "Ion", "Orbital"]
+
+# layout of the .vsh projected eigenvalue cache
+CACHE_VERSION = 1
+CACHE_BAND_CHUNK = 64
+
+
+def compact_integer_dtype(size: int) -> np.dtype:
+    """Returns the smallest signed integer dtype that can index an axis of the given size"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if size <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+
+    return np.dtype(np.int64)
+
+
+def axis_labels(size: int) -> np.ndarray:
+    """Returns 0 based labels for an axis using a compact integer dtype"""
+    return np.arange(size, dtype=compact_integer_dtype(size))
+
+
+def index_columns(index: dict) -> dict:
+    """Builds flattened (C ordered) index columns from the labels of every axis of an array"""
+    shape = tuple(len(labels) for labels in index.values())
+    columns = {}
+    for axis, (column, labels) in enumerate(index.items()):
+        axis_shape = [1] * len(shape)
+        axis_shape[axis] = len(labels)
+        labels = np.asarray(labels)
+        labels = labels.astype(compact_integer_dtype(labels.max(initial=0)), copy=False)
+        columns[column] = np.broadcast_to(labels.reshape(axis_shape), shape).ravel()
+
+    return columns
+
+
+def array_to_dataframe(values: np.ndarray, index: dict, name: str = "Value") -> pd.DataFrame:
+    """Creates a long-form dataframe from an ndarray and the labels of each of its axes"""
+    columns = index_columns(index)
+    columns[name] = np.asarray(values).ravel()
+
+    return pd.DataFrame(columns, copy=False)
+
+
 def dict_to_dataframe(projected_eigenvalues: dict) -> pd.DataFrame:
     """Creates a pandas dataframe from the projected eigenvalues dict"""
 
-    columns = ["Spin", "Kpoint", "Band", "Ion", "Orbital", "Value"]
-    data = projected_eigenvalues
-    # Get all possible entries using itertools
-    value_dictionaries = []
-    for spin_index, spin in enumerate(data.values()):
-        logging.info(f"Processing spin {spin_index}")
-        nkpoints, nbands, nions, norbitals = np.shape(spin)
-        logging.info(
-            f"nkpoints: {nkpoints}, nbands: {nbands}, nions: {nions}, norbitals: {norbitals}"
+    # format is [spin][kpoint index][band index][atom index][orbital_index]
+    data = np.stack([np.asarray(spin) for spin in projected_eigenvalues.values()])
+    logging.info(
+        "nspins: {}, nkpoints: {}, nbands: {}, nions: {}, norbitals: {}".format(
+            *data.shape
         )
-        all_entries = list(
-            itertools.product(
-                *[range(nkpoints), range(nbands), range(nions), range(norbitals)]
-            )
-        )
-        for entry in all_entries:
-            kpoint_index, band_index, ion_index, orbital_index = entry
-            value = spin[kpoint_index][band_index][ion_index][orbital_index]
-            value_dict = dict(
-                zip(
-                    columns,
-                    [
-                        spin_index,
-                        kpoint_index,
-                        band_index,
-                        ion_index,
-                        orbital_index,
-                        value,
-                    ],
-                )
-            )
-            value_dictionaries.append(value_dict)
+    )
 
-    df = pd.DataFrame(value_dictionaries)
+    index = {column: axis_labels(size) for column, size in zip(AXES, data.shape)}
 
-    return df
+    return array_to_dataframe(data, index)
 
 
-def eigenvalues_from_vasprun(file: str) -> pd.DataFrame:
-    """Gets eigenvalues and fermi energy from vasprun.xml file"""
-    from pymatgen.io.vasp import Vasprun
-
-    vasprun = Vasprun(
-        filename=file,
-        parse_potcar_file=False,
-        parse_projected_eigen=False,
-        parse_dos=False,
-        parse_eigen=True,
-    )
-    eigenvalues = vasprun.eigenvalues
-
-    eigenvalues_list = [spin for spin in eigenvalues.values()]
-
-    value_dictionaries = []
-    for spin_index, spin in enumerate(eigenvalues_list):
-        logging.info(f"Processing spin {spin_index}")
-        nkpoints, nbands, _ = np.shape(spin)
-        logging.info(f"nkpoints: {nkpoints}, nbands: {nbands}")
-        all_entries = list(itertools.product(*[range(nkpoints), range(nbands)]))
-        logging.info(f"Dim of all_entries: {np.shape(all_entries)}")
-        for entry in all_entries:
-            kpoint_index, band_index = entry
-            energy = spin[kpoint_index][band_index][0]
-            occupation = spin[kpoint_index][band_index][1]
-            value_dict = dict(
-                zip(
-                    ["Spin", "Kpoint", "Band", "Energy", "Occupation"],
-                    [spin_index, kpoint_index, band_index, energy, occupation],
-                )
-            )
-            value_dictionaries.append(value_dict)
+def eigenvalues_to_dataframe(eigenvalues: dict) -> pd.DataFrame:
+    """Creates a pandas dataframe from the eigenvalues dict"""
+
+    # format is [spin][kpoint index][band index][energy, occupation]
+    data = np.stack([np.asarray(spin) for spin in eigenvalues.values()])
+    logging.info("nspins: {}, nkpoints: {}, nbands: {}".format(*data.shape[:3]))
 
-    df = pd.DataFrame(value_dictionaries)
+    index = {column: axis_labels(size) for column, size in zip(AXES, data.shape[:3])}
+    df = array_to_dataframe(data[..., 0], index, name="Energy")
+    df["Occupation"] = data[..., 1].ravel()
 
     return df
 
 
-def projected_eigenvals_from_vasprun(file: str) -> pd.DataFrame:
-    from pymatgen.io.vasp import Vasprun
+@dataclass
+class ProjectedBands:
+    """Dense projected eigenvalues with a long-form dataframe view on demand
+
+    projections has the shape (spin, kpoint, band, ion, orbital) while energies and
+    occupations have the shape (spin, kpoint, band). index holds the labels of each
+    axis (keyed by the dataframe column name) so that selections keep their original
+    0 based indices. The remaining fields are optional metadata that follow selections.
+    """
+
+    projections: np.ndarray
+    energies: np.ndarray
+    occupations: np.ndarray
+    index: dict = None
+    kpoints: np.ndarray = None
+    weights: np.ndarray = None
+    orbitals: list[str] = None
+    symbols: list[str] = None
+    efermi: float = None
+
+    def __post_init__(self):
+        if self.index is None:
+            self.index = {
+                column: axis_labels(size)
+                for column, size in zip(AXES, self.projections.shape)
+            }
+
+    @property
+    def shape(self) -> dict:
+        """Number of entries along each axis"""
+        return {column: len(labels) for column, labels in self.index.items()}
+
+    @classmethod
+    def from_vasprun(cls, file: str) -> "ProjectedBands":
+        """Reads eigenvalues and projected eigenvalues from a single streaming vasprun.xml parse"""
+        from vsh.utils.vasprun_tools import read_projected_eigenvalues
+
+        data = read_projected_eigenvalues(file)
+
+        return cls(
+            data["projections"],
+            data["energies"],
+            data["occupations"],
+            kpoints=data["kpoints"],
+            weights=data["weights"],
+            orbitals=data["orbitals"],
+            symbols=data["symbols"],
+            efermi=data["efermi"],
+        )
 
+    @classmethod
+    def from_dataframe(cls, dataframe: pd.DataFrame) -> "ProjectedBands":
+        """
+        Creates a dense store from a long-form (possibly filtered) dataframe.
+
+        Combinations of labels missing from a dataframe filtered by value are NaN in the store,
+        they are ignored by reduce and left out of to_dataframe.
+        """
+        index = {column: np.unique(dataframe[column].to_numpy()) for column in AXES}
+        positions = tuple(
+            np.searchsorted(index[column], dataframe[column].to_numpy())
+            for column in AXES
+        )
+        shape = tuple(len(labels) for labels in index.values())
+
+        projections = np.full(shape, np.nan)
+        projections[positions] = dataframe["Value"].to_numpy()
+        energies = np.full(shape[:3], np.nan)
+        energies[positions[:3]] = dataframe["Energy"].to_numpy()
+        occupations = np.full(shape[:3], np.nan)
+        occupations[positions[:3]] = dataframe["Occupation"].to_numpy()
+
+        return cls(projections, energies, occupations, index)
+
+    def select(self, selection: dict) -> "ProjectedBands":
+        """Slices the store by axis labels, e.g. {"Band": 3, "Ion": [0, 1]}"""
+        projections, energies, occupations = (
+            self.projections,
+            self.energies,
+            self.occupations,
+        )
+        index = dict(self.index)
+        metadata = {
+            "kpoints": self.kpoints,
+            "weights": self.weights,
+            "orbitals": self.orbitals,
+            "symbols": self.symbols,
+        }
+        # metadata that is indexed by an axis
+        axis_metadata = {
+            "Kpoint": ["kpoints", "weights"],
+            "Ion": ["symbols"],
+            "Orbital": ["orbitals"],
+        }
+
+        for axis, column in enumerate(AXES):
+            labels = selection.get(column)
+            if labels is None:
+                continue
+
+            positions = np.flatnonzero(np.isin(index[column], labels))
+            index[column] = index[column][positions]
+            projections = projections.take(positions, axis=axis)
+            if axis < 3:
+                energies = energies.take(positions, axis=axis)
+                occupations = occupations.take(positions, axis=axis)
+
+            for name in axis_metadata.get(column, []):
+                values = metadata[name]
+                if isinstance(values, list):
+                    metadata[name] = [values[position] for position in positions]
+                elif values is not None:
+                    metadata[name] = values[positions]
+
+        return ProjectedBands(
+            projections, energies, occupations, index, efermi=self.efermi, **metadata
+        )
+
+    def reduce(self, columns: list[str]) -> tuple[np.ndarray, dict]:
+        """Sums the projections over the given axes and returns the remaining labels"""
+        axes = tuple(AXES.index(column) for column in columns)
+        values = np.nansum(self.projections, axis=axes)
+        index = {
+            column: labels
+            for column, labels in self.index.items()
+            if column not in columns
+        }
+
+        return values, index
+
+    def eigenvalues_dataframe(self) -> pd.DataFrame:
+        """Long-form dataframe of the energies and occupations"""
+        index = {column: self.index[column] for column in AXES[:3]}
+        df = array_to_dataframe(self.energies, index, name="Energy")
+        df["Occupation"] = self.occupations.ravel()
+
+        return df
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Long-form dataframe identical to merging the eigenvalues with the projections"""
+        shape = self.projections.shape
+        columns = index_columns(self.index)
+        values = {
+            "Spin": columns["Spin"],
+            "Kpoint": columns["Kpoint"],
+            "Band": columns["Band"],
+            "Energy": np.broadcast_to(self.energies[..., None, None], shape).ravel(),
+            "Occupation": np.broadcast_to(
+                self.occupations[..., None, None], shape
+            ).ravel(),
+            "Ion": columns["Ion"],
+            "Orbital": columns["Orbital"],
+            "Value": self.projections.ravel(),
+        }
+        df = pd.DataFrame(values, copy=False)
+
+        # rows missing from the dataframe the store was created from
+        missing = np.isnan(values["Value"])
+        if missing.any():
+            df = df[~missing].reset_index(drop=True)
+
+        return df
+
+
+def eigenvalues_from_vasprun(file: str) -> pd.DataFrame:
+    """Gets eigenvalues and fermi energy from vasprun.xml file"""
+    return load_eigenvalues(file).eigenvalues_dataframe()
+
+
+def projected_eigenvals_from_vasprun(file: str) -> pd.DataFrame:
     """Creates a band structure object from vasprun.xml file"""
+    from vsh.utils.vasprun_tools import read_projected_eigenvalues
+
     # format is [spin][kpoint index][band index][atom index][orbital_index]. The kpoint, band and atom indices are 0-based (unlike the 1-based indexing in VASP).
-    vasprun = Vasprun(
-        filename=file, parse_potcar_file=False, parse_projected_eigen=True
-    )
-    projected_values = dict_to_dataframe(vasprun.projected_eigenvalues)
+    projections = read_projected_eigenvalues(file)["projections"]
+    index = {column: axis_labels(size) for column, size in zip(AXES, projections.shape)}
 
-    return projected_values
+    return array_to_dataframe(projections, index)
 
 
 def merge_eigenvalues(
@@ -171,6 +328,122 @@ def save_eigenvals(projected_eigenvalues: pd.DataFrame, filename: str) -> None:
     return None
 
 
+def write_projected_cache(bands: ProjectedBands, path: str) -> None:
+    """
+    Writes projected eigenvalues to a columnar .vsh cache directory.
+
+    Projections are chunked by spin and blocks of CACHE_BAND_CHUNK bands, each chunk is stored as a
+    (band, kpoint, ion, orbital) .npy file so that single bands are contiguous on disk. Energies,
+    occupations, kpoint coordinates and weights are stored as separate .npy files and the remaining
+    metadata in metadata.json.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    nbands = bands.projections.shape[2]
+    for spin in range(bands.projections.shape[0]):
+        for chunk, start in enumerate(range(0, nbands, CACHE_BAND_CHUNK)):
+            block = bands.projections[spin, :, start : start + CACHE_BAND_CHUNK]
+            np.save(
+                os.path.join(path, f"projections_{spin}_{chunk}.npy"),
+                np.ascontiguousarray(block.transpose(1, 0, 2, 3)),
+            )
+
+    np.save(os.path.join(path, "energies.npy"), bands.energies)
+    np.save(os.path.join(path, "occupations.npy"), bands.occupations)
+    for name in ["kpoints", "weights"]:
+        if getattr(bands, name) is not None:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(bands, name))
+
+    metadata = {
+        "version": CACHE_VERSION,
+        "band_chunk": CACHE_BAND_CHUNK,
+        "shape": bands.shape,
+        "index": {column: labels.tolist() for column, labels in bands.index.items()},
+        "orbitals": bands.orbitals,
+        "symbols": bands.symbols,
+        "efermi": bands.efermi,
+    }
+    with open(os.path.join(path, "metadata.json"), "w") as file:
+        json.dump(metadata, file, indent=4)
+
+    return None
+
+
+def read_projected_cache(path: str, selection: dict = None) -> ProjectedBands:
+    """
+    Reads projected eigenvalues from a .vsh cache directory.
+
+    Only the chunks holding the selected spins and bands are opened, and they are memory mapped so
+    that only the selected kpoints, ions, and orbitals are read from disk.
+    """
+    selection = selection or {}
+    with open(os.path.join(path, "metadata.json"), "r") as file:
+        metadata = json.load(file)
+
+    if metadata["version"] != CACHE_VERSION:
+        raise Exception(
+            f"Unsupported cache version {metadata['version']}. Please regenerate the cache."
+        )
+
+    index = {column: np.asarray(labels) for column, labels in metadata["index"].items()}
+    positions = {}
+    for column in AXES:
+        labels = selection.get(column)
+        if labels is None:
+            positions[column] = np.arange(len(index[column]))
+        else:
+            positions[column] = np.flatnonzero(np.isin(index[column], labels))
+        index[column] = index[column][positions[column]]
+
+    spins, kpoints, bands, ions, orbitals = (positions[column] for column in AXES)
+    eigenvalue_slice = np.ix_(spins, kpoints, bands)
+    energies = np.load(os.path.join(path, "energies.npy"), mmap_mode="r")
+    occupations = np.load(os.path.join(path, "occupations.npy"), mmap_mode="r")
+
+    projections = None
+    band_chunk = metadata["band_chunk"]
+    chunks = bands // band_chunk
+    for spin_position, spin in enumerate(spins):
+        for chunk in np.unique(chunks):
+            block = np.load(
+                os.path.join(path, f"projections_{spin}_{chunk}.npy"), mmap_mode="r"
+            )
+            if projections is None:
+                projections = np.empty(
+                    (len(spins), len(kpoints), len(bands), len(ions), len(orbitals)),
+                    dtype=block.dtype,
+                )
+            in_chunk = chunks == chunk
+            local_bands = bands[in_chunk] - chunk * band_chunk
+            values = block[np.ix_(local_bands, kpoints, ions, orbitals)]
+            projections[spin_position][:, in_chunk] = values.transpose(1, 0, 2, 3)
+
+    if projections is None:
+        projections = np.empty((len(spins), len(kpoints), 0, len(ions), len(orbitals)))
+
+    optional = {}
+    for name in ["kpoints", "weights"]:
+        file = os.path.join(path, f"{name}.npy")
+        optional[name] = np.load(file)[kpoints] if os.path.isfile(file) else None
+    for name, axis_positions in [("orbitals", orbitals), ("symbols", ions)]:
+        values = metadata[name]
+        optional[name] = None if values is None else [values[p] for p in axis_positions]
+
+    return ProjectedBands(
+        projections,
+        np.asarray(energies[eigenvalue_slice]),
+        np.asarray(occupations[eigenvalue_slice]),
+        index,
+        efermi=metadata["efermi"],
+        **optional,
+    )
+
+
+def is_projected_cache(file: str) -> bool:
+    """Checks if a path is a .vsh cache directory"""
+    return file.rstrip("/").endswith(".vsh")
+
+
 def parse_query_input(query: dict):
     """Formats query to be compatible with Pandas"""
 
@@ -198,22 +471,81 @@ def query_data(data: pd.DataFrame, query_dict: dict):
     """Allows querying the data from the command line"""
     query = parse_query_input(query_dict)
 
+    if not query:
+        return data
+
     result = data.query(query)
     return result
 
 
+def load_projected_bands(file: str, selection: dict = None) -> ProjectedBands:
+    """Loads a dense projected eigenvalue store from a vasprun.xml, pickle file, or .vsh cache
+
+    Caches only read the chunks touched by the selection, other formats are loaded in full and then sliced.
+    """
+    if is_projected_cache(file):
+        return read_projected_cache(file, selection)
+
+    elif file.endswith(".xml"):
+        from vsh.utils.cache import cached_parse
+
+        bands = cached_parse(file, "projected_bands", ProjectedBands.from_vasprun)
+
+    elif file.endswith(".pkl"):
+        bands = ProjectedBands.from_dataframe(projected_eigenvalues_from_pickle(file))
+
+    else:
+        raise Exception(
+            "Unrecognized file extension. Please provide either an XML, a pickle file, or a .vsh cache."
+        )
+
+    return bands.select(selection) if selection else bands
+
+
+def load_eigenvalues(file: str) -> ProjectedBands:
+    """Loads only the energies and occupations (the store has no ions or orbitals)"""
+    if is_projected_cache(file):
+        return read_projected_cache(file, {"Ion": [], "Orbital": []})
+
+    elif file.endswith(".xml"):
+        from vsh.utils.cache import cached_parse
+        from vsh.utils.vasprun_tools import read_projected_eigenvalues
+
+        data = cached_parse(
+            file, "eigenvalues", read_projected_eigenvalues, projected=False
+        )
+        return ProjectedBands(
+            np.empty((*data["energies"].shape, 0, 0)),
+            data["energies"],
+            data["occupations"],
+            kpoints=data["kpoints"],
+            weights=data["weights"],
+            efermi=data["efermi"],
+        )
+
+    return load_projected_bands(file).select({"Ion": [], "Orbital": []})
+
+
+def save_projected_bands(bands: ProjectedBands, output: str) -> None:
+    """Saves projected eigenvalues to a .vsh cache or as a pickled dataframe"""
+    if is_projected_cache(output):
+        write_projected_cache(bands, output)
+    else:
+        save_eigenvals(bands.to_dataframe(), output)
+
+    return None
+
+
 def load_dataframe_from_file(file: str):
-    # load in the data, check if it is either xml or pkl
-    if file.endswith(".xml"):
-        projected_eigenvals = projected_eigenvals_from_vasprun(file)
-        eigenvals = eigenvalues_from_vasprun(file)
-        data = merge_eigenvalues(eigenvals, projected_eigenvals)
+    # load in the data, check if it is either xml, pkl, or a .vsh cache
+    if file.endswith(".xml") or is_projected_cache(file):
+        data = load_projected_bands(file).to_dataframe()
 
     elif file.endswith(".pkl"):
         data = projected_eigenvalues_from_pickle(file)
     else:
         raise Exception(
-            "Unrecognized file extension. Please provide either an XML or a pickle file."
+            "Unrecognized file extension. Please provide either an XML, a pickle file, or a .vsh cache."
         )
 
     return data
@@ -250,16 +582,11 @@ def filter_bands_by_index(dataframe: pd.DataFrame, index_min: int, index_max: in
     return filtered_dataframe
 
 
-def get_kpoint_data(file: str, kpoint: int, band: int):
-    """Summarizes the data for a specific kpoint"""
-    dataframe = load_dataframe_from_file(file)
-
-    kpoint_data = dataframe[
-        (dataframe["Kpoint"] == int(kpoint)) & (dataframe["Band"] == int(band))
-    ]
-    kpoint_data = (
-        kpoint_data.groupby(["Spin", "Kpoint", "Band", "Orbital"]).sum().reset_index()
-    )
+def kpoint_data(bands: ProjectedBands, kpoint: int, band: int) -> pd.DataFrame:
+    """Orbital resolved projections (summed over ions) of a band at a specific kpoint"""
+    selected = bands.select({"Kpoint": int(kpoint), "Band": int(band)})
+    values, index = selected.reduce(["Ion"])
+    kpoint_data = array_to_dataframe(values, index)
 
     # convert "value" to "percent" wrt to orbitals
     kpoint_data["Percent"] = kpoint_data["Value"] / kpoint_data["Value"].sum() * 100
@@ -267,6 +594,13 @@ def get_kpoint_data(file: str, kpoint: int, band: int):
     return kpoint_data
 
 
+def get_kpoint_data(file: str, kpoint: int, band: int):
+    """Summarizes the data for a specific kpoint"""
+    selection = {"Kpoint": int(kpoint), "Band": int(band)}
+
+    return kpoint_data(load_projected_bands(file, selection), kpoint, band)
+
+
 def add_orbital_sum(dataframe: pd.DataFrame, orbitals: list[int], label: str):
     """Adds a new entry that is the sum of the Percent of entries with the same Kpoint, Band, and Spin, but only if Orbital is 1 or 3"""
 
@@ -282,38 +616,35 @@ def add_orbital_sum(dataframe: pd.DataFrame, orbitals: list[int], label: str):
     return dataframe
 
 
-def get_kpoint_orbital_variation(file: str, band: int, ions: list[int] = None):
-    """Plots the orbital variation within a band"""
+def kpoint_orbital_variation(
+    bands: ProjectedBands, band: int, ions: list[int] = None
+) -> pd.DataFrame:
+    """Orbital resolved projections (summed over ions) of a band at every kpoint"""
+    selected = bands.select({"Band": int(band), "Ion": ions or None})
+    values, index = selected.reduce(["Ion"])
 
-    dataframe = load_dataframe_from_file(file)
-    dataframe = dataframe[dataframe["Band"] == int(band)]
+    return array_to_dataframe(values, index)
 
-    if ions:
-        dataframe = dataframe[dataframe["Ion"].isin(ions)]
 
-    dataframe = (
-        dataframe.groupby(["Spin", "Kpoint", "Band", "Orbital"]).sum().reset_index()
-    )
+def get_kpoint_orbital_variation(file: str, band: int, ions: list[int] = None):
+    """Plots the orbital variation within a band"""
+    selection = {"Band": int(band), "Ion": ions or None}
 
-    return dataframe
+    return kpoint_orbital_variation(load_projected_bands(file, selection), band, ions)
 
 
 def calculate_absolute_charge_spilling(dataframe: pd.DataFrame):
     # finds the charge spilling for each kpoint
-    kpoints = dataframe["Kpoint"].unique()
-    sum_values = []
-    for kpoint in kpoints:
-        kpoint_data = dataframe[dataframe["Kpoint"] == int(kpoint)]
-        sum_values.append(kpoint_data["Value"].sum())
+    sum_values = dataframe.groupby("Kpoint")["Value"].sum()
+    kpoints = sum_values.index.to_numpy()
 
     # sum values should be 1 - the sum of the absolute charge spilling
-    sum_values = [1 - value for value in sum_values]
+    sum_values = list(1 - sum_values.to_numpy())
 
     return kpoints, sum_values
 
 
 def plot_kpoint_orbital_variation(args):
-    dataframe = load_dataframe_from_file(args.input)
     dataframe = get_kpoint_orbital_variation(args.input, args.band, args.ions)
     kpoints, sum_values = calculate_absolute_charge_spilling(dataframe)
     dataframe = add_orbital_sum(dataframe, [1, 3], label="Psum")
@@ -395,28 +726,37 @@ def parse_structure_file(file: str):
         )
 
 
-def get_compositional_variation(file: str, band: int):
-    """Get compositional variation of a band"""
-    dataframe = load_dataframe_from_file(file)
-    dataframe = dataframe[dataframe["Band"] == int(band)]
-    dataframe = dataframe.groupby(["Spin", "Kpoint", "Band", "Ion"]).sum().reset_index()
-
-    for kpoint in dataframe["Kpoint"].unique():
-        kpoint_data = dataframe[dataframe["Kpoint"] == int(kpoint)]
-        dataframe.loc[dataframe["Kpoint"] == int(kpoint), "Percent"] = (
-            kpoint_data["Value"] / kpoint_data["Value"].sum() * 100
-        )
+def compositional_variation(bands: ProjectedBands, band: int) -> pd.DataFrame:
+    """Ion resolved projections (summed over orbitals) of a band at every kpoint"""
+    selected = bands.select({"Band": int(band)})
+    values, index = selected.reduce(["Orbital"])
+
+    # percent of each ion wrt to the total projection at each kpoint
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = values / values.sum(axis=(0, 3), keepdims=True) * 100
+
+    dataframe = array_to_dataframe(values, index)
+    dataframe["Percent"] = percent.ravel()
 
     return dataframe
 
 
+def get_compositional_variation(file: str, band: int):
+    """Get compositional variation of a band"""
+    bands = load_projected_bands(file, {"Band": int(band)})
+
+    return compositional_variation(bands, band)
+
 
 def plot_compositional_variation(args):
     """Plots the compositional variation of a band"""
+    import plotly.express as px
+    import plotly.graph_objects as go
 
+    bands = load_projected_bands(args.input, {"Band": args.bands})
     dfs = []
     for band in args.bands:
-        dataframe = get_compositional_variation(args.input, band)
+        dataframe = compositional_variation(bands, band)
         dfs.append(dataframe)
     dataframe = pd.concat(dfs)
     atom_df = parse_structure_file(args.structure)
@@ -479,7 +819,7 @@ def analyze_kpoint(args):
 def plot_bands(args):
     import plotly.graph_objects as go
 
-    data = load_dataframe_from_file(args.input)
+    data = load_eigenvalues(args.input).eigenvalues_dataframe()
     data = data[["Band", "Kpoint", "Energy"]]
     data["Energy"] = data["Energy"] - args.efermi
 
@@ -525,9 +865,15 @@ def create_query_dict(args) -> dict:
 
 
 def run_query(args):
-    data = load_dataframe_from_file(args.input)
     query_dict = create_query_dict(args)
 
+    # index columns are answered by slicing, the rest are queried on the result
+    selection = {column: query_dict.pop(column) for column in AXES}
+    selection["Spin"] = int(args.spin) if args.spin is not None else None
+    selection["Ion"] = args.ions or None
+    selection["Orbital"] = int(args.orbital) if args.orbital is not None else None
+    data = load_projected_bands(args.input, selection).to_dataframe()
+
     if args.efermi:
         data["Energy"] = data["Energy"] - args.efermi
 
@@ -541,12 +887,16 @@ def run_query(args):
 
 def describe_procar(args):
     """Briefly describes the PROCAR file"""
-    dataframe = load_dataframe_from_file(args.input)
-    unique_spins = dataframe["Spin"].nunique()
-    unique_kpoints = dataframe["Kpoint"].nunique()
-    unique_bands = dataframe["Band"].nunique()
-    unique_ions = dataframe["Ion"].nunique()
-    unique_orbitals = dataframe["Orbital"].nunique()
+    if is_projected_cache(args.input):
+        with open(os.path.join(args.input, "metadata.json"), "r") as file:
+            shape = json.load(file)["shape"]
+    else:
+        shape = load_projected_bands(args.input).shape
+    unique_spins = shape["Spin"]
+    unique_kpoints = shape["Kpoint"]
+    unique_bands = shape["Band"]
+    unique_ions = shape["Ion"]
+    unique_orbitals = shape["Orbital"]
 
     print(f"Number of unique Spins: {unique_spins}")
     print(f"Number of unique Kpoints: {unique_kpoints}")
@@ -558,34 +908,55 @@ def describe_procar(args):
 
 
 def pickle_procar(args):
-    if args.input.endswith(".pkl"):
+    # any readable format can be converted to a .vsh cache
+    if args.input.endswith(".pkl") and not (args.output and is_projected_cache(args.output)):
         raise Exception("Cannot pickle a pickle")
 
-    projected_eigenvals = projected_eigenvals_from_vasprun(args.input)
-    eigenvals = eigenvalues_from_vasprun(args.input)
-    dataframe = merge_eigenvalues(eigenvals, projected_eigenvals)
+    bands = load_projected_bands(args.input)
 
     if args.output:
-        save_eigenvals(dataframe, args.output)
+        save_projected_bands(bands, args.output)
     else:
-        print(dataframe.describe())
+        print(bands.to_dataframe().describe())
+
+
+def bands_within_energy_range(
+    bands: ProjectedBands, emin: float, emax: float
+) -> np.ndarray:
+    """Labels of the bands that lie within the energy range at every kpoint"""
+    within = (bands.energies >= emin) & (bands.energies <= emax)
+    complete = within.any(axis=0).all(axis=0)
+
+    return bands.index["Band"][complete]
+
+
+def filter_projected_bands_by_energy(file: str, erange: list[float]) -> ProjectedBands:
+    """Keeps only the bands that lie within the energy range"""
+    if is_projected_cache(file):
+        # decide on the bands from the energies before reading any projections
+        selected = bands_within_energy_range(
+            load_eigenvalues(file), min(erange), max(erange)
+        )
+        return load_projected_bands(file, {"Band": selected})
+
+    bands = load_projected_bands(file)
+    selected = bands_within_energy_range(bands, min(erange), max(erange))
+
+    return bands.select({"Band": selected})
 
 
 def filter_pickle_data_by_energy(pickle_file: str, erange: list[float]) -> pd.DataFrame:
     """Updates the pickle file to include only the specified query"""
-    dataframe = load_dataframe_from_file(pickle_file)
-    dataframe = filter_bands_by_energy(dataframe, min(erange), max(erange))
-
-    return dataframe
+    return filter_projected_bands_by_energy(pickle_file, erange).to_dataframe()
 
 
 def filter_pickle(args):
-    dataframe = filter_pickle_data_by_energy(args.input, args.erange)
+    bands = filter_projected_bands_by_energy(args.input, args.erange)
 
     if args.output:
-        save_eigenvals(dataframe, args.output)
+        save_projected_bands(bands, args.output)
     else:
-        print(dataframe)
+        print(bands.to_dataframe())
 
 
 def run(args):
@@ -1,16 +1,25 @@
+import json
+import os
+
 import matplotlib.animation as animation
 import numpy as np
 from matplotlib import pyplot as plt
 from pymatgen.io.common import VolumetricData
-from pymatgen.io.vasp import Chgcar
+
+from vsh.utils.chgcar_tools import cached_chgcar
+from vsh.utils.stm_tools import (
+    constant_current_image,
+    constant_height_image,
+    format_stm_plot,
+)
 
 
 def get_charge_density_from_chgcar(file: str) -> np.array:
     """Returns the data from a CHGCAR file"""
-    chgcar = Chgcar.from_file(file)
-    data = chgcar.data["total"]
-    dims = chgcar.dim
-    structure = chgcar.structure
+    poscar, grids = cached_chgcar(file, magnetization=False)
+    data = grids["total"]
+    dims = data.shape
+    structure = poscar.structure
     return data, dims, structure
 
 
@@ -69,48 +78,345 @@ def plot_charge_density_slice(
         plt.show()
 
 
+def frame_indices(
+    nz: int, c: float, zrange: list[float] | None = None, stride: int = 1
+) -> np.ndarray:
+    """Returns every stride-th z plane of a grid between the heights of zrange (the whole cell by default)"""
+    zmin, zmax = zrange or (0.0, c)
+    lowest = max(0, int(np.ceil(zmin / c * nz)))
+    highest = min(nz - 1, int(np.floor(zmax / c * nz)))
+    indices = np.arange(lowest, highest + 1, stride)
+    if not len(indices):
+        raise ValueError(f"No grid planes between {zmin} and {zmax}")
+
+    return indices
+
+
+def slice_figure(
+    data: np.ndarray,
+    structure: "Structure",
+    repeat_x: int = 1,
+    repeat_y: int = 1,
+    title: str = "Charge Density",
+    limits: tuple[float, float] | None = None,
+):
+    """Returns a figure of the z slices of a grid and a function that draws plane i on it"""
+    c, nz = structure.lattice.c, data.shape[2]
+    vmin, vmax = limits or (None, None)
+    fig, ax = plt.subplots()
+    im = ax.imshow(np.tile(data[:, :, 0], (repeat_y, repeat_x)), cmap="Greys_r", vmin=vmin, vmax=vmax)
+    ax.set_xlabel(r"x ($\mathrm{\AA}$)")
+    ax.set_ylabel(r"y ($\mathrm{\AA}$)")
+
+    def draw(i):
+        # only the current slice is tiled
+        im.set_array(np.tile(data[:, :, i], (repeat_y, repeat_x)))
+        ax.set_title(f"{title} (Height: {c * i / nz:.2f} Å)")
+        return [im]
+
+    return fig, draw
+
+
+def slice_frames(
+    data: np.ndarray,
+    structure: "Structure",
+    indices,
+    repeat_x: int = 1,
+    repeat_y: int = 1,
+    title: str = "Charge Density",
+    limits: tuple[float, float] | None = None,
+):
+    """Yields an RGB image of every z plane in indices"""
+    fig, draw = slice_figure(data, structure, repeat_x, repeat_y, title, limits)
+    for i in indices:
+        draw(i)
+        fig.canvas.draw()
+        yield np.asarray(fig.canvas.buffer_rgba())[..., :3].copy()
+
+    plt.close(fig)
+
+
+def render_frames(file: str, indices, repeat_x: int, repeat_y: int, title: str, limits) -> list[np.ndarray]:
+    """Reads a grid in a worker process and returns the frames of a block of z planes"""
+    plt.switch_backend("Agg")
+    data, _, structure = charge_density_from_file(file)
+
+    return list(slice_frames(data, structure, indices, repeat_x, repeat_y, title, limits))
+
+
+def write_animation(frames, output: str, fps: int = 5) -> None:
+    """
+    Writes RGB frames to a video or GIF as they arrive.
+
+    Frames are piped to ffmpeg if it is installed, otherwise the file is written with Pillow.
+    """
+    import shutil
+    import subprocess
+
+    frames = iter(frames)
+    first = next(frames)
+    height, width, _ = first.shape
+
+    if shutil.which("ffmpeg"):
+        command = ["ffmpeg", "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24"]
+        command += ["-s", f"{width}x{height}", "-r", str(fps), "-i", "-", output]
+        with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+            process.stdin.write(first.tobytes())
+            for frame in frames:
+                process.stdin.write(frame.tobytes())
+            process.stdin.close()
+        if process.returncode:
+            raise RuntimeError(f"ffmpeg failed to write {output}")
+        return None
+
+    from PIL import Image
+
+    Image.fromarray(first).save(
+        output,
+        save_all=True,
+        append_images=(Image.fromarray(frame) for frame in frames),
+        duration=1000 / fps,
+        loop=0,
+    )
+
+
 def animate_slices(
     file: str,
     repeat_x: int = 1,
     repeat_y: int = 1,
     title: str = "Charge Density",
     output: str | None = None,
+    zrange: list[float] | None = None,
+    stride: int = 1,
+    jobs: int = 1,
+    fps: int = 5,
 ) -> None:
-    """Animates slices of a CHGCAR file"""
+    """
+    Animates slices of a CHGCAR file.
+
+    Only the current slice is tiled, so memory does not grow with the repeats. Every stride-th
+    plane between the heights of zrange is drawn, all of them on one color scale. Saved frames
+    are rendered with the Agg backend, by jobs processes if more than one, and written as they
+    are rendered.
+    """
     data, dims, structure = charge_density_from_file(file)
-    total_length = structure.lattice.c
-    repeated_data = np.tile(data, (repeat_y, repeat_x, 1))
-    fig, ax = plt.subplots()
-    im = ax.imshow(repeated_data[:, :, 0], cmap="Greys_r")
-    plt.title(f"{title} (Height: 0.00 Å)")
-    plt.xlabel(r"x ($\mathrm{\AA}$)")
-    plt.ylabel(r"y ($\mathrm{\AA}$)")
+    indices = frame_indices(dims[2], structure.lattice.c, zrange, stride)
+    limits = (
+        min(data[:, :, i].min() for i in indices),
+        max(data[:, :, i].max() for i in indices),
+    )
 
-    def animate(i):
-        im.set_array(repeated_data[:, :, i])
-        plt.title(f"{title} (Height: {total_length * i / data.shape[2]:.2f} Å)")
-        return [im]
+    if not output:
+        fig, draw = slice_figure(data, structure, repeat_x, repeat_y, title, limits)
+        ani = animation.FuncAnimation(fig, draw, frames=indices, blit=False)
+        plt.show()
+        return None
+
+    plt.switch_backend("Agg")
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        blocks = np.array_split(indices, min(jobs, len(indices)))
+        with ProcessPoolExecutor(max_workers=len(blocks)) as executor:
+            results = executor.map(
+                render_frames,
+                *zip(*[(file, block, repeat_x, repeat_y, title, limits) for block in blocks]),
+            )
+            write_animation((frame for result in results for frame in result), output, fps)
+    else:
+        frames = slice_frames(data, structure, indices, repeat_x, repeat_y, title, limits)
+        write_animation(frames, output, fps)
 
-    ani = animation.FuncAnimation(fig, animate, frames=dims[2], blit=False)
+
+def simulate_stm(
+    file: str,
+    height: float | None = None,
+    isovalue: float | None = None,
+    zrange: list[float] | None = None,
+) -> tuple[np.ndarray, str, "Structure"]:
+    """
+    Returns a constant current image (tip heights) if an isovalue is given, else a constant
+    height image (densities), with its mode and the structure of the file.
+    """
+    data, _, structure = charge_density_from_file(file)
+    image, mode = stm_image_from_grid(data, structure, height, isovalue, zrange)
+
+    return image, mode, structure
+
+
+def stm_image_from_grid(
+    data: np.ndarray,
+    structure: "Structure",
+    height: float | None = None,
+    isovalue: float | None = None,
+    zrange: list[float] | None = None,
+) -> tuple[np.ndarray, str]:
+    """
+    Returns the STM image of a grid and its mode, see simulate_stm.
+
+    By default the tip of a constant current image starts at the top of the cell and searches
+    down to the highest atom.
+    """
+    c = structure.lattice.c
+
+    if isovalue is not None:
+        zmin, zmax = zrange or (structure.frac_coords[:, 2].max() * c, c)
+        return constant_current_image(data, c, isovalue, zmin, zmax), "current"
+
+    if height is None:
+        raise ValueError("Either a height (-H) or an isovalue (--isovalue) must be given")
+    if height < 0 or height > c:
+        raise ValueError(f"Invalid height: {height}. Height must be within the range [0, {c}].")
+
+    return constant_height_image(data, c, height), "height"
+
+
+def plot_stm_image(
+    image: np.ndarray,
+    mode: str,
+    structure: "Structure",
+    repeat_x: int = 1,
+    repeat_y: int = 1,
+    title: str = "Simulated STM",
+    output: str | None = None,
+) -> None:
+    """Plots an STM image with repeated images in the x and y directions, or saves it to a .npy file"""
+    if output and output.endswith(".npy"):
+        np.save(output, image)
+        return None
+
+    a, b = structure.lattice.abc[:2]
+    # rows of the image are x, imshow draws them along y
+    plt.imshow(
+        np.tile(image.T, (repeat_y, repeat_x)),
+        cmap="Greys_r",
+        origin="lower",
+        extent=[0, a * repeat_x, 0, b * repeat_y],
+    )
+    format_stm_plot(plt, title, mode)
 
     if output:
-        ani.save(output, writer="imagemagick", fps=5)
+        plt.savefig(output)
+        plt.close()
     else:
         plt.show()
 
 
+def render_stm_images(
+    file: str,
+    tasks: list[tuple[str, float]],
+    zrange: list[float] | None,
+    repeat_x: int,
+    repeat_y: int,
+    title: str,
+    directory: str,
+    index: int = 0,
+) -> list[dict]:
+    """Reads a grid once and renders its ("height" or "current", value) images, returns their records"""
+    plt.switch_backend("Agg")
+    data, _, structure = charge_density_from_file(file)
+
+    records = []
+    for mode, value in tasks:
+        height, isovalue = (value, None) if mode == "height" else (None, value)
+        image, _ = stm_image_from_grid(data, structure, height, isovalue, zrange)
+        output = os.path.join(directory, f"{index:03d}_{os.path.basename(file)}_{mode}_{value:g}.png")
+        plt.figure()
+        plot_stm_image(image, mode, structure, repeat_x, repeat_y, f"{title} ({mode} {value:g})", output)
+        records.append({"input": file, "mode": mode, "value": value, "output": output})
+
+    return records
+
+
+def batch_stm(
+    files: list[str],
+    heights: list[float] | None = None,
+    isovalues: list[float] | None = None,
+    zrange: list[float] | None = None,
+    repeat_x: int = 1,
+    repeat_y: int = 1,
+    title: str = "Simulated STM",
+    directory: str = "stm",
+    jobs: int = 1,
+) -> list[dict]:
+    """
+    Renders the constant height and constant current images of every file, height, and isovalue.
+
+    The images of a file are split into at most jobs blocks (more than one only when there are
+    fewer files than jobs), each block is rendered by a worker that reads the grid once. The
+    outputs are listed in directory/manifest.json.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    tasks = [("height", value) for value in heights or []]
+    tasks += [("current", value) for value in isovalues or []]
+    if not tasks:
+        raise ValueError("At least one height (-H) or isovalue (--isovalue) must be given")
+
+    os.makedirs(directory, exist_ok=True)
+    blocks = max(1, min(len(tasks), jobs // len(files)))
+    size = -(-len(tasks) // blocks)
+    chunks = [tasks[start : start + size] for start in range(0, len(tasks), size)]
+    arguments = [
+        (file, chunk, zrange, repeat_x, repeat_y, title, directory, index)
+        for index, file in enumerate(files)
+        for chunk in chunks
+    ]
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(arguments))) as executor:
+            results = list(executor.map(render_stm_images, *zip(*arguments)))
+    else:
+        results = [render_stm_images(*argument) for argument in arguments]
+
+    records = [record for result in results for record in result]
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(records, f, indent=2)
+
+    return records
+
+
+def stm_image(args):
+    image, mode, structure = simulate_stm(args.input[0], args.height, args.isovalue, args.zrange)
+    plot_stm_image(image, mode, structure, args.dims[0], args.dims[1], args.title, args.output)
+
+
+def batch(args):
+    batch_stm(
+        args.input,
+        args.heights,
+        args.isovalues,
+        args.zrange,
+        args.dims[0],
+        args.dims[1],
+        args.title,
+        args.output or "stm",
+        args.jobs,
+    )
+
+
 def plot_slice(args):
     plot_charge_density_slice(
-        args.input, args.height, args.dims[0], args.dims[1], args.title, args.output
+        args.input[0], args.height, args.dims[0], args.dims[1], args.title, args.output
     )
 
 
 def animate(args):
-    animate_slices(args.input, args.dims[0], args.dims[1], args.title, args.output)
+    animate_slices(
+        args.input[0],
+        args.dims[0],
+        args.dims[1],
+        args.title,
+        args.output,
+        args.zrange,
+        args.stride,
+        args.jobs,
+        args.fps,
+    )
 
 
 def run(args):
-    functions = {"plot": plot_slice, "animate": animate}
+    functions = {"plot": plot_slice, "animate": animate, "stm": stm_image, "batch": batch}
 
     for arg, func in functions.items():
         if getattr(args, arg):
@@ -1,8 +1,9 @@
 from itertools import product
 
 import numpy as np
-from pymatgen.io.vasp import Poscar, Wavecar
-from pymatgen.io.wannier90 import Unk
+
+from vsh.utils.fft_tools import ifftn, set_fft_backend
+from vsh.utils.wavecar_tools import WavecarFile
 
 
 def parse_spins(spin_channel_str: str):
@@ -17,42 +18,255 @@ def parse_spins(spin_channel_str: str):
         raise ValueError("Invalid spin channel value")
 
 
+# upper bound on the memory used by one stack of band FFTs
+PARCHG_BATCH_BYTES = 256 * 1024**2
+
+
+def plane_wave_indices(wavecar: WavecarFile, kpoint: int, ng) -> np.ndarray:
+    """Returns the flat index on the (already ifftshifted) FFT grid of every plane wave of a kpoint"""
+    G = wavecar.gpoints(kpoint).astype(int)
+    return np.ravel_multi_index(tuple((G % ng).T), tuple(ng))
+
+
+def band_coefficients(
+    wavecar: WavecarFile, kpoint: int, bands, spin: int = 0, spinor: int = 0
+) -> np.ndarray:
+    """Returns the plane wave coefficients of the bands at a kpoint as a (band, plane wave) array"""
+    return np.array([wavecar.coefficients(kpoint, band, spin, spinor) for band in bands])
+
+
+def band_batch(ng) -> int:
+    """Returns the number of bands whose wavefunctions fit in PARCHG_BATCH_BYTES"""
+    return max(1, PARCHG_BATCH_BYTES // (16 * int(np.prod(ng))))
+
+
+def band_wavefunctions(
+    wavecar: WavecarFile, kpoint: int, bands, ng, spin: int = 0, spinor: int = 0
+) -> np.ndarray:
+    """Returns the real space wavefunctions of the bands at a kpoint as a (band, *ng) array"""
+    N = np.prod(ng)
+    meshes = np.zeros((len(bands), N), dtype=np.complex128)
+    meshes[:, plane_wave_indices(wavecar, kpoint, ng)] = band_coefficients(
+        wavecar, kpoint, bands, spin, spinor
+    )
+
+    return ifftn(meshes.reshape(len(bands), *ng), axes=(1, 2, 3)) * N
+
+
+def accumulate_density(
+    grid: np.ndarray,
+    wavecar: WavecarFile,
+    kpoint: int,
+    bands,
+    spin: int = 0,
+    spinor: int = 0,
+    phase: bool = False,
+    weight: float = 1.0,
+) -> np.ndarray:
+    """Adds weight * |psi|^2 of the bands at a kpoint to grid, transforming stacks of bands at once"""
+    batch = band_batch(grid.shape)
+    for start in range(0, len(bands), batch):
+        wavefunctions = band_wavefunctions(
+            wavecar, kpoint, bands[start : start + batch], grid.shape, spin, spinor
+        )
+        density = wavefunctions.real**2 + wavefunctions.imag**2
+        if phase:
+            density *= np.sign(wavefunctions.real)
+        grid += weight * density.sum(axis=0)
+
+    return grid
+
+
+def partial_charge_data(
+    wavecar: WavecarFile, ng, kpoints, bands, weights, spin=None, spinor=None, phase=None
+) -> dict:
+    """Returns the total (and magnetization) density of the bands for one spin, spinor, and phase choice"""
+
+    def density(spin=0, spinor=0, phase=False):
+        grid = np.zeros(tuple(ng))
+        for kpoint in kpoints:
+            accumulate_density(
+                grid, wavecar, kpoint, bands, spin, spinor, phase, weights[kpoint]
+            )
+        return grid
+
+    # follows the spin and spinor conventions of pymatgen's Wavecar.get_parchg
+    if wavecar.spin == 2:
+        if spin is not None:
+            return {"total": density(spin=spin, phase=phase)}
+        up, down = density(spin=0), density(spin=1)
+        return {"total": up + down, "diff": up - down}
+
+    if spinor is not None:
+        return {"total": density(spinor=spinor, phase=phase)}
+    if wavecar.vasp_type.lower()[0] == "n":
+        return {"total": density(spinor=0) + density(spinor=1)}
+
+    # without spinors both channels hold the same wavefunction
+    return {"total": 2 * density(phase=phase)}
+
+
+def partial_charge_selection(nk: int, nb: int, kpoints, bands, weights) -> tuple:
+    """Returns the kpoints, bands, and kpoint weights of a PARCHG, all of them if none are given"""
+    kpoints = np.arange(nk) if kpoints is None else np.atleast_1d(kpoints)
+    bands = np.arange(nb) if bands is None else np.atleast_1d(bands)
+    if weights is None:
+        weights = np.ones(nk)
+    else:
+        weights = np.asarray(weights, dtype=float) / np.sum(weights)
+
+    return kpoints, bands, weights
+
+
+def partial_charge_grids(
+    wavecar: WavecarFile, kpoints, bands, spins, spinors, phases, scale: float, weights
+) -> dict:
+    """Returns the densities of the selected kpoints and bands summed over every spin, spinor, and phase"""
+    specifications = [spins, spinors, phases]
+    # check if any of the specications are None or list[None], if so, remove them
+    for i, spec in enumerate(specifications):
+        if spec is None:
+            specifications[i] = [None]
+        elif isinstance(spec, int):
+            specifications[i] = [spec]
+
+    ng = wavecar.ng * scale
+    data = {}
+    for spin, spinor, phase in product(*specifications):
+        parchg = partial_charge_data(
+            wavecar, ng, kpoints, bands, weights, spin, spinor, phase
+        )
+        for key, value in parchg.items():
+            data[key] = data[key] + value if key in data else value
+
+    return data
+
+
 def get_partial_charge_density(
-    wavecar: Wavecar,
-    poscar: Poscar,
+    wavecar: WavecarFile,
+    poscar: "Poscar",
     kpoints: list[int],
     bands: list[int],
     spins: list[int],
     spinors: list[int],
     phases: list[int],
     scale: float,
+    weights: list[float] = None,
 ):
-    """Returns the partial charge densities for given kpoints, bands, spins, spinors, phases, and scale."""
+    """
+    Returns the partial charge densities for given kpoints, bands, spins, spinors, phases, and scale.
 
-    specifications = [kpoints, bands, spins, spinors, phases]
-    # check if any of the specications are None or list[None], if so, remove them
-    for i, spec in enumerate(specifications):
-        if spec is None:
-            specifications[i] = [None]
-        elif isinstance(spec, int):
-            specifications[i] = [spec]
+    Densities are accumulated on a single grid, bands are inverse transformed in stacks and only
+    the final grid is wrapped in a Chgcar. All kpoints or bands are used if none are given. Without
+    weights every kpoint contributes equally, otherwise the weights are normalized to sum to one.
+    """
+    from pymatgen.io.vasp import Chgcar
+
+    kpoints, bands, weights = partial_charge_selection(
+        wavecar.nk, wavecar.nb, kpoints, bands, weights
+    )
+    data = partial_charge_grids(
+        wavecar, kpoints, bands, spins, spinors, phases, scale, weights
+    )
+
+    return Chgcar(poscar, data)
 
-    combinations = list(product(*specifications))
 
-    # initialize the first chgcar
-    parchg = wavecar.get_parchg(poscar, *combinations[0], scale=scale)
+def split_tasks(kpoints, bands, jobs: int) -> list[tuple]:
+    """Splits kpoints, and bands if there are fewer kpoints than jobs, into at most jobs blocks"""
+    if jobs < 1:
+        raise ValueError(f"Number of jobs must be a positive integer, got {jobs}")
+    if len(kpoints) == 0 or len(bands) == 0:
+        raise ValueError(f"No {'kpoints' if len(kpoints) == 0 else 'bands'} selected for the partial charge density")
 
-    # add the rest of the chgcar
-    for kpoint, band, spin, spinor, phase in combinations[1:]:
-        parchg += wavecar.get_parchg(poscar, kpoint, band, spin, spinor, phase, scale)
+    kpoint_blocks = np.array_split(kpoints, min(jobs, len(kpoints)))
+    band_blocks = np.array_split(bands, max(1, min(jobs // len(kpoint_blocks), len(bands))))
 
-    return parchg
+    return [(k, b) for k in kpoint_blocks for b in band_blocks]
+
+
+def partial_charge_worker(
+    file: str, vasp_type: str, precision: str, kpoints, bands, *specification
+) -> dict:
+    """Opens the WAVECAR in a worker process and returns the densities of a block of kpoints and bands"""
+    wavecar = WavecarFile(file, vasp_type=vasp_type, precision=precision)
+    return partial_charge_grids(wavecar, kpoints, bands, *specification)
+
+
+def get_partial_charge_density_parallel(
+    file: str,
+    poscar: "Poscar",
+    kpoints: list[int],
+    bands: list[int],
+    spins: list[int],
+    spinors: list[int],
+    phases: list[int],
+    scale: float,
+    weights: list[float] = None,
+    jobs: int = 2,
+    vasp_type: str = None,
+    precision: str = "normal",
+):
+    """
+    Returns the same partial charge density as get_partial_charge_density, computed by jobs processes.
+
+    Kpoints (and bands when there are fewer kpoints than jobs) are split into blocks, every worker
+    reads the WAVECAR itself, and the parent adds the densities up as the workers finish.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    from pymatgen.io.vasp import Chgcar
+
+    wavecar = WavecarFile(file)
+    kpoints, bands, weights = partial_charge_selection(
+        wavecar.nk, wavecar.nb, kpoints, bands, weights
+    )
+
+    data = {}
+    tasks = split_tasks(kpoints, bands, jobs)
+    with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = [
+            executor.submit(
+                partial_charge_worker,
+                file,
+                vasp_type,
+                precision,
+                kpoint_block,
+                band_block,
+                spins,
+                spinors,
+                phases,
+                scale,
+                weights,
+            )
+            for kpoint_block, band_block in tasks
+        ]
+        for future in as_completed(futures):
+            for key, value in future.result().items():
+                data[key] = data[key] + value if key in data else value
+
+    return Chgcar(poscar, data)
+
+
+def read_kpoint_weights(file: str) -> np.ndarray:
+    """Reads kpoint weights from a vasprun.xml, IBZKPT, or explicit KPOINTS file"""
+    if file.endswith(".xml"):
+        from vsh.utils.vasprun_tools import read_projected_eigenvalues
+
+        return read_projected_eigenvalues(file, projected=False)["weights"]
+
+    from pymatgen.io.vasp import Kpoints
+
+    return np.asarray(Kpoints.from_file(file).kpts_weights, dtype=float)
 
 
 def generate_parchg(args):
     """Generates a PARCHG file from a WAVECAR file."""
-    wave = Wavecar(args.input, vasp_type=args.vasp_type, precision=args.prec)
+    from pymatgen.io.vasp import Poscar
+
+    wave = WavecarFile(args.input, vasp_type=args.vasp_type, precision=args.prec)
     poscar = Poscar.from_file(args.structure)
+    nk, nb = wave.nk, wave.nb
 
     # sanitize the input
 
@@ -60,18 +274,41 @@ def generate_parchg(args):
     spinor = parse_spins(args.spinor)
 
     # check if the range of bands and kpoints exceeds the number of bands and kpoints
-    if args.bands and max(args.bands) > wave.nb:
+    if args.bands and max(args.bands) > nb:
         raise ValueError(
-            f"Maximum band index {max(args.bands)} exceeds the number of bands {wave.nb}"
+            f"Maximum band index {max(args.bands)} exceeds the number of bands {nb}"
         )
-    if args.kpoints and max(args.kpoints) > wave.nk:
+    if args.kpoints and max(args.kpoints) > nk:
         raise ValueError(
-            f"Maximum kpoint index {max(args.kpoints)} exceeds the number of kpoints {wave.nk}"
+            f"Maximum kpoint index {max(args.kpoints)} exceeds the number of kpoints {nk}"
         )
 
-    parchg = get_partial_charge_density(
-        wave, poscar, args.kpoints, args.bands, spins, spinor, args.phase, args.scale
-    )
+    weights = read_kpoint_weights(args.weights) if args.weights else None
+    if weights is not None and len(weights) != nk:
+        raise ValueError(
+            f"{args.weights} has {len(weights)} kpoint weights but the WAVECAR has {nk} kpoints"
+        )
+
+    specification = [
+        args.kpoints,
+        args.bands,
+        spins,
+        spinor,
+        args.phase,
+        args.scale,
+        weights,
+    ]
+    if args.jobs > 1:
+        parchg = get_partial_charge_density_parallel(
+            args.input,
+            poscar,
+            *specification,
+            jobs=args.jobs,
+            vasp_type=args.vasp_type,
+            precision=args.prec,
+        )
+    else:
+        parchg = get_partial_charge_density(wave, poscar, *specification)
 
     if args.output:
         if args.cube:
@@ -113,86 +350,159 @@ def generate_unk(args):
     if not args.output:
         raise ValueError("Output filename must be specified.")
 
-    wavecar = Wavecar(args.input)
-
-    N = np.prod(wavecar.ng)
-    for ik in range(wavecar.nk):
-        fname = f"UNK{ik+1:05d}."
-        if wavecar.vasp_type.lower()[0] == "n":
-            data = np.empty((wavecar.nb, 2, *wavecar.ng), dtype=np.complex128)
-            for ib in range(wavecar.nb):
-                data[ib, 0, :, :, :] = (
-                    np.fft.ifftn(wavecar.fft_mesh(ik, ib, spinor=0)) * N
-                )
-                data[ib, 1, :, :, :] = (
-                    np.fft.ifftn(wavecar.fft_mesh(ik, ib, spinor=1)) * N
-                )
-            Unk(ik + 1, data).write_file(f"{args.output}_{fname}")
-        else:
-            data = np.empty((wavecar.nb, *wavecar.ng), dtype=np.complex128)
-            for ispin in range(wavecar.spin):
-                for ib in range(wavecar.nb):
-                    data[ib, :, :, :] = (
-                        np.fft.ifftn(wavecar.fft_mesh(ik, ib, spin=ispin)) * N
-                    )
-                Unk(ik + 1, data).write_file(f"{args.output}_{fname}{ispin+1}")
+    wavecar = WavecarFile(args.input)
+    block = args.block or band_batch(wavecar.ng)
+    if args.jobs > 1:
+        return generate_unk_parallel(args.input, args.output, args.jobs, block, args.single)
+
+    return [
+        name
+        for ik in range(wavecar.nk)
+        for name in write_unk(wavecar, ik, args.output, block, args.single)
+    ]
+
+
+def write_record(f, data: np.ndarray) -> None:
+    """Writes data as one Fortran unformatted sequential record"""
+    marker = np.array([data.nbytes], dtype=np.uint32).tobytes()
+    f.write(marker)
+    f.write(data.tobytes())
+    f.write(marker)
+
+
+def write_unk(
+    wavecar: WavecarFile, ik: int, output: str, block: int = 1, single: bool = False
+) -> list[str]:
+    """
+    Writes the UNK file(s) of one kpoint and returns their names.
+
+    Bands are transformed block bands at a time and written straight to the records of the file,
+    the same layout as pymatgen's Unk.write_file, so memory does not grow with the number of bands.
+    Single precision files hold complex64 instead of complex128 values.
+    """
+    dtype = np.complex64 if single else np.complex128
+    fname = f"UNK{ik+1:05d}."
+    if wavecar.vasp_type.lower()[0] == "n":
+        # both spinors of a band are consecutive records of the same file
+        files = [(f"{output}_{fname}", 0, [0, 1])]
+    else:
+        files = [(f"{output}_{fname}{ispin+1}", ispin, [0]) for ispin in range(wavecar.spin)]
+
+    for name, spin, spinors in files:
+        with open(name, "wb") as f:
+            write_record(f, np.array([*wavecar.ng, ik + 1, wavecar.nb], dtype=np.int32))
+            for start in range(0, wavecar.nb, block):
+                bands = np.arange(start, min(start + block, wavecar.nb))
+                wavefunctions = [
+                    band_wavefunctions(wavecar, ik, bands, wavecar.ng, spin, spinor)
+                    for spinor in spinors
+                ]
+                for ib in range(len(bands)):
+                    for wavefunction in wavefunctions:
+                        write_record(f, wavefunction[ib].astype(dtype).ravel(order="F"))
+
+    return [name for name, _, _ in files]
+
+
+def unk_worker(file: str, kpoints, output: str, block: int, single: bool) -> list[str]:
+    """Opens the WAVECAR in a worker process and writes the UNK files of a block of kpoints"""
+    wavecar = WavecarFile(file)
+    return [name for ik in kpoints for name in write_unk(wavecar, ik, output, block, single)]
+
+
+def generate_unk_parallel(
+    file: str, output: str, jobs: int, block: int = 1, single: bool = False
+) -> list[str]:
+    """
+    Writes the UNK files of every kpoint using jobs processes.
+
+    Each worker reads the WAVECAR and writes the UNK files of its kpoints, so the (large)
+    wavefunctions never have to be sent back to the parent.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    nk = WavecarFile(file).nk
+    blocks = np.array_split(np.arange(nk), min(jobs, nk))
+
+    names = []
+    with ProcessPoolExecutor(max_workers=len(blocks)) as executor:
+        futures = [
+            executor.submit(unk_worker, file, block_kpoints.tolist(), output, block, single)
+            for block_kpoints in blocks
+        ]
+        for future in as_completed(futures):
+            names.extend(future.result())
+
+    return sorted(names)
 
 
 def print_number_of_kpoints(args):
-    wave = Wavecar(args.input)
+    wave = WavecarFile(args.input)
     print(f"{wave.nk}")
 
 
 def print_number_of_bands(args):
-    wave = Wavecar(args.input)
+    wave = WavecarFile(args.input)
     print(f"{wave.nb}")
 
 
 def print_fermi_energy(args):
-    wave = Wavecar(args.input)
+    wave = WavecarFile(args.input)
     print(f"{wave.efermi}")
 
 
-def get_band_occupancy_info(wavecar: Wavecar, nbands=19):
-    """Gets the band occupancy information from a WAVECAR file."""
+def get_band_occupancy_info(wavecar: WavecarFile, nbands=19):
+    """Gets the energy range and occupancy of the highest occupied bands from a WAVECAR file."""
     import pandas as pd
 
-    band_energy = wavecar.band_energy
-    dfs = []
-    for kpoint, bands in enumerate(band_energy):
-        df = pd.DataFrame(bands, columns=["energy", "idk", "occupancy"])
-        df["kpoint"] = kpoint
-
-        # Update each row of bands to include band index (starting at 0)
-        for i, row in df.iterrows():
-            df.at[i, "band"] = i
+    # (spin, kpoint, band) arrays, reduced over spins and kpoints for every band at once
+    energies = wavecar.band_energy[..., 0]
+    occupancies = wavecar.band_energy[..., 2]
+
+    # the occupation of each band summed over spins and averaged over kpoints
+    df = pd.DataFrame(
+        {
+            "band": np.arange(wavecar.nb),
+            "min_energy": energies.min(axis=(0, 1)),
+            "max_energy": energies.max(axis=(0, 1)),
+            "relative_occupancy": occupancies.sum(axis=0).mean(axis=0),
+        }
+    )
 
-        dfs.append(df)
+    return df[df["relative_occupancy"] > 0].tail(nbands)
 
-    df = pd.concat(dfs)
 
-    # Sum the occupation of each band and divide by the number of kpoints to get a relative occupancy
-    df["relative_occupancy"] = (
-        df.groupby("band")["occupancy"].transform("sum") / wavecar.nk
-    )
+def get_band_edges(wavecar: WavecarFile, threshold: float = 0.5) -> dict:
+    """Returns the HOMO, LUMO, and gap, counting states with occupancy above threshold as occupied"""
+    energies = wavecar.band_energy[..., 0]
+    occupied = wavecar.band_energy[..., 2] > threshold
 
-    # Drop the kpoint and idk columns
-    df = df.drop(columns=["kpoint", "idk", "occupancy"])
-    # Remove duplicate bands
-    df = df.drop_duplicates()
+    homo = energies[occupied].max() if occupied.any() else None
+    lumo = energies[~occupied].min() if not occupied.all() else None
+    gap = None if homo is None or lumo is None else max(0.0, lumo - homo)
 
-    return df[df["relative_occupancy"] > 0].tail(nbands)
+    return {"homo": homo, "lumo": lumo, "gap": gap}
 
 
 def print_band_occupancy_info(args):
-    wave = Wavecar(args.input)
+    wave = WavecarFile(args.input)
     df = get_band_occupancy_info(wave, args.nbands)
     # print dataframe without index
 
     print(df.to_string(index=False))
 
+    edges = get_band_edges(wave)
+    print(
+        "\n".join(
+            f"{key.upper()}: {value:.4f} eV" if value is not None else f"{key.upper()}: None"
+            for key, value in edges.items()
+        )
+    )
+
 
 def run(args):
+    set_fft_backend(args.fft, args.fft_threads, args.fft_wisdom)
+
     functions = {
         "parchg": generate_parchg,
         "unk": generate_unk,
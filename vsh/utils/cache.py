@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import pickle
+
+# the cache location, size limit (in bytes), and escape hatch can be set from the environment
+DEFAULT_CACHE_SIZE = 2 * 1024**3
+
+
+def cache_directory() -> str:
+    """Returns the directory where parsed files are cached"""
+    default = os.path.join(os.path.expanduser("~"), ".cache", "vsh")
+    return os.environ.get("VSH_CACHE_DIR", default)
+
+
+def cache_size() -> int:
+    """Returns the maximum size of the cache in bytes"""
+    return int(os.environ.get("VSH_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+
+
+def cache_enabled() -> bool:
+    """Checks if the parse cache is enabled"""
+    return not os.environ.get("VSH_NO_CACHE")
+
+
+def disable_cache() -> None:
+    """Disables the parse cache for the rest of the process (and its children)"""
+    os.environ["VSH_NO_CACHE"] = "1"
+
+
+def cache_key(file: str, name: str, **kwargs) -> str:
+    """Returns a key unique to the file path, size, modification time, parsed piece, and parse options"""
+    stat = os.stat(file)
+    identity = {
+        "path": os.path.abspath(file),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "name": name,
+        "kwargs": kwargs,
+    }
+    digest = hashlib.sha256(
+        json.dumps(identity, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+    return f"{name}-{digest}"
+
+
+class SizeLimitExceeded(Exception):
+    """Raised when an entry written to the cache would not fit in it"""
+
+
+class LimitedWriter:
+    """File wrapper that raises SizeLimitExceeded once more than limit bytes are written"""
+
+    def __init__(self, f, limit: int):
+        self.f = f
+        self.limit = limit
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.size += memoryview(data).nbytes
+        if self.size > self.limit:
+            raise SizeLimitExceeded(f"Cache entry is larger than the cache limit of {self.limit} bytes")
+        return self.f.write(data)
+
+
+def evict(directory: str, max_size: int, keep: list[str] = ()) -> None:
+    """Removes the least recently used entries, except those in keep, until the cache fits in max_size bytes"""
+    if not os.path.isdir(directory):
+        return None
+
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith((".pkl", ".npy")):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    keep = {os.path.abspath(path) for path in keep}
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+    return None
+
+
+def cached_parse(file: str, name: str, parser, **kwargs):
+    """
+    Returns parser(file, **kwargs), reusing a previous result if the file has not changed.
+
+    Results are pickled under the cache directory and evicted in least recently used order
+    once the cache grows past its size limit. Cache failures never prevent parsing.
+    """
+    if not cache_enabled():
+        return parser(file, **kwargs)
+
+    directory = cache_directory()
+    path = os.path.join(directory, cache_key(file, name, **kwargs) + ".pkl")
+
+    try:
+        with open(path, "rb") as f:
+            result = pickle.load(f)
+        # modification time doubles as the last access time for eviction
+        os.utime(path)
+        return result
+    except Exception:
+        # missing, corrupt, or incompatible entry, parse again and overwrite it
+        pass
+
+    result = parser(file, **kwargs)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # results larger than the whole cache are not cached, writing stops once that is known
+        with open(temporary, "wb") as f:
+            pickle.dump(result, LimitedWriter(f, cache_size()), protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+        evict(directory, cache_size(), keep=[path])
+    except Exception:
+        # unwritable directory, oversized or unpicklable result, the result is returned uncached
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+    return result
+
+
+def clear_cache() -> None:
+    """Removes every cached entry"""
+    evict(cache_directory(), 0)
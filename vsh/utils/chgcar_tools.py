@@ -0,0 +1,299 @@
+import os
+import pickle
+from itertools import islice
+
+import numpy as np
+
+from vsh.utils.cache import cache_directory, cache_enabled, cache_key, cache_size, evict
+
+# number of grid values parsed or combined (and held in memory per file) at a time
+CHUNK_SIZE = 2**16
+
+# exact powers of ten to scale the integer mantissas of fixed width values by
+POWERS_OF_TEN = np.array([float(10**k) for k in range(128)])
+
+
+def open_volumetric(filename: str):
+    """Opens a (gzipped) volumetric file for binary reading"""
+    if filename.endswith(".gz"):
+        import gzip
+
+        return gzip.open(filename, "rb")
+
+    return open(filename, "rb")
+
+
+def parse_fixed_width(data: bytes, line_width: int, width: int = 18) -> np.ndarray | None:
+    """
+    Parses whole lines of Fortran E18.11 style values (as written by VASP and pymatgen).
+
+    The digits and exponent of every value are read from fixed columns with integer arithmetic,
+    which is far faster than parsing each value as text. None is returned if data does not have
+    that layout, so that the caller can fall back to a general parser.
+    """
+    if (line_width - 1) % width or len(data) % line_width:
+        return None
+    lines = np.frombuffer(data, dtype=np.uint8).reshape(-1, line_width)
+    if np.any(lines[:, -1] != ord("\n")):
+        return None
+    fields = lines[:, :-1].reshape(-1, width)
+
+    # [ -][ -0-9].[0-9]{11}E[+-][0-9]{2}, non digits wrap around to more than 9
+    digits = fields[:, 3:14] - ord("0")
+    exponent_digits = fields[:, 16:18] - ord("0")
+    sign, lead, point, e, exponent_sign = fields[:, [0, 1, 2, 14, 15]].T
+    lead_digit = lead - ord("0")
+    if (
+        digits.max() > 9
+        or exponent_digits.max() > 9
+        or np.any(point != ord("."))
+        or np.any(e != ord("E"))
+        or np.any((exponent_sign != ord("+")) & (exponent_sign != ord("-")))
+        or np.any((sign != ord(" ")) & (sign != ord("-")))
+        or np.any((lead_digit > 9) & (lead != ord(" ")) & (lead != ord("-")))
+    ):
+        return None
+
+    # the digits before and after the decimal point as an (exactly representable) integer
+    mantissa = digits.astype(np.float64) @ POWERS_OF_TEN[10::-1]
+    mantissa += np.where(lead_digit <= 9, lead_digit, 0) * POWERS_OF_TEN[11]
+
+    exponent = exponent_digits.astype(np.int64) @ [10, 1]
+    scale = np.where(exponent_sign == ord("-"), -exponent, exponent) - 11
+
+    # dividing by an exact power of ten rounds the same as parsing the text
+    values = np.where(
+        scale >= 0,
+        mantissa * POWERS_OF_TEN[np.clip(scale, 0, None)],
+        mantissa / POWERS_OF_TEN[np.clip(-scale, 0, None)],
+    )
+    values[(sign == ord("-")) | (lead == ord("-"))] *= -1
+
+    return values
+
+
+class GridStream:
+    """
+    Sequential reader of the volumetric grids of a CHGCAR, PARCHG, or LOCPOT file.
+
+    The structure header is kept as read, every following grid (total density, then
+    magnetization) is found with next_grid and its values are read in chunks with read, so a
+    grid is never held in memory as a whole. Augmentation occupancies and magnetic moment
+    lines between grids are skipped.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.file = open_volumetric(filename)
+        self.header = []
+        for line in self.file:
+            # the structure ends at the first blank line
+            if not line.strip() and self.header:
+                break
+            self.header.append(line)
+
+        self.remaining = 0
+        self.per_line = 0
+        self.line_width = 0
+        self.buffer = np.empty(0)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def next_grid(self) -> tuple[int, int, int] | None:
+        """Moves to the next grid and returns its dimensions, None at the end of the file"""
+        if self.remaining:
+            raise ValueError(f"{self.remaining} values of the current grid of {self.filename} were not read")
+
+        for line in self.file:
+            fields = line.split()
+            # grid dimensions are the only line of three integers
+            if len(fields) == 3 and all(field.isdigit() for field in fields):
+                self.remaining = int(np.prod([int(field) for field in fields]))
+                self.per_line = 0
+                return tuple(int(field) for field in fields)
+
+        return None
+
+    def read(self, n: int) -> np.ndarray:
+        """Returns the next n values of the current grid"""
+        n = min(n, self.remaining + len(self.buffer))
+        while len(self.buffer) < n:
+            if not self.per_line:
+                line = self.file.readline()
+                values = np.array(line.split(), dtype=float)
+                self.per_line = len(values)
+                # lines of fixed width values can be parsed in bulk
+                fixed = line.endswith(b"\n") and len(line) == 18 * self.per_line + 1
+                self.line_width = len(line) if fixed else 0
+            else:
+                values = self.read_lines(-(-(n - len(self.buffer)) // self.per_line))
+            if not len(values):
+                raise ValueError(f"Unexpected end of grid in {self.filename}")
+            self.remaining -= len(values)
+            self.buffer = np.concatenate([self.buffer, values])
+
+        values, self.buffer = self.buffer[:n], self.buffer[n:]
+        return values
+
+    def read_lines(self, count: int) -> np.ndarray:
+        """Returns the values of the next count lines of the current grid"""
+        # the last line of a grid is short, so whole lines are read up to it
+        full_lines = min(count, self.remaining // self.per_line)
+        if self.line_width and full_lines:
+            position = self.file.tell()
+            values = parse_fixed_width(self.file.read(full_lines * self.line_width), self.line_width)
+            if values is not None:
+                return values
+            self.file.seek(position)
+            self.line_width = 0
+
+        lines = list(islice(self.file, count))
+        return np.array(b" ".join(lines).split(), dtype=float)
+
+    def read_grid(self, dtype=np.float64) -> np.ndarray:
+        """Returns every remaining value of the current grid, read in chunks into one array"""
+        values = np.empty(self.remaining + len(self.buffer), dtype=dtype)
+        for start in range(0, len(values), CHUNK_SIZE):
+            chunk = self.read(CHUNK_SIZE)
+            values[start : start + len(chunk)] = chunk
+
+        return values
+
+
+def read_chgcar(filename: str, magnetization: bool = True, dtype=np.float64) -> tuple:
+    """
+    Returns the Poscar and grids of a CHGCAR, PARCHG, or LOCPOT file.
+
+    The grids use pymatgen's keys (total, then diff or diff_x, diff_y, and diff_z) and the axis
+    order of Chgcar.data, but are Fortran ordered views of the values as stored in the file, so
+    reading a grid does not need a second copy of it. Augmentation occupancies are skipped, as
+    are the magnetization grids if magnetization is False. A dtype of np.float32 halves memory.
+    """
+    from pymatgen.io.vasp import Poscar
+
+    grids = []
+    with GridStream(filename) as stream:
+        poscar = Poscar.from_str(b"".join(stream.header).decode())
+        while (dims := stream.next_grid()) is not None:
+            grids.append(stream.read_grid(dtype).reshape(dims, order="F"))
+            if not magnetization:
+                break
+
+    if not grids:
+        raise ValueError(f"No volumetric data found in {filename}")
+
+    keys = ["total", "diff_x", "diff_y", "diff_z"] if len(grids) == 4 else ["total", "diff"]
+    return poscar, dict(zip(keys, grids))
+
+
+def write_atomically(path: str, write) -> None:
+    """Calls write on a temporary file and moves it to path, so path is never partially written"""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        write(f)
+    os.replace(temporary, path)
+
+
+def cached_chgcar(filename: str, magnetization: bool = True) -> tuple:
+    """
+    Returns read_chgcar(filename, magnetization), memory mapping the grids of a previous call.
+
+    The grids are saved as .npy files in the parse cache (keyed by the path, size, and
+    modification time of the file) next to a pickle of the Poscar and grid names. Later calls
+    memory map them, so reading a slice of a grid only touches that part of the file.
+    """
+    if not cache_enabled():
+        return read_chgcar(filename, magnetization)
+
+    directory = cache_directory()
+    key = os.path.join(directory, cache_key(filename, "chgcar", magnetization=magnetization))
+    try:
+        with open(f"{key}.pkl", "rb") as f:
+            poscar, keys = pickle.load(f)
+        grids = {name: np.load(f"{key}-{name}.npy", mmap_mode="r") for name in keys}
+        # modification time doubles as the last access time for eviction
+        for path in [f"{key}.pkl"] + [f"{key}-{name}.npy" for name in keys]:
+            os.utime(path)
+        return poscar, grids
+    except Exception:
+        # missing, evicted, or corrupt entry, parse again and overwrite it
+        pass
+
+    poscar, grids = read_chgcar(filename, magnetization)
+
+    # grids larger than the whole cache are not cached
+    if sum(grid.nbytes for grid in grids.values()) > cache_size():
+        return poscar, grids
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # the grids are written before the index so that a complete index always has its grids
+        paths = [f"{key}-{name}.npy" for name in grids]
+        for path, grid in zip(paths, grids.values()):
+            write_atomically(path, lambda f: np.save(f, grid))
+        write_atomically(
+            f"{key}.pkl",
+            lambda f: pickle.dump((poscar, list(grids)), f, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+        evict(directory, cache_size(), keep=paths + [f"{key}.pkl"])
+    except OSError:
+        pass
+
+    return poscar, grids
+
+
+def write_values(f, values: np.ndarray, per_line: int = 5) -> None:
+    """Writes values per_line to a line, the last line may be short"""
+    rows, rest = divmod(len(values), per_line)
+    if rows:
+        f.write(((" %17.11E" * per_line + "\n") * rows % tuple(values[: rows * per_line])).encode())
+    if rest:
+        f.write(((" %17.11E" * rest + "\n") % tuple(values[rows * per_line :])).encode())
+
+
+def combine_grids(
+    files: list[str], coefficients: list[float], output: str, chunk_size: int = CHUNK_SIZE
+) -> None:
+    """
+    Writes the linear combination sum(c_i * rho_i) of the grids of volumetric files.
+
+    The files are read in lockstep, chunk_size values at a time, so only a chunk of every file
+    is held in memory. The structure header of the first file is used and, as for the sum of
+    two pymatgen Chgcar objects, augmentation occupancies are not written.
+    """
+    if len(files) != len(coefficients):
+        raise ValueError(f"Expected one coefficient for each of the {len(files)} files, got {len(coefficients)}")
+
+    streams = [GridStream(file) for file in files]
+    try:
+        with open(output, "wb") as f:
+            f.writelines(streams[0].header)
+            f.write(b" \n")
+            while True:
+                dims = [stream.next_grid() for stream in streams]
+                if all(dim is None for dim in dims):
+                    break
+                if any(dim != dims[0] for dim in dims):
+                    raise ValueError(
+                        f"Grids do not match: {', '.join(f'{file} {dim}' for file, dim in zip(files, dims))}"
+                    )
+
+                f.write(f"   {dims[0][0]}   {dims[0][1]}   {dims[0][2]}\n".encode())
+                # chunks are a multiple of five values so that only the last line is short
+                chunk_size = max(5, chunk_size - chunk_size % 5)
+                for start in range(0, int(np.prod(dims[0])), chunk_size):
+                    combination = sum(
+                        coefficient * stream.read(chunk_size)
+                        for coefficient, stream in zip(coefficients, streams)
+                    )
+                    write_values(f, combination)
+    finally:
+        for stream in streams:
+            stream.close()
@@ -0,0 +1,108 @@
+import os
+import pickle
+
+import numpy as np
+
+# the backend, thread count, and pyFFTW wisdom file are read from the environment so worker
+# processes use the same settings as the parent
+FFT_BACKENDS = ["numpy", "scipy", "pyfftw"]
+
+_plans = {}
+_wisdom_loaded = False
+
+
+def fft_backend() -> str:
+    """Returns the FFT backend used for wavefunction transforms"""
+    backend = os.environ.get("VSH_FFT_BACKEND", "numpy")
+    if backend not in FFT_BACKENDS:
+        raise ValueError(f"Invalid FFT backend {backend}, must be one of {FFT_BACKENDS}")
+
+    return backend
+
+
+def fft_workers() -> int:
+    """Returns the number of threads of each transform"""
+    return int(os.environ.get("VSH_FFT_WORKERS", 1))
+
+
+def fft_wisdom() -> str | None:
+    """Returns the file pyFFTW plans are loaded from and saved to, if any"""
+    return os.environ.get("VSH_FFT_WISDOM")
+
+
+def set_fft_backend(backend: str = None, workers: int = None, wisdom: str = None) -> None:
+    """Sets the FFT backend, threads, and wisdom file for the rest of the process (and its children)"""
+    if backend is not None:
+        if backend not in FFT_BACKENDS:
+            raise ValueError(f"Invalid FFT backend {backend}, must be one of {FFT_BACKENDS}")
+        os.environ["VSH_FFT_BACKEND"] = backend
+    if workers is not None:
+        os.environ["VSH_FFT_WORKERS"] = str(workers)
+    if wisdom is not None:
+        os.environ["VSH_FFT_WISDOM"] = wisdom
+
+
+def load_wisdom(file: str) -> None:
+    """Imports the pyFFTW wisdom of a previous run, once per process"""
+    global _wisdom_loaded
+    import pyfftw
+
+    if not _wisdom_loaded and file and os.path.exists(file):
+        with open(file, "rb") as f:
+            pyfftw.import_wisdom(pickle.load(f))
+    _wisdom_loaded = True
+
+
+def save_wisdom(file: str) -> None:
+    """Exports the pyFFTW wisdom gathered so far"""
+    import pyfftw
+
+    with open(file, "wb") as f:
+        pickle.dump(pyfftw.export_wisdom(), f)
+
+
+def pyfftw_plan(shape: tuple, dtype, axes: tuple, workers: int):
+    """Returns a cached pyFFTW inverse transform plan of the given array shape"""
+    key = (shape, np.dtype(dtype).str, axes, workers)
+    if key not in _plans:
+        try:
+            import pyfftw
+            import pyfftw.builders
+        except ImportError:
+            raise ImportError("The pyfftw FFT backend requires pyFFTW (pip install pyfftw)")
+
+        wisdom = fft_wisdom()
+        load_wisdom(wisdom)
+        _plans[key] = pyfftw.builders.ifftn(
+            pyfftw.empty_aligned(shape, dtype=dtype),
+            axes=axes,
+            threads=workers,
+            planner_effort="FFTW_MEASURE",
+        )
+        if wisdom:
+            save_wisdom(wisdom)
+
+    return _plans[key]
+
+
+def ifftn(data: np.ndarray, axes: tuple = None) -> np.ndarray:
+    """
+    Inverse FFT over axes (all of them by default) with the selected backend.
+
+    Every backend uses NumPy's normalization. A stack of grids, e.g. (band, *ng) with
+    axes=(1, 2, 3), is transformed in a single call.
+    """
+    backend = fft_backend()
+    workers = fft_workers()
+    if backend == "scipy":
+        import scipy.fft
+
+        return scipy.fft.ifftn(data, axes=axes, workers=workers)
+
+    if backend == "pyfftw":
+        axes = tuple(range(data.ndim)) if axes is None else tuple(axes)
+        plan = pyfftw_plan(data.shape, data.dtype, axes, workers)
+        # the plan reuses its output array on every call
+        return plan(data).copy()
+
+    return np.fft.ifftn(data, axes=axes)
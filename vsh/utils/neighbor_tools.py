@@ -0,0 +1,95 @@
+import itertools
+
+import numpy as np
+
+
+def plane_spacings(cell: np.ndarray) -> np.ndarray:
+    """Returns the distances between the lattice planes parallel to each face of the cell"""
+    volume = abs(np.linalg.det(cell))
+    areas = np.linalg.norm(np.cross(cell[[1, 2, 0]], cell[[2, 0, 1]]), axis=1)
+
+    return volume / areas
+
+
+def periodic_images(
+    fractional: np.ndarray, cell: np.ndarray, pbc, cutoff: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the cartesian positions of the periodic images of atoms (with fractional coordinates
+    in [0, 1)) that lie within cutoff of the cell, the atom each one is an image of, and its
+    lattice translation.
+
+    The padding is measured along the normals of the cell faces, so the number of images is
+    close to the number of atoms for orthogonal and triclinic cells much larger than cutoff.
+    """
+    pbc = np.broadcast_to(pbc, 3)
+    margin = np.where(pbc, cutoff / plane_spacings(cell), 0)
+    repeats = np.ceil(margin).astype(int)
+
+    images, atoms, shifts = [], [], []
+    for shift in itertools.product(*[range(-n, n + 1) for n in repeats]):
+        shifted = fractional + shift
+        inside = (shifted >= -margin) & (shifted <= 1 + margin) | ~pbc
+        index = np.flatnonzero(np.all(inside, axis=1))
+        images.append(shifted[index] @ cell)
+        atoms.append(index)
+        shifts.append(np.tile(shift, (len(index), 1)))
+
+    return np.concatenate(images), np.concatenate(atoms), np.concatenate(shifts)
+
+
+def neighbor_chunks(
+    positions: np.ndarray, cutoff: float, cell: np.ndarray = None, pbc=False, chunk_size: int = 4096
+):
+    """
+    Yields the pairs of neighbor_list for chunk_size atoms at a time, so that only the pairs of
+    a chunk are held in memory while they are, for example, binned into a histogram.
+    """
+    from scipy.spatial import cKDTree
+
+    positions = np.asarray(positions, dtype=float)
+    if cell is None or not np.any(pbc):
+        cell, pbc = np.eye(3), False
+    cell = np.asarray(cell, dtype=float)
+
+    # atoms are wrapped into the cell to find their images, and translated back afterwards
+    fractional = np.linalg.solve(cell.T, positions.T).T
+    offset = np.where(pbc, np.floor(fractional), 0).astype(int)
+    fractional -= offset
+    wrapped = fractional @ cell
+
+    images, atoms, shifts = periodic_images(fractional, cell, pbc, cutoff)
+    tree = cKDTree(images)
+    for start in range(0, len(positions), chunk_size):
+        pairs = cKDTree(wrapped[start : start + chunk_size]).sparse_distance_matrix(
+            tree, cutoff, output_type="ndarray"
+        )
+        first, second, distance = pairs["i"] + start, atoms[pairs["j"]], pairs["v"]
+        shift = shifts[pairs["j"]] + offset[first] - offset[second]
+
+        # every pair is found from both of its atoms, and every atom finds itself
+        positive = (shift[:, 0] > 0) | (shift[:, 0] == 0) & (
+            (shift[:, 1] > 0) | (shift[:, 1] == 0) & (shift[:, 2] > 0)
+        )
+        keep = ((first < second) | (first == second) & positive) & (distance < cutoff)
+
+        yield first[keep], second[keep], distance[keep], shift[keep]
+
+
+def neighbor_list(
+    positions: np.ndarray, cutoff: float, cell: np.ndarray = None, pbc=False
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns every pair of atoms closer than cutoff, including pairs across periodic boundaries.
+
+    The pairs are returned as arrays of the first atom i, the second atom j, their distance, and
+    the lattice translation of j, so that the separation is positions[j] + shift @ cell -
+    positions[i]. Each pair is listed once, with i < j (or i == j for an atom and its own image).
+    Pairs are found with a KD-tree of the atoms and their images near the cell, so time and
+    memory grow with the number of atoms and pairs rather than with its square.
+    """
+    chunks = list(neighbor_chunks(positions, cutoff, cell, pbc))
+    if not chunks:
+        return np.zeros(0, int), np.zeros(0, int), np.zeros(0), np.zeros((0, 3), int)
+
+    return tuple(np.concatenate(arrays) for arrays in zip(*chunks))
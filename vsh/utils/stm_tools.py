@@ -40,16 +40,71 @@ def plot_stm_from_dat(
     return plt.show()
 
 
+def plane_heights(nz: int, c: float) -> np.ndarray:
+    """Returns the height of every z plane of a grid along a cell of length c"""
+    return np.arange(nz) * c / nz
+
+
+def constant_height_image(data: np.ndarray, c: float, height: float) -> np.ndarray:
+    """
+    Returns the (x, y) density at a height, linearly interpolated between the two nearest z planes.
+
+    Only those two planes are read, so memory mapped grids are not loaded as a whole.
+    """
+    nz = data.shape[2]
+    position = height / c * nz
+    lower = int(np.floor(position))
+    weight = position - lower
+
+    return (1 - weight) * data[:, :, lower % nz] + weight * data[:, :, (lower + 1) % nz]
+
+
+def constant_current_image(
+    data: np.ndarray, c: float, isovalue: float, zmin: float = 0.0, zmax: float = None
+) -> np.ndarray:
+    """
+    Returns the tip height above every (x, y) point of a constant current topograph.
+
+    The tip approaches from zmax (the top of the cell by default) and stops at the first height
+    where the density reaches isovalue, linearly interpolated between the planes on either side.
+    Every (x, y) point is searched at once, points where the density stays below isovalue down
+    to zmin are NaN.
+    """
+    nz = data.shape[2]
+    zmax = c if zmax is None else zmax
+    lowest = int(np.ceil(zmin / c * nz))
+    highest = min(int(np.floor(zmax / c * nz)), nz - 1)
+    if highest < lowest:
+        raise ValueError(f"No grid planes between {zmin} and {zmax}")
+
+    # planes from the top of the window down, as the tip approaches the surface
+    window = np.asarray(data[:, :, lowest : highest + 1])[:, :, ::-1]
+    reached = window >= isovalue
+    first = np.argmax(reached, axis=2)
+    found = reached.any(axis=2)
+
+    heights = plane_heights(nz, c)[lowest : highest + 1][::-1]
+    dz = c / nz
+    inside = np.take_along_axis(window, first[..., None], axis=2)[..., 0]
+    above = np.take_along_axis(window, np.maximum(first - 1, 0)[..., None], axis=2)[..., 0]
+
+    # between the first plane at or above the isovalue and the plane over it
+    fraction = np.where(first > 0, (inside - isovalue) / np.where(inside > above, inside - above, 1), 0)
+    image = heights[first] + np.clip(fraction, 0, 1) * dz
+
+    return np.where(found, image, np.nan)
+
+
 from pymatgen.io.common import VolumetricData
-from pymatgen.io.vasp import Chgcar
+from vsh.utils.chgcar_tools import cached_chgcar
 
 
 def get_charge_density_from_chgcar(file: str) -> np.array:
     """Returns the data from a CHGCAR file"""
-    chgcar = Chgcar.from_file(file)
-    data = chgcar.data["total"]
-    dims = chgcar.dim
-    structure = chgcar.structure
+    poscar, grids = cached_chgcar(file, magnetization=False)
+    data = grids["total"]
+    dims = data.shape
+    structure = poscar.structure
     return data, dims, structure
 
 
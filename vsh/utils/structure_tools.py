@@ -3,6 +3,9 @@ import pandas as pd
 from ase.io import read
 from scipy.spatial import distance_matrix
 
+# pairs of atoms binned at a time by the radial distribution functions
+RDF_CHUNK_PAIRS = 2**18
+
 
 def xyz_to_dataframe(file: str):
     """Reads an xyz file and returns a pandas dataframe."""
@@ -60,42 +63,191 @@ def vasp_to_distance_matrix(file: str, n: int = 12):
     return dist
 
 
-def calculate_rdf(coordinates, bins=1000, r_max=15):
+def rdf_histograms(
+    coordinates: np.ndarray,
+    bins: int = 1000,
+    r_max: float = None,
+    cell: np.ndarray = None,
+    pbc=False,
+    species: list[str] = None,
+) -> tuple[np.ndarray, np.ndarray, list[str], np.ndarray, float]:
+    """
+    Returns the bin edges, the histograms of the distances from atoms of each species to atoms of
+    each species (shape (n_species, n_species, bins)), the species, their counts, and the volume.
+
+    Distances under r_max (to periodic images too) are found by a neighbor search and binned with
+    np.bincount a chunk of atoms at a time, so memory grows with the number of pairs of a chunk
+    rather than with the square of the number of atoms. Without a periodic cell the volume is
+    that of the bounding box of the atoms and r_max defaults to the largest distance from the
+    first atom.
+    """
+    from vsh.utils.neighbor_tools import neighbor_chunks
+
+    coordinates = np.asarray(coordinates, dtype=float)
+    periodic = cell is not None and np.any(pbc)
+    if r_max is None:
+        r_max = 10.0 if periodic else np.max(np.linalg.norm(coordinates - coordinates[0], axis=1))
+    if periodic:
+        volume = abs(np.linalg.det(cell))
+    else:
+        # flat and linear molecules are given a thickness of 1 Å
+        volume = np.prod(np.maximum(np.ptp(coordinates, axis=0), 1.0))
+    if species is None:
+        species = ["X"] * len(coordinates)
+
+    # atoms per chunk so that a chunk has about RDF_CHUNK_PAIRS pairs
+    neighbors = len(coordinates) / volume * 4 / 3 * np.pi * r_max**3
+    chunk_size = int(np.clip(RDF_CHUNK_PAIRS / max(neighbors, 1), 1, 4096))
+
+    names, codes, counts = np.unique(species, return_inverse=True, return_counts=True)
+    n = len(names)
+    histograms = np.zeros(n * n * bins, dtype=np.int64)
+    for first, second, distances, _ in neighbor_chunks(coordinates, r_max, cell, pbc, chunk_size):
+        index = np.minimum((distances * (bins / r_max)).astype(np.int64), bins - 1)
+        a, b = codes[first], codes[second]
+        # each pair counts once from either atom
+        histograms += np.bincount((a * n + b) * bins + index, minlength=n * n * bins)
+        histograms += np.bincount((b * n + a) * bins + index, minlength=n * n * bins)
+
+    return np.linspace(0, r_max, bins + 1), histograms.reshape(n, n, bins), list(names), counts, volume
+
+
+def shell_volumes(bin_edges: np.ndarray) -> np.ndarray:
+    """Returns the volumes of the spherical shells between bin edges"""
+    return 4 / 3 * np.pi * np.diff(bin_edges**3)
+
+
+def calculate_rdf(coordinates, bins=1000, r_max=None, cell=None, pbc=False):
     """
-    Calculate the radial distribution function (RDF) from a set of XYZ coordinates.
+    Calculate the radial distribution function g(r) from a set of XYZ coordinates.
 
     Parameters:
     - coordinates: numpy array of shape (n_particles, 3) representing XYZ coordinates.
     - bins: number of bins for histogram.
     - r_max: maximum distance to consider.
+    - cell, pbc: lattice vectors (rows) and periodic directions, distances to images are counted.
 
     Returns:
     - bin_centers: centers of the bins.
-    - rdf: radial distribution function.
+    - rdf: radial distribution function, normalized by the number density so that it tends to 1.
     """
-    if r_max is None:
-        r_max = np.max(np.linalg.norm(coordinates - coordinates[0], axis=1))
+    bin_edges, histograms, _, counts, volume = rdf_histograms(coordinates, bins, r_max, cell, pbc)
+    natoms = np.sum(counts)
+    rdf = histograms.sum(axis=(0, 1)) / (natoms * natoms / volume * shell_volumes(bin_edges))
+
+    return (bin_edges[:-1] + bin_edges[1:]) / 2, rdf
 
-    # Calculate pairwise distances
-    distances = np.sqrt(
-        np.sum((coordinates[:, np.newaxis] - coordinates) ** 2, axis=-1)
-    )
 
-    # Create histogram
-    hist, bin_edges = np.histogram(distances, bins=bins, range=(0, r_max))
+def calculate_partial_rdf(coordinates, species, bins=1000, r_max=None, cell=None, pbc=False):
+    """
+    Calculate the partial radial distribution functions g_ab(r) of every pair of species.
 
-    # Calculate bin centers and RDF
-    bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-    rdf = hist / (4 * np.pi * bin_centers**2 * (r_max / bins))
+    Returns the bin centers and a dictionary of "a-b" to g_ab(r), the density of b atoms around
+    a atoms relative to the number density of b.
+    """
+    bin_edges, histograms, names, counts, volume = rdf_histograms(
+        coordinates, bins, r_max, cell, pbc, species
+    )
+    shells = shell_volumes(bin_edges)
+    rdfs = {
+        f"{names[a]}-{names[b]}": histograms[a, b] / (counts[a] * counts[b] / volume * shells)
+        for a in range(len(names))
+        for b in range(a, len(names))
+    }
+
+    return (bin_edges[:-1] + bin_edges[1:]) / 2, rdfs
+
+
+def structure_rdf(structure, bins=1000, r_max=None, partial=False):
+    """Calculates the (partial) radial distribution functions of a pymatgen Structure"""
+    lattice = structure.lattice
+    if partial:
+        species = [site.specie.symbol for site in structure]
+        return calculate_partial_rdf(structure.cart_coords, species, bins, r_max, lattice.matrix, lattice.pbc)
+
+    bin_centers, rdf = calculate_rdf(structure.cart_coords, bins, r_max, lattice.matrix, lattice.pbc)
+    return bin_centers, {structure.formula: rdf}
+
+
+def frame_rdf_sums(frames, bins=1000, r_max=10.0, partial=False) -> tuple[int, dict, dict]:
+    """Returns the number of frames and the sums of their (partial) g(r) and of their squares"""
+    sums, squares = {}, {}
+    for symbols, cell, positions in frames:
+        if partial:
+            _, rdfs = calculate_partial_rdf(positions, symbols, bins, r_max, cell, True)
+        else:
+            rdfs = {"total": calculate_rdf(positions, bins, r_max, cell, True)[1]}
+        for label, rdf in rdfs.items():
+            sums[label] = sums.get(label, 0) + rdf
+            squares[label] = squares.get(label, 0) + rdf**2
+
+    return len(frames), sums, squares
+
+
+def trajectory_rdf(
+    filename: str,
+    bins: int = 1000,
+    r_max: float = None,
+    partial: bool = False,
+    stride: int = 1,
+    jobs: int = 1,
+    batch_size: int = 16,
+) -> tuple[np.ndarray, dict]:
+    """
+    Averages the (partial) g(r) of every stride-th frame of an XDATCAR or vasprun.xml.
+
+    Frames are streamed from the file in batches of batch_size and, if jobs is more than one,
+    binned by a process pool with at most two batches per worker in flight, so memory does not
+    grow with the length of the trajectory. Returns the bin centers and a dictionary of labels
+    ("total" or "a-b") to the mean g(r) and its standard error over the frames. Consecutive MD
+    frames are correlated, so the error is only meaningful for a stride longer than the
+    correlation time.
+    """
+    from collections import deque
+    from itertools import islice
+
+    from vsh.utils.trajectory_tools import read_frames
+
+    r_max = 10.0 if r_max is None else r_max
+    frames = read_frames(filename, stride)
+    batches = iter(lambda: list(islice(frames, batch_size)), [])
+
+    count, sums, squares = 0, {}, {}
+
+    def add(result):
+        nonlocal count
+        count += result[0]
+        for label in result[1]:
+            sums[label] = sums.get(label, 0) + result[1][label]
+            squares[label] = squares.get(label, 0) + result[2][label]
+
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(frame_rdf_sums, batch, bins, r_max, partial))
+                if len(pending) >= 2 * jobs:
+                    add(pending.popleft().result())
+            while pending:
+                add(pending.popleft().result())
+    else:
+        for batch in batches:
+            add(frame_rdf_sums(batch, bins, r_max, partial))
 
-    # Remove the first bin because it is always 0
-    bin_centers = bin_centers[1:]
-    rdf = rdf[1:]
+    if not count:
+        raise ValueError(f"No frames found in {filename}")
 
-    # Normalize RDF
-    rdf /= np.sum(rdf)
+    rdfs = {}
+    for label in sums:
+        mean = sums[label] / count
+        variance = np.clip(squares[label] / count - mean**2, 0, None)
+        error = np.sqrt(variance / (count - 1)) if count > 1 else np.zeros_like(mean)
+        rdfs[label] = (mean, error)
 
-    return bin_centers, rdf
+    bin_edges = np.linspace(0, r_max, bins + 1)
+    return (bin_edges[:-1] + bin_edges[1:]) / 2, rdfs
 
 
 def plot_radial_distribution_function(
@@ -108,16 +260,15 @@ def plot_radial_distribution_function(
     fig = go.Figure()
 
     for input_file, label in zip(input_files, labels):
-        coords = Structure.from_file(input_file).cart_coords
-        bin_centers, rdf = calculate_rdf(coords)
+        bin_centers, rdf = structure_rdf(Structure.from_file(input_file))
 
         # Add trace for each input file
-        fig.add_trace(go.Scatter(x=bin_centers, y=rdf, mode="lines", name=label))
+        fig.add_trace(go.Scatter(x=bin_centers, y=next(iter(rdf.values())), mode="lines", name=label))
 
     fig.update_layout(
         title="Radial distribution function",
         xaxis_title="Distance (Å)",
-        yaxis_title="RDF",
+        yaxis_title="g(r)",
         template="plotly_white",
     )
 
@@ -0,0 +1,76 @@
+from itertools import islice
+
+import numpy as np
+
+
+def read_xdatcar_frames(filename: str, stride: int = 1):
+    """
+    Yields the symbols, cell, and cartesian positions of every stride-th frame of an XDATCAR.
+
+    Frames are read one at a time and the lines of skipped frames are not parsed, so a long
+    trajectory is never held in memory. The cell header repeated by variable cell runs is
+    followed.
+    """
+    with open(filename) as f:
+        symbols, cell, frame = None, None, 0
+        while line := f.readline():
+            if "configuration" not in line:
+                # a comment line, then the scale, lattice vectors, elements, and counts
+                scale = float(f.readline())
+                cell = np.array([f.readline().split() for _ in range(3)], dtype=float) * scale
+                elements = f.readline().split()
+                counts = [int(count) for count in f.readline().split()]
+                symbols = [element for element, count in zip(elements, counts) for _ in range(count)]
+                continue
+
+            lines = list(islice(f, len(symbols)))
+            if len(lines) < len(symbols):
+                break
+            if frame % stride == 0:
+                fractional = np.array(" ".join(lines).split(), dtype=float).reshape(-1, 3)
+                yield symbols, cell, fractional @ cell
+            frame += 1
+
+
+def read_vasprun_frames(filename: str, stride: int = 1):
+    """
+    Yields the symbols, cell, and cartesian positions of every stride-th ionic step of a
+    vasprun.xml.
+
+    The file is parsed incrementally and every ionic step is discarded once read, so memory
+    does not grow with the number of steps.
+    """
+    import xml.etree.ElementTree as ET
+
+    symbols, frame, depth = [], 0, 0
+    context = ET.iterparse(filename, events=("start", "end"))
+    _, root = next(context)
+    for event, element in context:
+        if element.tag == "calculation":
+            depth += 1 if event == "start" else -1
+        if event != "end":
+            continue
+
+        if element.tag == "atominfo":
+            atoms = element.find("array[@name='atoms']/set")
+            symbols = [record.find("c").text.strip() for record in atoms.findall("rc")]
+        elif element.tag == "structure" and depth:
+            if frame % stride == 0:
+                basis = element.find("crystal/varray[@name='basis']")
+                cell = np.array([v.text.split() for v in basis.findall("v")], dtype=float)
+                positions = element.find("varray[@name='positions']")
+                fractional = np.array([v.text.split() for v in positions.findall("v")], dtype=float)
+                yield symbols, cell, fractional @ cell
+            frame += 1
+        elif element.tag == "calculation":
+            root.clear()
+
+
+def read_frames(filename: str, stride: int = 1):
+    """Yields every stride-th frame of an XDATCAR or vasprun.xml trajectory"""
+    if stride < 1:
+        raise ValueError(f"Stride must be a positive integer, got {stride}")
+    if filename.endswith(".xml"):
+        return read_vasprun_frames(filename, stride)
+
+    return read_xdatcar_frames(filename, stride)
@@ -0,0 +1,154 @@
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from vsh.utils.cache import cached_parse
+
+# elements that can be cleared as soon as the parser has consumed them
+CLEARED_TAGS = {"r", "set", "array", "eigenvalues", "projected", "calculation", "dos"}
+
+
+def parse_row(text: str) -> list[str]:
+    """Splits an <r> or <v> row of a vasprun.xml array"""
+    return text.split()
+
+
+def read_projected_eigenvalues(
+    file: str, projected: bool = True, dtype: np.dtype = np.float32
+) -> dict:
+    """
+    Reads the eigenvalues and projected eigenvalues of a vasprun.xml file in a single streaming pass.
+
+    The header (NBANDS, ISPIN, number of ions and kpoints) is read before the eigenvalue blocks
+    so that the output arrays are preallocated and filled row by row. Elements are cleared as soon
+    as they are consumed, the document tree is never held in memory.
+
+    Parameters:
+    - file: path to the vasprun.xml file.
+    - projected: whether to read the <projected> block.
+    - dtype: dtype of the projections array.
+
+    Returns:
+    - dictionary with energies and occupations (spin, kpoint, band), projections
+      (spin, kpoint, band, ion, orbital), orbitals, symbols, kpoints, weights and efermi.
+      For non-collinear calculations only the total projections are kept.
+    """
+    nbands, nspins, nions, efermi = None, 1, None, None
+    kpoints, weights, orbitals, symbols = None, None, [], []
+    eigenvalues, projections = None, None
+    eigenvalue_row, projection_row = 0, 0
+
+    section = None
+    stack = []
+    for event, elem in ET.iterparse(file, events=("start", "end")):
+        tag = elem.tag
+
+        if event == "start":
+            stack.append(tag)
+            parent = stack[-2] if len(stack) > 1 else None
+
+            # skip eigenvalues of other kpoint sets (e.g. KPOINTS_OPT)
+            if tag == "array" and stack[-3:-1] in (
+                ["calculation", "eigenvalues"],
+                ["projected", "eigenvalues"],
+            ):
+                section = "eigenvalues"
+                if eigenvalues is None:
+                    eigenvalues = np.zeros((nspins * len(kpoints) * nbands, 2))
+                eigenvalue_row = 0
+
+            elif tag == "array" and parent == "projected" and projected:
+                section = "projected"
+                orbitals = []
+                projection_row = 0
+
+            elif tag == "array" and parent == "atominfo" and elem.get("name") == "atoms":
+                section = "atoms"
+
+            elif tag == "set" and section == "projected" and projections is None:
+                projections = np.zeros(
+                    (nspins * len(kpoints) * nbands * nions, len(orbitals)), dtype=dtype
+                )
+
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+
+        if tag == "r" and section == "eigenvalues":
+            eigenvalues[eigenvalue_row] = parse_row(elem.text)
+            eigenvalue_row += 1
+
+        elif tag == "r" and section == "projected":
+            # non-collinear runs store the x, y, and z magnetization as extra spin sets
+            if projection_row < len(projections):
+                projections[projection_row] = parse_row(elem.text)
+            projection_row += 1
+
+        elif tag == "rc" and section == "atoms":
+            symbols.append(elem[0].text.strip())
+
+        elif tag == "field" and section == "projected":
+            orbitals.append(elem.text.strip())
+
+        elif tag == "array":
+            section = None
+
+        elif tag == "i":
+            name = elem.get("name")
+            if name == "NBANDS":
+                nbands = int(elem.text)
+            elif name == "ISPIN":
+                nspins = int(elem.text)
+            elif name == "efermi":
+                efermi = float(elem.text)
+
+        elif tag == "atoms" and parent == "atominfo":
+            nions = int(elem.text)
+
+        elif tag == "varray" and stack[-2:] == ["modeling", "kpoints"]:
+            rows = np.array([parse_row(v.text) for v in elem], dtype=float)
+            if elem.get("name") == "kpointlist":
+                kpoints = rows
+            elif elem.get("name") == "weights":
+                weights = rows[:, 0]
+            elem.clear()
+
+        if tag in CLEARED_TAGS:
+            elem.clear()
+
+    if eigenvalues is None:
+        raise ValueError(f"No eigenvalues found in {file}")
+    if projected and projections is None:
+        raise ValueError(
+            f"No projected eigenvalues found in {file}. Was the calculation run with LORBIT?"
+        )
+
+    shape = (nspins, len(kpoints), nbands)
+    eigenvalues = eigenvalues.reshape(*shape, 2)
+    data = {
+        "energies": eigenvalues[..., 0],
+        "occupations": eigenvalues[..., 1],
+        "projections": None,
+        "orbitals": orbitals,
+        "symbols": symbols,
+        "kpoints": kpoints,
+        "weights": weights,
+        "efermi": efermi,
+    }
+    if projected:
+        data["projections"] = projections.reshape(*shape, nions, len(orbitals))
+
+    return data
+
+
+def read_vasprun(file: str, **parse_kwargs):
+    """Parses a vasprun.xml file with pymatgen"""
+    from pymatgen.io.vasp import Vasprun
+
+    return Vasprun(file, **parse_kwargs)
+
+
+def load_vasprun(file: str, **parse_kwargs):
+    """Returns a pymatgen Vasprun object, reusing the parse cache when the file has not changed"""
+    return cached_parse(file, "vasprun", read_vasprun, **parse_kwargs)
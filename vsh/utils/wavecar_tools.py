@@ -0,0 +1,189 @@
+import numpy as np
+
+# 2m/hbar^2 in agreement with VASP (and pymatgen)
+C = 0.262465831
+
+# precision tag of the header: dtype of the plane wave coefficients
+COEFFICIENT_DTYPES = {
+    45200: np.complex64,
+    45210: np.complex128,
+    53300: np.complex64,
+    53310: np.complex128,
+}
+
+
+def reciprocal_lattice(a: np.ndarray) -> np.ndarray:
+    """Returns the reciprocal lattice vectors (with the 2 pi factor) as rows"""
+    volume = np.dot(a[0], np.cross(a[1], a[2]))
+    b = np.array([np.cross(a[1], a[2]), np.cross(a[2], a[0]), np.cross(a[0], a[1])])
+
+    return 2 * np.pi * b / volume
+
+
+def maximum_g_indices(b: np.ndarray, encut: float) -> np.ndarray:
+    """Returns the largest G vector index along each reciprocal lattice vector within the cutoff"""
+    # adapted from WaveTrans, as in pymatgen's Wavecar._generate_nbmax
+    bmag = np.linalg.norm(b, axis=1)
+    candidates = []
+    for i, j, k in [(0, 1, 2), (0, 2, 1), (1, 2, 0)]:
+        phi = np.arccos(np.dot(b[i], b[j]) / (bmag[i] * bmag[j]))
+        normal = np.cross(b[i], b[j])
+        sphi = np.dot(b[k], normal) / (bmag[k] * np.linalg.norm(normal))
+        nbmax = np.sqrt(encut * C) / bmag
+        nbmax[i] /= np.abs(np.sin(phi))
+        nbmax[j] /= np.abs(np.sin(phi))
+        nbmax[k] /= np.abs(sphi)
+        candidates.append(nbmax + 1)
+
+    return np.max(candidates, axis=0).astype(int)
+
+
+def g_points(
+    kpoint: np.ndarray, b: np.ndarray, encut: float, nbmax: np.ndarray, gamma: bool = False
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the G vectors within the cutoff of a kpoint, in the order VASP stores the coefficients.
+
+    For gamma only files the second array holds the positions of the stored G vectors whose
+    -G partners are not stored, otherwise it is empty.
+    """
+
+    def axis(n, half=False):
+        return np.arange(n + 1) if half else np.r_[np.arange(n + 1), np.arange(-n, 0)]
+
+    # VASP loops over the third index slowest and the first fastest
+    i3, j2, k1 = np.meshgrid(
+        axis(nbmax[2]), axis(nbmax[1]), axis(nbmax[0], gamma), indexing="ij"
+    )
+    G = np.column_stack([k1.ravel(), j2.ravel(), i3.ravel()])
+    if gamma:
+        k1, j2, i3 = G.T
+        G = G[~((k1 == 0) & ((j2 < 0) | ((j2 == 0) & (i3 < 0))))]
+
+    energies = np.linalg.norm((kpoint + G) @ b, axis=1) ** 2 / C
+    G = G[energies < encut]
+
+    if not gamma:
+        return G, np.array([], dtype=int)
+    return G, np.flatnonzero(np.any(G != 0, axis=1))
+
+
+class WavecarFile:
+    """
+    Random access reader of a VASP WAVECAR file.
+
+    Opening the file only reads the two header records and the record of every kpoint
+    (plane wave count, kpoint, and band energies). Plane wave coefficients are memory mapped
+    and read one band at a time, so the number of kpoints or bands can be inspected and a few
+    bands transformed without loading the whole file. Attribute names follow pymatgen's Wavecar.
+    """
+
+    def __init__(self, filename: str, vasp_type: str = None, precision: str = "normal"):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            self.recl, self.spin, self.rtag = np.fromfile(f, np.float64, 3).astype(int)
+            if self.rtag not in COEFFICIENT_DTYPES:
+                raise ValueError(
+                    f"Invalid rtag {self.rtag}, must be one of {set(COEFFICIENT_DTYPES)}"
+                )
+            f.seek(self.recl)
+            header = np.fromfile(f, np.float64, 13)
+
+            self.nk, self.nb = int(header[0]), int(header[1])
+            self.encut = header[2]
+            self.a = header[3:12].reshape(3, 3)
+            self.efermi = header[12]
+
+            # one record per kpoint followed by one record per band, for every spin
+            records = 2 + np.arange(self.spin * self.nk) * (self.nb + 1)
+            self.nplanes = np.empty((self.spin, self.nk), dtype=int)
+            self.kpoints = np.empty((self.nk, 3))
+            self.band_energy = np.empty((self.spin, self.nk, self.nb, 3))
+            for index, record in enumerate(records):
+                spin, kpoint = divmod(index, self.nk)
+                f.seek(record * self.recl)
+                data = np.fromfile(f, np.float64, 4 + 3 * self.nb)
+                self.nplanes[spin, kpoint] = int(data[0])
+                self.kpoints[kpoint] = data[1:4]
+                self.band_energy[spin, kpoint] = data[4:].reshape(self.nb, 3)
+
+        # byte offset of the coefficient record of every (spin, kpoint, band)
+        self.offsets = (records.reshape(self.spin, self.nk, 1) + 1 + np.arange(self.nb)) * self.recl
+        self.dtype = COEFFICIENT_DTYPES[self.rtag]
+
+        self.vol = np.dot(self.a[0], np.cross(self.a[1], self.a[2]))
+        self.b = reciprocal_lattice(self.a)
+        self._nbmax = maximum_g_indices(self.b, self.encut)
+        self.ng = self._nbmax * 3 if precision.lower()[0] == "n" else self._nbmax * 4
+
+        self._vasp_type = vasp_type
+        self._gpoints = {}
+        self._map = None
+
+    @property
+    def vasp_type(self) -> str:
+        """The executable that wrote the file (std, gam, or ncl), detected on first use if not given"""
+        if self._vasp_type is None:
+            self._vasp_type = self.detect_vasp_type()
+        return self._vasp_type
+
+    def detect_vasp_type(self) -> str:
+        """Determines if the file was written by the standard, gamma only, or noncollinear executable"""
+        nplane = self.nplanes[0, 0]
+        gamma, _ = g_points(self.kpoints[0], self.b, self.encut, self._nbmax, gamma=True)
+        if len(gamma) == nplane:
+            return "gam"
+
+        standard, _ = g_points(self.kpoints[0], self.b, self.encut, self._nbmax)
+        return "std" if len(standard) == nplane else "ncl"
+
+    def gpoints(self, kpoint: int) -> np.ndarray:
+        """Returns the G vectors of a kpoint in the order of its coefficients"""
+        if kpoint not in self._gpoints:
+            gamma = self.vasp_type.lower()[0] == "g"
+            G, extra = g_points(self.kpoints[kpoint], self.b, self.encut, self._nbmax, gamma)
+
+            stored = len(G) * (2 if self.vasp_type.lower()[0] == "n" else 1)
+            if stored != self.nplanes[0, kpoint]:
+                raise ValueError(
+                    f"Expected {self.nplanes[0, kpoint]} plane waves at kpoint {kpoint} but found "
+                    f"{stored}, the WAVECAR was not written by a {self.vasp_type} executable"
+                )
+            # gamma only files store half of the coefficients, the rest are complex conjugates
+            self._gpoints[kpoint] = (np.concatenate([G, -G[extra]]), extra)
+
+        return self._gpoints[kpoint][0]
+
+    def coefficients(self, kpoint: int, band: int, spin: int = 0, spinor: int = None) -> np.ndarray:
+        """Returns the plane wave coefficients of one band, reading only its record"""
+        if self._map is None:
+            self._map = np.memmap(self.filename, dtype=np.uint8, mode="r")
+
+        self.gpoints(kpoint)
+        _, extra = self._gpoints[kpoint]
+        nplane = self.nplanes[spin, kpoint]
+        offset = self.offsets[spin, kpoint, band]
+        size = nplane * np.dtype(self.dtype).itemsize
+        data = np.array(self._map[offset : offset + size].view(self.dtype))
+
+        if self.vasp_type.lower()[0] == "n":
+            data = data.reshape(2, nplane // 2).astype(np.complex128)
+            return data if spinor is None else data[spinor]
+
+        if len(extra):
+            # reconstructed the same way (and in the same precision) as pymatgen's Wavecar
+            data[extra] = data[extra].astype(np.complex128) / np.sqrt(2)
+            data = np.concatenate([data, np.conj(data[extra])])
+
+        return data.astype(np.complex128)
+
+    def fft_mesh(
+        self, kpoint: int, band: int, spin: int = 0, spinor: int = 0, shift: bool = True
+    ) -> np.ndarray:
+        """Places the coefficients of a band on the FFT grid, same as pymatgen's Wavecar.fft_mesh"""
+        coefficients = self.coefficients(kpoint, band, spin, spinor)
+        mesh = np.zeros(tuple(self.ng), dtype=np.complex128)
+        G = self.gpoints(kpoint).astype(int)
+        mesh[tuple((G % self.ng).T)] = coefficients
+
+        return mesh if shift else np.fft.fftshift(mesh)